@@ -37,6 +37,7 @@ from apps.core.admin import (
     BUTTON_TEMPLATE,
     BaseProcessActionsAdminMixin,
     ReadOnlyAdminMixin,
+    TrigramSearchMixin,
 )
 from apps.reviews.models import Review
 from apps.reviews.tools import is_adding_review_allowed
@@ -50,7 +51,7 @@ class TimeSlotToAppointmentInline(admin.StackedInline):
     raw_id_fields = ('time_slot',)
 
 
-class BaseAppointmentAdmin(CRUDHistoryMixin, admin.ModelAdmin):
+class BaseAppointmentAdmin(TrigramSearchMixin, CRUDHistoryMixin, admin.ModelAdmin):
     list_display = (
         'id',
         PATIENT,
@@ -104,6 +105,18 @@ class BaseAppointmentAdmin(CRUDHistoryMixin, admin.ModelAdmin):
         f'{DOCTOR}__public_short_name',
         INTEGRATION_DATA,
     )
+    trigram_search_fields = (
+        f'{AUTHOR_PATIENT}__profile__full_name',
+        f'{AUTHOR_PATIENT}__profile__users__username',
+        f'{AUTHOR_PATIENT}__profile__users__contacts__value',
+        f'{PATIENT}__profile__full_name',
+        f'{PATIENT}__profile__users__username',
+        f'{PATIENT}__profile__users__contacts__value',
+        REASON_TEXT,
+        f'{DOCTOR}__profile__full_name',
+        f'{DOCTOR}__public_full_name',
+        f'{DOCTOR}__public_short_name',
+    )
     readonly_fields = (
         'duration',
         INTEGRATION_DATA,
@@ -10,6 +10,8 @@ MIN_APPOINTMENT_TIMEDELTA = timedelta(seconds=0)
 MAX_APPOINTMENT_TIMEDELTA = timedelta(hours=24)
 MIN_TIMESLOT_TIMEDELTA = timedelta(seconds=1)
 MAX_TIMESLOT_TIMEDELTA = timedelta(hours=24)
+EARLIEST_TIME_SLOTS_DEFAULT_LIMIT: Final = 10
+EARLIEST_TIME_SLOTS_MAX_LIMIT: Final = 50
 
 APPOINTMENT_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
 
@@ -60,6 +60,9 @@ class StartEndQuerySet(QuerySet):
     def start_before_day(self, needed_date: date):
         return self.filter(**{'start__lt': datetime.combine(needed_date, time.min),})
 
+    def start_from_day(self, needed_date: date):
+        return self.filter(**{'start__gte': datetime.combine(needed_date, time.min),})
+
     def intersects_with_start(self, start: datetime):
         """
         :type start: datetime
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.12 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_auto_20210505_1339'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeslot',
+            index=models.Index(condition=models.Q(is_available=True), fields=['doctor', 'start'], name='timeslot_free_doctor_start'),
+        ),
+    ]
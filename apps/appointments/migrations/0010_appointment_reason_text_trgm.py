@@ -0,0 +1,23 @@
+# Generated by Django 3.1.12 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_trigram_indexes'),
+        ('appointments', '0009_timeslot_free_doctor_start'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['reason_text'],
+                name='appointment_reason_text_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ),
+    ]
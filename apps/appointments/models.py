@@ -4,6 +4,7 @@ from typing import Optional
 
 from ckeditor.fields import RichTextField
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
@@ -354,6 +355,14 @@ class Appointment(BaseAppointment, AppointmentStatusMixin):
         verbose_name_plural = _('Записи на приём')
         unique_together = ('patient', 'doctor', 'service', 'subsidiary', 'start', 'end')
         abstract = False
+        # поиск в админке, см. apps.core.admin.TrigramSearchMixin
+        indexes = [
+            GinIndex(
+                fields=['reason_text'],
+                name='appointment_reason_text_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
 
     def __str__(self):
         return self.short_str
@@ -476,6 +485,14 @@ class TimeSlot(StartEndModelMixin, TimeStampedModel):
         verbose_name = _('Талон')
         verbose_name_plural = _('Талоны')
         ordering = ('start', 'duration')
+        indexes = [
+            # ближайшие свободные талоны врача / врачей услуги
+            models.Index(
+                fields=['doctor', 'start'],
+                name='timeslot_free_doctor_start',
+                condition=models.Q(is_available=True),
+            ),
+        ]
 
     @property
     def short_str(self) -> str:
@@ -1,7 +1,8 @@
 import abc
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from typing import Union, Optional
 
+from django.db.models import DateTimeField, OuterRef, Subquery
 from django.utils import timezone
 
 from apps.appointments import models, managers
@@ -15,13 +16,14 @@ from apps.appointments.constants import (
     DOCTOR,
     SUBSIDIARY,
     START,
+    EARLIEST_TIME_SLOTS_DEFAULT_LIMIT,
 )
 from apps.appointments.managers import (
     AppointmentQuerySet,
     TimeSlotQuerySet,
 )
 from apps.clinics.constants import PATIENT
-from apps.clinics.models import Patient
+from apps.clinics.models import Patient, Doctor, DoctorToService
 from apps.core.utils import today_range
 
 
@@ -228,6 +230,21 @@ class TimeSlots:
     def free_past(self):
         return self.free().past()
 
+    @classmethod
+    def next_free_start(cls, doctor_ref: Union[OuterRef, int] = OuterRef('pk')) -> Subquery:
+        """
+        Начало ближайшего свободного будущего талона врача - подзапрос для annotate
+        """
+        # врач во внешнем запросе уже отфильтрован, join из TimeSlotManager не нужен
+        qs = (
+            cls.model.all_objects.free()
+            .future()
+            .filter(doctor_id=doctor_ref)
+            .order_by(START)
+            .values(START)[:1]
+        )
+        return Subquery(qs, output_field=DateTimeField())
+
     @classmethod
     def get_by_id(cls, obj_id: int) -> models.TimeSlot:
         qs = (
@@ -254,6 +271,39 @@ class TimeSlots:
 
         return queryset
 
+    @classmethod
+    def earliest_free_for_service(
+        cls,
+        service_id: int,
+        subsidiary_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        limit: int = EARLIEST_TIME_SLOTS_DEFAULT_LIMIT,
+    ) -> TimeSlotQuerySet:
+        """
+        Ближайшие свободные талоны по услуге среди всех врачей, которые ее оказывают.
+        Только врачи, видимые пациенту и с открытой для пациентов записью.
+        Один запрос: врачи отбираются подзапросом.
+        """
+        doctor_ids = (
+            Doctor.objects.displayed()
+            .without_hidden()
+            .filter(
+                is_fake=False,
+                is_timeslots_available_for_patient=True,
+                id__in=DoctorToService.objects.filter(service_id=service_id).values('doctor_id'),
+            )
+            .values('id')
+        )
+        qs = cls.model.all_objects.free().future().filter(doctor_id__in=doctor_ids)
+        if subsidiary_id:
+            qs = qs.filter(subsidiary_id=subsidiary_id)
+        if start_date:
+            qs = qs.start_from_day(start_date)
+        if end_date:
+            qs = qs.start_before_day(end_date + timedelta(days=1))
+        return qs.order_by(START, 'id')[:limit]
+
 
 class DoctorTimeSlots(TimeSlots):
     def __init__(self, doctor_id: int):
@@ -138,6 +138,25 @@ class AppointmentSerializer(serializers.ModelSerializer):
             ADDITIONAL_NOTES,
             IS_FOR_WHOLE_DAY,
         )
+        # для ?fields= (см. apps.core.views.SparseFieldsetMixin)
+        sparse_field_dependencies = {
+            HUMAN_START: (START, IS_FOR_WHOLE_DAY),
+            HUMAN_START_DATE: (START,),
+            HUMAN_START_DATETIME: (START,),
+            HUMAN_START_DATE_SHORT: (START,),
+            HUMAN_WEEKDAY: (START,),
+            HUMAN_START_TIME: (START, IS_FOR_WHOLE_DAY),
+            'status': ('status',),
+            'is_payment_enabled': ('status',),
+            'is_cancel_by_patient_available': ('status',),
+            'is_archived': ('status',),
+            'is_finished': ('status',),
+            'result': ('status',),
+            'has_timeslots': (),
+            'reviews': (),
+            'grade': ('patient',),
+            RELATED_PATIENT_FULL_NAME: ('patient',),
+        }
 
 
 class AppointmentListSerializer(AppointmentSerializer):
@@ -1,6 +1,13 @@
 from rest_framework import serializers
 
-from apps.appointments.constants import ONLY_FUTURE, ONLY_PAST, ONLY_ARCHIVED, ONLY_ACTIVE
+from apps.appointments.constants import (
+    ONLY_FUTURE,
+    ONLY_PAST,
+    ONLY_ARCHIVED,
+    ONLY_ACTIVE,
+    EARLIEST_TIME_SLOTS_DEFAULT_LIMIT,
+    EARLIEST_TIME_SLOTS_MAX_LIMIT,
+)
 from apps.appointments.serializer_validators import (
     valid_appointment_status_for_patient,
     is_not_past,
@@ -58,6 +65,26 @@ class AvailableTimeSlotsFilterSerializer(TimeSlotFilterSerializer):
     pass
 
 
+class EarliestTimeSlotsFilterSerializer(serializers.Serializer):
+    service_id = serializers.IntegerField(min_value=1)
+    subsidiary_id = serializers.IntegerField(required=False, min_value=1)
+    start_date = serializers.DateField(required=False, validators=[is_not_past])
+    end_date = serializers.DateField(required=False, validators=[is_not_past])
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=EARLIEST_TIME_SLOTS_MAX_LIMIT,
+        default=EARLIEST_TIME_SLOTS_DEFAULT_LIMIT,
+    )
+
+    def validate(self, attrs: dict) -> dict:
+        attrs = super().validate(attrs)
+        start_date, end_date = attrs.get('start_date'), attrs.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError('"start_date" must not be later than "end_date"')
+        return attrs
+
+
 class TimeSlotDateFilterSerializer(serializers.Serializer):
     doctor_id = serializers.IntegerField(required=False, min_value=1)
     subsidiary_id = serializers.IntegerField(required=False, min_value=1)
@@ -18,6 +18,7 @@ from apps.feature_toggles.constants import (
 )
 from apps.feature_toggles.models import Feature
 from apps.feature_toggles.utils import is_feature_enabled
+from apps.reviews.workflow import ReviewWorkflow
 from apps.tools.tasks import LastLaunchTimeBaseTask, OneAtATimeTask
 
 
@@ -145,7 +146,13 @@ class FinishEndedAppointmentsTask(OneAtATimeTask):
         delta_value = int(delta_value)
 
         appointments = self._get_previous_appointments(delta_minutes=delta_value)
-        count = appointments.count()
+        finished_ids = []
         for appointment in appointments.iterator():
-            AppointmentWorkflow.finish(appointment, ask_for_review=True)
-        logging.debug(f"{task_name}: finished {count} appointments")
+            AppointmentWorkflow.finish(appointment)
+            finished_ids.append(appointment.id)
+        # отзывы запрашиваем пачками после завершения всех записей
+        requests_count = ReviewWorkflow.ask_for_appointments_reviews(finished_ids)
+        logging.debug(
+            f"{task_name}: finished {len(finished_ids)} appointments, "
+            f"sent {requests_count} review requests"
+        )
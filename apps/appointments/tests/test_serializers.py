@@ -54,6 +54,7 @@ class AppointmentListSerializerTest(TestCase):
             'description': 'desc AppointmentListSerializerTest',
             'speciality_text': 'experience AppointmentListSerializerTest',
             'picture': None,
+            'picture_variants': {},
             'is_timeslots_available_for_patient': False,
         }
         expected_subsidiary = {
@@ -41,6 +41,7 @@ from apps.appointments.factories import (
     TimeSlotFactory,
 )
 from apps.appointments.models import Appointment, TimeSlot
+from apps.appointments.selectors import TimeSlots
 from apps.appointments.serializers import (
     TimeSlotSerializer,
     AppointmentListSerializer,
@@ -1017,3 +1018,77 @@ class TimeSlotViewSetListTest(APITestCase):
         response_data = response.json()['results']
         self.assertEqual(1, len(response_data))
         self.assertEqual(slot_2.id, response_data[0]['id'])
+
+
+class EarliestTimeSlotListViewTest(APITestCase):
+    url = reverse('api.v1:appointments:earliest_time_slot_list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient_user = PatientUserFactory()
+        cls.service = ServiceFactory()
+        cls.subsidiary = SubsidiaryFactory()
+        cls.doctor_1 = DoctorFactory(
+            is_timeslots_available_for_patient=True, services=[cls.service]
+        )
+        cls.doctor_2 = DoctorFactory(
+            is_timeslots_available_for_patient=True, services=[cls.service]
+        )
+        cls.doctor_closed = DoctorFactory(services=[cls.service])
+        cls.doctor_fake = DoctorFactory(
+            is_timeslots_available_for_patient=True, is_fake=True, services=[cls.service]
+        )
+        cls.doctor_other_service = DoctorFactory(is_timeslots_available_for_patient=True)
+
+        now = timezone.now()
+        cls.slot_doctor_2 = TimeSlotFactory(
+            doctor=cls.doctor_2, subsidiary=cls.subsidiary, initial_datetime=now + timedelta(days=1)
+        )
+        cls.slot_doctor_1 = TimeSlotFactory(
+            doctor=cls.doctor_1, initial_datetime=now + timedelta(days=2)
+        )
+        cls.slot_doctor_2_late = TimeSlotFactory(
+            doctor=cls.doctor_2, initial_datetime=now + timedelta(days=3)
+        )
+        TimeSlotFactory(
+            doctor=cls.doctor_1, initial_datetime=now + timedelta(hours=12), is_available=False
+        )
+        for doctor in (cls.doctor_closed, cls.doctor_fake, cls.doctor_other_service):
+            TimeSlotFactory(doctor=doctor, initial_datetime=now + timedelta(hours=12))
+
+    def setUp(self):
+        self.client.force_login(self.patient_user)
+
+    def _get_ids(self, **params):
+        response = self.client.get(self.url, {'service_id': self.service.id, **params})
+        self.assertEqual(status.HTTP_200_OK, response.status_code, response.json())
+        return [item['id'] for item in response.json()]
+
+    def test_url(self):
+        self.assertEqual('/api/v1/appointments/earliest_time_slots', self.url)
+
+    def test_data(self):
+        self.assertEqual(
+            [self.slot_doctor_2.id, self.slot_doctor_1.id, self.slot_doctor_2_late.id],
+            self._get_ids(),
+        )
+
+    def test_data__limit(self):
+        self.assertEqual([self.slot_doctor_2.id], self._get_ids(limit=1))
+
+    def test_data__subsidiary(self):
+        self.assertEqual([self.slot_doctor_2.id], self._get_ids(subsidiary_id=self.subsidiary.id))
+
+    def test_data__dates(self):
+        start_date = (timezone.localtime() + timedelta(days=2)).date()
+        self.assertEqual(
+            [self.slot_doctor_1.id], self._get_ids(start_date=start_date, end_date=start_date)
+        )
+
+    def test_service_id_required(self):
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            list(TimeSlots.earliest_free_for_service(service_id=self.service.id))
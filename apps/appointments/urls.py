@@ -22,6 +22,11 @@ urlpatterns = [
         views.TimeSlotViewSet.as_view({'get': 'list'}),
         name='time_slot_list',
     ),
+    path(
+        'earliest_time_slots',
+        views.EarliestTimeSlotListView.as_view(),
+        name='earliest_time_slot_list',
+    ),
     path(
         'available_time_slots/<int:pk>',
         views.TimeSlotViewSet.as_view({'get': 'retrieve'}),
@@ -1,6 +1,6 @@
 import random
 from datetime import timedelta, datetime
-from typing import Dict, Union, Set
+from typing import Dict, Iterable, Union, Set
 
 import logging
 from django.utils import timezone
@@ -89,6 +89,23 @@ class AppointmentUtils:
         user_ids += master_user_ids
         return set(user_ids)
 
+    @classmethod
+    def get_user_ids_to_notify_bulk(
+        cls, appointments: Iterable[Appointment]
+    ) -> Dict[int, Set[int]]:
+        """
+        `get_user_ids_to_notify` для пачки записей: число запросов не зависит от ее размера
+        :return: {appointment_id: {user_id, ...}}
+        """
+        appointments = list(appointments)
+        profile_user_ids = PatientUtils.get_user_ids_to_notify_by_profile(
+            appointment.patient.profile_id for appointment in appointments
+        )
+        return {
+            appointment.id: profile_user_ids.get(appointment.patient.profile_id, set())
+            for appointment in appointments
+        }
+
     @classmethod
     def get_event_context_for_appointment_reminder(
         cls, appointment: Appointment, **kwargs
@@ -13,7 +13,7 @@ from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from apps.appointments import selectors, managers
-from apps.appointments.constants import AppointmentStatus
+from apps.appointments.constants import AppointmentStatus, DOCTOR, SERVICE, SUBSIDIARY
 from apps.appointments.managers import AppointmentQuerySet
 from apps.appointments.models import Appointment
 from apps.appointments.selectors import PatientAppointments
@@ -29,9 +29,11 @@ from apps.appointments.serializers import (
 from apps.appointments.serializers_filter import (
     AppointmentsFilterParamsSerializer,
     AvailableTimeSlotsFilterSerializer,
+    EarliestTimeSlotsFilterSerializer,
     TimeSlotDateFilterSerializer,
 )
 from apps.appointments.workflows import AppointmentWorkflow
+from apps.core.views import SparseFieldsetMixin
 from apps.profiles.permissions import IsPatient
 
 
@@ -64,7 +66,7 @@ class CreateAppointmentRequestView(CreateAPIView):
         return Response(output_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class AppointmentListView(ListAPIView):
+class AppointmentListView(SparseFieldsetMixin, ListAPIView):
     """
     Записи на прием
 
@@ -78,6 +80,7 @@ class AppointmentListView(ListAPIView):
     * only_archived=1/true/false
     * status_code=10&status_code=50
     * related_patient_id=13
+    * fields=id,start,doctor - только перечисленные поля
     """
 
     serializer_class = AppointmentListSerializer
@@ -94,12 +97,13 @@ class AppointmentListView(ListAPIView):
         params_serializer.is_valid(raise_exception=True)
 
         selector = self.get_selector()
-        return selector.filter_by_params(
-            selector.visible_by_patient(), **params_serializer.validated_data
+        qs = selector.visible_by_patient().select_related(
+            DOCTOR, 'doctor__profile', SERVICE, SUBSIDIARY
         )
+        return selector.filter_by_params(qs, **params_serializer.validated_data)
 
 
-class OneAppointmentView(RetrieveDestroyAPIView):
+class OneAppointmentView(SparseFieldsetMixin, RetrieveDestroyAPIView):
     """
     Запись на прием
     Точка доступна только для авторизованного пациента
@@ -114,7 +118,11 @@ class OneAppointmentView(RetrieveDestroyAPIView):
 
     def get_queryset(self) -> AppointmentQuerySet:
         patient = self.request.user.profile.patient
-        return PatientAppointments(patient).visible_by_patient()
+        return (
+            PatientAppointments(patient)
+            .visible_by_patient()
+            .select_related(DOCTOR, 'doctor__profile', SERVICE, SUBSIDIARY)
+        )
 
     def perform_destroy(self, instance: Appointment) -> None:
         patient = self.request.user.profile.patient
@@ -202,7 +210,6 @@ class TimeSlotViewSet(ReadOnlyModelViewSet):
     permission_classes = (IsPatient,)
 
     def get_selector(self) -> selectors.TimeSlots:
-        patient = self.request.user.profile.patient
         return selectors.TimeSlots()
 
     def get_queryset(self) -> managers.TimeSlotQuerySet:
@@ -215,6 +222,30 @@ class TimeSlotViewSet(ReadOnlyModelViewSet):
         return selector.filter_by_params(selector.free_future(), **params_serializer.validated_data)
 
 
+class EarliestTimeSlotListView(ListAPIView):
+    """
+    Ближайшие свободные талоны по услуге у любого врача, который ее оказывает.
+    Только доступные (is_available=True), только будущие, по возрастанию начала.
+
+    GET-параметры:
+    * `service_id=2` - обязательный
+    * `subsidiary_id=3`
+    * `start_date=2021-06-01`, `end_date=2021-06-07` - включительно
+    * `limit=10` - не больше 50
+    """
+
+    permission_classes = (IsPatient,)
+    serializer_class = TimeSlotSerializer
+    pagination_class = None
+
+    def get_queryset(self) -> managers.TimeSlotQuerySet:
+        query_params = self.request.query_params
+        params_serializer = EarliestTimeSlotsFilterSerializer(data=query_params)
+        params_serializer.is_valid(raise_exception=True)
+
+        return selectors.TimeSlots.earliest_free_for_service(**params_serializer.validated_data)
+
+
 class TimeSlotDatesView(ListAPIView):
     """
     Доступные даты талонов у врачей. Только доступные (is_available=True), только будущие.
@@ -228,7 +259,6 @@ class TimeSlotDatesView(ListAPIView):
     serializer_class = TimeSlotDateSerializer
 
     def get_selector(self) -> selectors.TimeSlots:
-        patient = self.request.user.profile.patient
         return selectors.TimeSlots()
 
     def get_queryset(self) -> managers.TimeSlotQuerySet:
@@ -28,7 +28,10 @@ from apps.core.admin import (
     DisplayableMPTTAdmin,
     DisableDeleteMixin,
     BaseProcessActionsAdminMixin,
+    LinkInlineMixin,
+    TrigramSearchMixin,
 )
+from apps.core.cache_utils import invalidate_on_commit
 from apps.feature_toggles.ops_features import django_admin__can_generate_doctor_timeslots
 from apps.profiles.admin_utils import get_profile_links_as_common_str
 from .constants import IMPORT_PRICES
@@ -88,7 +91,7 @@ class SubsidiaryImageAdmin(admin.ModelAdmin):
 
 
 @admin.register(Subsidiary)
-class SubsidiaryAdmin(DisplayableAdmin, admin.ModelAdmin, DisableDeleteMixin):
+class SubsidiaryAdmin(TrigramSearchMixin, DisplayableAdmin, admin.ModelAdmin, DisableDeleteMixin):
     list_display = (
         'id',
         'title',
@@ -106,6 +109,7 @@ class SubsidiaryAdmin(DisplayableAdmin, admin.ModelAdmin, DisableDeleteMixin):
         'is_removed',
     )
     search_fields = ('title', 'address', 'short_address', 'integration_data')
+    trigram_search_fields = ('title', 'address', 'short_address')
     readonly_fields = (
         # 'latitude', 'longitude',  # TODO uncomment after maps available
         'created',
@@ -133,7 +137,7 @@ class SubsidiaryAdmin(DisplayableAdmin, admin.ModelAdmin, DisableDeleteMixin):
         return queryset
 
 
-class ServiceSubsidiaryInline(admin.TabularInline):
+class ServiceSubsidiaryInline(LinkInlineMixin, admin.TabularInline):
     model = Service.subsidiaries.through
     extra = 3
     raw_id_fields = ('subsidiary',)
@@ -152,7 +156,7 @@ class ServicePriceInline(admin.TabularInline):
     ordering = ("title",)
 
 
-class ServiceDoctorInline(admin.TabularInline):
+class ServiceDoctorInline(LinkInlineMixin, admin.TabularInline):
     model = DoctorToService
     extra = 3
     raw_id_fields = ('doctor',)
@@ -274,20 +278,20 @@ class ServiceAdmin(DisplayableMPTTAdmin, ServiceImportPricesMixin):
         return tuple(obj.subsidiaries.values_list("title", flat=True))
 
 
-class DoctorServiceInline(admin.TabularInline):
+class DoctorServiceInline(LinkInlineMixin, admin.TabularInline):
     model = DoctorToService
     extra = 3
     raw_id_fields = ('service',)
 
 
-class DoctorSubsidiaryInline(admin.TabularInline):
+class DoctorSubsidiaryInline(LinkInlineMixin, admin.TabularInline):
     model = DoctorToSubsidiary
     extra = 3
     raw_id_fields = ('subsidiary',)
 
 
 @admin.register(Doctor)
-class DoctorAdmin(DisplayableAdmin, admin.ModelAdmin):
+class DoctorAdmin(TrigramSearchMixin, DisplayableAdmin, admin.ModelAdmin):
     date_hierarchy = MODIFIED
     list_display = (
         'id',
@@ -332,6 +336,12 @@ class DoctorAdmin(DisplayableAdmin, admin.ModelAdmin):
         'profile__full_name',
         'integration_data',
     )
+    trigram_search_fields = (
+        'public_full_name',
+        'public_short_name',
+        'speciality_text',
+        'profile__full_name',
+    )
     ordering = (
         '-created',
         '-modified',
@@ -437,7 +447,10 @@ class AppointmentInline(admin.TabularInline):
 
 @admin.register(Patient)
 class PatientAdmin(
-    PatientCRUDHistoryMixin, PatientAppointmentListMixin, MergePatientsAdminMixin,
+    TrigramSearchMixin,
+    PatientCRUDHistoryMixin,
+    PatientAppointmentListMixin,
+    MergePatientsAdminMixin,
 ):
     actions = ("merge_selected_patients",)
     list_display = (
@@ -461,6 +474,11 @@ class PatientAdmin(
         'profile__users__contacts__value',
         "integration_data",
     )
+    trigram_search_fields = (
+        'profile__full_name',
+        'profile__users__username',
+        'profile__users__contacts__value',
+    )
     list_filter = (
         PatientHasUserFilter,
         'is_confirmed',
@@ -547,3 +565,8 @@ class PromotionAdmin(DisplayableAdmin, admin.ModelAdmin):
         ),
         (_('Важные даты'), {'fields': ('created', 'modified')}),
     )
+
+    def save_related(self, request, form, formsets, change):
+        super(PromotionAdmin, self).save_related(request, form, formsets, change)
+        # филиалы акции сохраняются после самой акции
+        invalidate_on_commit(Promotion.invalidate_active_cache)
@@ -42,6 +42,19 @@ ONLY_ROOT = "only_root"
 PARENT_ID: Final[str] = "parent_id"
 INTEGRATION_DATA: Final[str] = 'integration_data'
 SPECIALITY_TEXT: Final = "speciality_text"
+LATITUDE: Final[str] = "latitude"
+LONGITUDE: Final[str] = "longitude"
+WITH_NEXT_FREE_SLOT: Final[str] = "with_next_free_slot"
+NEXT_FREE_SLOT_START: Final[str] = "next_free_slot_start"
+
+SERVICE_CATALOG_VERSION_CACHE_KEY: Final[str] = "clinics:service_catalog:version"
+SERVICE_TREE_CACHE_TIMEOUT: Final[int] = 60 * 60
+
+ACTIVE_PROMOTIONS_CACHE_KEY: Final[str] = "clinics:active_promotions"
+ACTIVE_PROMOTIONS_CACHE_MAX_TIMEOUT: Final[int] = 60 * 60 * 24
+
+NEAREST_SUBSIDIARIES_DEFAULT_LIMIT: Final[int] = 5
+NEAREST_SUBSIDIARIES_MAX_LIMIT: Final[int] = 50
 
 
 class MobileAppSections:
@@ -1,4 +1,4 @@
-from typing import TypedDict
+from typing import List, Optional, TypedDict
 
 import datetime
 
@@ -20,3 +20,61 @@ class RelatedPatientUpdateData(TypedDict):
     gender: str
     type: str  # relation type
     id: int  # relation id
+
+
+class ActivePromotionsCacheData(TypedDict):
+    version: str
+    promotions: List  # List[Promotion] с prefetch subsidiaries
+    last_modified: Optional[datetime.datetime]
+
+
+class ServiceTreeNode(TypedDict):
+    id: int
+    title: str
+    description: Optional[str]
+    level: int
+    parent_id: Optional[int]
+    priority: int
+    is_visible_for_appointments: bool
+    children: List['ServiceTreeNode']
+
+
+class CatalogPriceData(TypedDict, total=False):
+    title: str  # обязательное
+    price: Optional[str]
+    code: Optional[str]  # ключ цены внутри услуги; если не задан - title
+    priority: int
+    is_displayed: bool
+
+
+class CatalogServiceData(TypedDict, total=False):
+    title: str  # обязательное
+    slug: Optional[str]  # ключ услуги; если не задан - строится из title
+    parent_slug: Optional[str]
+    description: Optional[str]
+    priority: int
+    is_displayed: bool
+    is_visible_for_appointments: bool
+    subsidiary_ids: List[int]  # полный список; None/нет ключа - связи не трогаем
+    prices: List[CatalogPriceData]  # полный список; None/нет ключа - цены не трогаем
+
+
+class CatalogDoctorData(TypedDict, total=False):
+    id: int  # обязательное, врач должен существовать
+    service_slugs: List[str]  # полный список; None/нет ключа - связи не трогаем
+    subsidiary_ids: List[int]  # полный список; None/нет ключа - связи не трогаем
+
+
+class CatalogData(TypedDict, total=False):
+    services: List[CatalogServiceData]
+    doctors: List[CatalogDoctorData]
+
+
+class CatalogImportResult(TypedDict):
+    services_created: int
+    services_updated: int
+    prices_created: int
+    prices_updated: int
+    prices_deleted: int
+    links_created: int
+    links_deleted: int
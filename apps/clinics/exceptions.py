@@ -1,6 +1,12 @@
 from apps.exceptions import APIError
 
 
+class CatalogImportError(APIError):
+    code = 'catalog_import_error'
+    title = 'CatalogImportError'
+    details = None
+
+
 class RelatedPatientCreateError(APIError):
     code = 'related_patient_create_error'
     title = 'RelatedPatientCreateError'
@@ -1,9 +1,32 @@
 from rest_framework import serializers
 
-from apps.clinics.constants import ONLY_ROOT, PARENT_ID
+from apps.clinics.constants import (
+    ONLY_ROOT,
+    PARENT_ID,
+    LATITUDE,
+    LONGITUDE,
+    NEAREST_SUBSIDIARIES_DEFAULT_LIMIT,
+    NEAREST_SUBSIDIARIES_MAX_LIMIT,
+)
 from apps.clinics.serializer_validators import valid_mobile_app_section
 
 
+class GeoPointParamsSerializer(serializers.Serializer):
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=6, min_value=-90, max_value=90)
+    longitude = serializers.DecimalField(
+        max_digits=9, decimal_places=6, min_value=-180, max_value=180
+    )
+
+
+class SubsidiaryNearestFilterParamsSerializer(GeoPointParamsSerializer):
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=NEAREST_SUBSIDIARIES_MAX_LIMIT,
+        default=NEAREST_SUBSIDIARIES_DEFAULT_LIMIT,
+    )
+
+
 class DoctorListFilterParamsSerializer(serializers.Serializer):
     subsidiary_ids = serializers.ListField(
         required=False, child=serializers.IntegerField(min_value=1)
@@ -12,6 +35,21 @@ class DoctorListFilterParamsSerializer(serializers.Serializer):
         required=False, allow_empty=True, child=serializers.IntegerField(min_value=1)
     )
     without_fakes = serializers.BooleanField(required=False)
+    latitude = serializers.DecimalField(
+        required=False, max_digits=9, decimal_places=6, min_value=-90, max_value=90
+    )
+    longitude = serializers.DecimalField(
+        required=False, max_digits=9, decimal_places=6, min_value=-180, max_value=180
+    )
+    with_next_free_slot = serializers.BooleanField(required=False)
+
+    def validate(self, attrs: dict) -> dict:
+        attrs = super().validate(attrs)
+        if (LATITUDE in attrs) != (LONGITUDE in attrs):
+            raise serializers.ValidationError(
+                f'"{LATITUDE}" and "{LONGITUDE}" must be passed together'
+            )
+        return attrs
 
 
 class ServiceListFilterParamsSerializer(serializers.Serializer):
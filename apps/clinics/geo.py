@@ -0,0 +1,150 @@
+import math
+import threading
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from apps.core.cache_utils import bump_cache_version, get_cache_version
+
+EARTH_RADIUS_KM = 6371.0088
+
+Coordinate = Union[float, Decimal]
+Vector = Tuple[float, float, float]
+
+
+class NearestPoint(NamedTuple):
+    id: int
+    distance_km: float
+
+
+def to_unit_vector(latitude: Coordinate, longitude: Coordinate) -> Vector:
+    lat = math.radians(float(latitude))
+    lon = math.radians(float(longitude))
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+
+def chord_to_km(chord: float) -> float:
+    # длина хорды на единичной сфере -> расстояние по дуге большого круга
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class _Node:
+    __slots__ = ('point', 'id', 'axis', 'left', 'right')
+
+    def __init__(self, point: Vector, point_id: int, axis: int):
+        self.point = point
+        self.id = point_id
+        self.axis = axis
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+
+
+class KDTree:
+    """
+    KD-дерево по точкам на единичной сфере (x, y, z).
+    Евклидово расстояние между такими точками (хорда) монотонно
+    по расстоянию на поверхности, поэтому ближайшие по хорде == ближайшие по карте.
+    """
+
+    def __init__(self, items: Sequence[Tuple[int, Vector]]):
+        self.size = len(items)
+        self.root = self._build(list(items), depth=0)
+
+    def _build(self, items: List[Tuple[int, Vector]], depth: int) -> Optional[_Node]:
+        if not items:
+            return None
+        axis = depth % 3
+        items.sort(key=lambda item: item[1][axis])
+        median = len(items) // 2
+        point_id, point = items[median]
+        node = _Node(point, point_id, axis)
+        node.left = self._build(items[:median], depth + 1)
+        node.right = self._build(items[median + 1 :], depth + 1)
+        return node
+
+    def nearest(self, target: Vector, limit: int) -> List[Tuple[int, float]]:
+        """
+        :return: [(id, chord_distance), ...] отсортированные по возрастанию расстояния
+        """
+        if limit <= 0 or self.root is None:
+            return []
+        best: List[Tuple[float, int]] = []  # (squared distance, id), sorted
+
+        def visit(node: Optional[_Node]):
+            if node is None:
+                return
+            distance = sum((a - b) ** 2 for a, b in zip(node.point, target))
+            if len(best) < limit or distance < best[-1][0]:
+                best.append((distance, node.id))
+                best.sort()
+                del best[limit:]
+
+            diff = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            visit(near)
+            if len(best) < limit or diff ** 2 < best[-1][0]:
+                visit(far)
+
+        visit(self.root)
+        return [(point_id, math.sqrt(distance)) for distance, point_id in best]
+
+
+class SubsidiaryGeoIndex:
+    """
+    In-process индекс координат видимых филиалов.
+
+    Перестраивается лениво: при изменении филиала в кэше меняется версия индекса
+    (см. `invalidate`), и каждый процесс пересобирает свое дерево при следующем запросе.
+    """
+
+    VERSION_CACHE_KEY = 'clinics:subsidiary_geo_index:version'
+
+    _lock = threading.Lock()
+    _tree: Optional[KDTree] = None
+    _version: Optional[str] = None
+
+    @classmethod
+    def invalidate(cls) -> None:
+        bump_cache_version(cls.VERSION_CACHE_KEY)
+
+    @classmethod
+    def _load_points(cls) -> List[Tuple[int, Vector]]:
+        from apps.clinics.selectors import SubsidiarySelector
+
+        rows = (
+            SubsidiarySelector.visible_to_patient()
+            .filter(latitude__isnull=False, longitude__isnull=False)
+            # prefetch'и селектора к values_list неприменимы
+            .prefetch_related(None)
+            .values_list('id', 'latitude', 'longitude')
+        )
+        return [(pk, to_unit_vector(lat, lon)) for pk, lat, lon in rows]
+
+    @classmethod
+    def get_tree(cls) -> KDTree:
+        version = get_cache_version(cls.VERSION_CACHE_KEY)
+        tree = cls._tree
+        if tree is not None and cls._version == version:
+            return tree
+        with cls._lock:
+            if cls._tree is None or cls._version != version:
+                cls._tree = KDTree(cls._load_points())
+                cls._version = version
+            return cls._tree
+
+    @classmethod
+    def nearest(
+        cls, latitude: Coordinate, longitude: Coordinate, limit: Optional[int] = None
+    ) -> List[NearestPoint]:
+        """
+        Ближайшие к точке филиалы, по возрастанию расстояния.
+        `limit=None` - все филиалы с заполненными координатами.
+        """
+        tree = cls.get_tree()
+        if limit is None:
+            limit = tree.size
+        target = to_unit_vector(latitude, longitude)
+        return [
+            NearestPoint(point_id, chord_to_km(chord))
+            for point_id, chord in tree.nearest(target, limit)
+        ]
@@ -1,8 +1,10 @@
 from ckeditor.fields import RichTextField
 from django.conf.locale.ru.formats import DATE_INPUT_FORMATS
+from django.contrib.postgres.indexes import GinIndex
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models, IntegrityError
+from django.db import models
 from django.db.models.fields.json import JSONField
 from django.utils import formats
 from django.utils.translation import ugettext as _
@@ -13,7 +15,13 @@ from mptt.models import MPTTModel
 from slugify import slugify
 from typing import Optional
 
-from apps.clinics.constants import DoctorStatus, DOCTOR_STR
+from apps.clinics.constants import (
+    DoctorStatus,
+    DOCTOR_STR,
+    ACTIVE_PROMOTIONS_CACHE_KEY,
+    SERVICE_CATALOG_VERSION_CACHE_KEY,
+)
+from apps.clinics.geo import SubsidiaryGeoIndex
 from apps.clinics.managers import (
     PromotionQuerySet,
     SubsidiaryImageManager,
@@ -21,6 +29,7 @@ from apps.clinics.managers import (
     DoctorManager,
     DoctorAllManager,
 )
+from apps.core.cache_utils import bump_cache_version, invalidate_on_commit
 from apps.core.models import (
     ClinicSoftDeletableModel,
     TimeStampIndexedModel,
@@ -28,15 +37,18 @@ from apps.core.models import (
     DisplayableModel,
     DisplayableMPTTModel,
     DisplayableManager,
+    ImageVariantsMixin,
+    LinkManager,
 )
 from apps.core.utils import validate_image_max_size, human_dt
 from apps.profiles.models import User
 
 
-class ClinicImage(TimeStampIndexedModel):
+class ClinicImage(ImageVariantsMixin, TimeStampIndexedModel):
     image = models.ImageField(
         _('картинка'), upload_to='subsidiary_images/', validators=[validate_image_max_size],
     )
+    image_variants = JSONField(_('уменьшенные копии'), default=dict, blank=True, editable=False)
     priority = models.PositiveSmallIntegerField(
         _('Приоритет показа'),
         help_text='чем выше значение - тем выше в выдаче',
@@ -49,6 +61,8 @@ class ClinicImage(TimeStampIndexedModel):
         verbose_name_plural = _('Фото клиники')
         ordering = ('-priority',)
 
+    image_variant_fields = ('image',)
+
 
 class Subsidiary(DeletableDisplayable, TimeStampIndexedModel):
     title = models.CharField(_('название филиала'), max_length=150)
@@ -64,20 +78,54 @@ class Subsidiary(DeletableDisplayable, TimeStampIndexedModel):
     )
     integration_data = JSONField(verbose_name=_('Данные об интеграции'), default=dict, blank=True,)
 
+    def get_primary_image(self) -> Optional['SubsidiaryImage']:
+        prefetched_images = getattr(self, '_prefetched_objects_cache', {}).get('images')
+        if prefetched_images is not None:
+            return next((x for x in prefetched_images if x.is_primary), None)
+        return self.images.all().only_primary().first()
+
     @property
     def primary_image(self):
-        image = self.images.all().only_primary().first()
+        image = self.get_primary_image()
         return image and image.picture
 
+    @property
+    def primary_image_variants(self) -> dict:
+        image = self.get_primary_image()
+        return image.picture_variants if image else {}
+
     class Meta:
         verbose_name = _('Филиал')
         verbose_name_plural = _('Филиалы')
+        # поиск в админке, см. apps.core.admin.TrigramSearchMixin
+        indexes = [
+            GinIndex(fields=['title'], name='subsidiary_title_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(
+                fields=['address'], name='subsidiary_address_trgm', opclasses=['gin_trgm_ops']
+            ),
+            GinIndex(
+                fields=['short_address'],
+                name='subsidiary_short_address_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
 
     def __str__(self):
         return f'{self.title}'
 
+    def save(self, **kwargs):
+        super(Subsidiary, self).save(**kwargs)
+        invalidate_on_commit(SubsidiaryGeoIndex.invalidate)
+        invalidate_on_commit(Promotion.invalidate_active_cache)
+
+    def delete(self, using=None, soft=True, *args, **kwargs):
+        result = super(Subsidiary, self).delete(using, soft, *args, **kwargs)
+        invalidate_on_commit(SubsidiaryGeoIndex.invalidate)
+        invalidate_on_commit(Promotion.invalidate_active_cache)
+        return result
+
 
-class SubsidiaryImage(models.Model):
+class SubsidiaryImage(ImageVariantsMixin, models.Model):
     subsidiary = models.ForeignKey(
         Subsidiary,
         related_name='images',
@@ -88,6 +136,7 @@ class SubsidiaryImage(models.Model):
     picture = models.ImageField(
         _('картинка'), upload_to='subsidiary_images/', validators=[validate_image_max_size],
     )
+    picture_variants = JSONField(_('уменьшенные копии'), default=dict, blank=True, editable=False)
     is_primary = models.BooleanField(verbose_name=_('основное?'), default=False)
     priority = models.PositiveSmallIntegerField(
         _('Приоритет показа'),
@@ -97,6 +146,8 @@ class SubsidiaryImage(models.Model):
     )
     objects = SubsidiaryImageManager()
 
+    image_variant_fields = ('picture',)
+
     class Meta:
         verbose_name = _('Фото филиала')
         verbose_name_plural = _('Фото филиалов')
@@ -176,19 +227,16 @@ class ServiceToSubsidiary(models.Model):
     service = models.ForeignKey('Service', on_delete=models.CASCADE)
     subsidiary = models.ForeignKey(Subsidiary, on_delete=models.DO_NOTHING)
 
-    def save(self, *args, **kwargs):
-        if ServiceToSubsidiary.objects.filter(
-            service=self.service, subsidiary=self.subsidiary
-        ).exists():
-            raise IntegrityError(
-                f'Service id {self.service_id} already exists '
-                f'for subsidiary id={self.subsidiary_id}'
-            )
-        super(ServiceToSubsidiary, self).save(*args, **kwargs)
+    objects = LinkManager()
 
     class Meta:
         verbose_name = _('связь услуги с филиалом')
         verbose_name_plural = _('связи услуг с филиалами')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['service', 'subsidiary'], name='clinics_service_to_subsidiary_unique'
+            ),
+        ]
 
 
 class Service(DisplayableMPTTModel, TimeStampIndexedModel):
@@ -230,12 +278,17 @@ class Service(DisplayableMPTTModel, TimeStampIndexedModel):
             return f"--- {self.parent.title} - {self.title}"
         return f"----- {self.title}"
 
-    def get_slug(self, postfix_number=0):
-        slug = slugify(self.title, separator=self.SLUG_SEPARATOR)
+    @classmethod
+    def build_slug(cls, title: str, postfix_number: int = 0) -> str:
+        slug = slugify(title, separator=cls.SLUG_SEPARATOR)
         if postfix_number:
-            postfix = f"{self.SLUG_SEPARATOR}{postfix_number}"
+            postfix = f"{cls.SLUG_SEPARATOR}{postfix_number}"
             # make slug shorter to be within field length limit with postfix
             slug = slug[: 255 - len(postfix)] + postfix
+        return slug
+
+    def get_slug(self, postfix_number=0):
+        slug = self.build_slug(self.title, postfix_number)
         if not Service.objects.filter(slug=slug).exclude(pk=self.pk).exists():
             return slug
         return self.get_slug(postfix_number=postfix_number + 1)
@@ -244,6 +297,12 @@ class Service(DisplayableMPTTModel, TimeStampIndexedModel):
         if not self.slug:
             self.slug = self.get_slug()
         super(Service, self).save(*args, **kwargs)
+        invalidate_on_commit(bump_cache_version, SERVICE_CATALOG_VERSION_CACHE_KEY)
+
+    def delete(self, *args, **kwargs):
+        result = super(Service, self).delete(*args, **kwargs)
+        invalidate_on_commit(bump_cache_version, SERVICE_CATALOG_VERSION_CACHE_KEY)
+        return result
 
     def mark_hidden(self, save=True):
         if self.is_visible_for_appointments:
@@ -279,32 +338,23 @@ class DoctorToSubsidiary(models.Model):
     doctor = models.ForeignKey('Doctor', on_delete=models.CASCADE)
     subsidiary = models.ForeignKey(Subsidiary, on_delete=models.CASCADE)
 
-    def save(self, *args, **kwargs):
-        if DoctorToSubsidiary.objects.filter(
-            doctor=self.doctor, subsidiary=self.subsidiary
-        ).exists():
-            doctor_id = self.doctor_id
-            subsidiary_id = self.subsidiary_id
-            raise IntegrityError(
-                f'Doctor id {doctor_id} already exists for subsidiary id={subsidiary_id}'
-            )
-        super(DoctorToSubsidiary, self).save(*args, **kwargs)
+    objects = LinkManager()
 
     class Meta:
         verbose_name = _('связь врача с клиникой')
         verbose_name_plural = _('связи врачей с клиниками')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['doctor', 'subsidiary'], name='clinics_doctor_to_subsidiary_unique'
+            ),
+        ]
 
 
 class DoctorToService(models.Model):
     doctor = models.ForeignKey('Doctor', on_delete=models.CASCADE)
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
 
-    def save(self, *args, **kwargs):
-        if DoctorToService.objects.filter(doctor=self.doctor, service=self.service).exists():
-            raise IntegrityError(
-                f'Doctor id {self.doctor_id} already exists for service id={self.service_id}'
-            )
-        super(DoctorToService, self).save(*args, **kwargs)
+    objects = LinkManager()
 
     def __str__(self):
         return f"врач: {self.doctor.short_full_name}, услуга: {self.service}"
@@ -312,6 +362,11 @@ class DoctorToService(models.Model):
     class Meta:
         verbose_name = _('связь врача с услугой')
         verbose_name_plural = _('связи врачей с услугами')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['doctor', 'service'], name='clinics_doctor_to_service_unique'
+            ),
+        ]
 
 
 class Doctor(TimeStampIndexedModel, StatusModel, DeletableDisplayable):
@@ -388,6 +443,24 @@ class Doctor(TimeStampIndexedModel, StatusModel, DeletableDisplayable):
         verbose_name = DOCTOR_STR
         verbose_name_plural = _('Врачи')
         default_manager_name = 'all_objects'
+        # поиск в админке, см. apps.core.admin.TrigramSearchMixin
+        indexes = [
+            GinIndex(
+                fields=['public_full_name'],
+                name='doctor_public_full_name_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+            GinIndex(
+                fields=['public_short_name'],
+                name='doctor_public_short_name_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+            GinIndex(
+                fields=['speciality_text'],
+                name='doctor_speciality_text_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
 
     def __str__(self):
         speciality = self.speciality_text
@@ -473,12 +546,15 @@ class Patient(TimeStampIndexedModel, ClinicSoftDeletableModel):
         verbose_name_plural = _('пациенты')
 
 
-class Promotion(TimeStampIndexedModel, DisplayableModel):
+class Promotion(ImageVariantsMixin, TimeStampIndexedModel, DisplayableModel):
     title = models.CharField(_('заголовок акции'), max_length=150, db_index=True)
     content = RichTextField(_('содержимое'), help_text=_('можно вставлять ссылки, картинки'))
     primary_image = models.ImageField(
         _('Картинка'), upload_to='promotion_images/', validators=[validate_image_max_size]
     )
+    primary_image_variants = JSONField(
+        _('уменьшенные копии'), default=dict, blank=True, editable=False
+    )
     subsidiaries = models.ManyToManyField(
         Subsidiary, verbose_name=_('Филиалы, в которых акция актуальна'), blank=True
     )
@@ -498,6 +574,8 @@ class Promotion(TimeStampIndexedModel, DisplayableModel):
         verbose_name_plural = _('акции/новости')
         ordering = ('-ordering_number', '-created')
 
+    image_variant_fields = ('primary_image',)
+
     def __str__(self):
         return f'{self.title}'
 
@@ -519,5 +597,16 @@ class Promotion(TimeStampIndexedModel, DisplayableModel):
     def save(self, **kwargs):
         self.full_clean()
         super(Promotion, self).save(**kwargs)
+        invalidate_on_commit(self.invalidate_active_cache)
+
+    def delete(self, *args, **kwargs):
+        result = super(Promotion, self).delete(*args, **kwargs)
+        invalidate_on_commit(self.invalidate_active_cache)
+        return result
+
+    @staticmethod
+    def invalidate_active_cache() -> None:
+        """ см. PromotionSelector.get_active; кэш общий для всех процессов (Redis) """
+        cache.delete(ACTIVE_PROMOTIONS_CACHE_KEY)
 
     objects = PromotionQuerySet.as_manager()
@@ -1,11 +1,59 @@
+import datetime
+import math
+import uuid
 from collections import Iterable
-from typing import Optional
-
-from django.db.models import QuerySet
-
-from apps.clinics.constants import ONLY_ROOT, PARENT_ID, MobileAppSections
+from decimal import Decimal
+from typing import Optional, List, Dict, Sequence
+
+from django.core.cache import cache
+from django.db.models import (
+    QuerySet,
+    Exists,
+    OuterRef,
+    Subquery,
+    Case,
+    When,
+    Value,
+    IntegerField,
+    DateTimeField,
+    F,
+    Min,
+    Prefetch,
+    Q,
+)
+from django.utils import timezone
+
+from apps.appointments.selectors import TimeSlots
+from apps.clinics.constants import (
+    ONLY_ROOT,
+    PARENT_ID,
+    MobileAppSections,
+    LATITUDE,
+    LONGITUDE,
+    WITH_NEXT_FREE_SLOT,
+    NEXT_FREE_SLOT_START,
+    ACTIVE_PROMOTIONS_CACHE_KEY,
+    ACTIVE_PROMOTIONS_CACHE_MAX_TIMEOUT,
+    SERVICE_CATALOG_VERSION_CACHE_KEY,
+    SERVICE_TREE_CACHE_TIMEOUT,
+)
+from apps.clinics.data_models import ActivePromotionsCacheData, ServiceTreeNode
+from apps.clinics.geo import SubsidiaryGeoIndex
 from apps.clinics.managers import ServiceQuerySet
-from apps.clinics.models import Doctor, Patient, Subsidiary, Service
+from apps.clinics.models import (
+    Doctor,
+    Patient,
+    Subsidiary,
+    Service,
+    ServicePrice,
+    DoctorToSubsidiary,
+    DoctorToService,
+    Promotion,
+    SubsidiaryImage,
+    SubsidiaryContact,
+    SubsidiaryWorkday,
+)
+from apps.core.cache_utils import get_cache_version, get_or_calculate
 from apps.core.selectors import SoftDeletedSelector, DisplayedSelector
 from apps.integration.constants import SubsidiaryIntegrationData, MIS_SUBSIDIARY_ID
 from apps.profiles.models import Relation, Profile
@@ -53,40 +101,122 @@ class DoctorSelector(SoftDeletedSelector, DisplayedSelector):
         service_ids = kwargs.get('service_ids')
         subsidiary_ids = kwargs.get('subsidiary_ids')
         without_fakes = kwargs.get('without_fakes')
+        latitude = kwargs.get(LATITUDE)
+        longitude = kwargs.get(LONGITUDE)
+        with_next_free_slot = kwargs.get(WITH_NEXT_FREE_SLOT)
 
+        # Exists вместо join по m2m: без дублей строк врачей и без DISTINCT
         qs = queryset.prefetch_related('services', 'subsidiaries')
         if service_ids and isinstance(service_ids, Iterable):
-            # doctor_services = ServiceSelector.all().filter(id__in=service_ids)
-            # with_ancestors = Service.tree_manager.get_queryset_ancestors(
-            #     doctor_services, include_self=True).values_list('id', flat=True)
-            # qs = qs.filter(services__id__in=with_ancestors)
-            qs = qs.filter(services__id__in=service_ids)
+            qs = qs.filter(
+                Exists(
+                    DoctorToService.objects.filter(
+                        doctor_id=OuterRef('pk'), service_id__in=service_ids
+                    )
+                )
+            )
 
         if subsidiary_ids and isinstance(subsidiary_ids, Iterable):
-            qs = qs.filter(subsidiaries__id__in=subsidiary_ids)
+            qs = qs.filter(
+                Exists(
+                    DoctorToSubsidiary.objects.filter(
+                        doctor_id=OuterRef('pk'), subsidiary_id__in=subsidiary_ids
+                    )
+                )
+            )
 
         if without_fakes:
             qs = qs.filter(is_fake=False)
 
-        return qs.distinct()
+        if latitude is not None and longitude is not None:
+            qs = cls.order_by_nearest_subsidiary(qs, latitude, longitude)
+
+        if with_next_free_slot:
+            qs = cls.with_next_free_slot(qs)
+
+        return qs
+
+    @classmethod
+    def with_next_free_slot(cls, queryset):
+        """
+        Аннотирует врачей началом ближайшего свободного талона (`next_free_slot_start`)
+        подзапросом в том же запросе. Если запись к врачу пациентам недоступна - None.
+
+        :rtype: apps.clinics.managers.DoctorQuerySet
+        """
+        return queryset.annotate(
+            **{
+                NEXT_FREE_SLOT_START: Case(
+                    When(is_timeslots_available_for_patient=True, then=TimeSlots.next_free_start()),
+                    default=None,
+                    output_field=DateTimeField(),
+                )
+            }
+        )
+
+    @classmethod
+    def order_by_nearest_subsidiary(cls, queryset, latitude: Decimal, longitude: Decimal):
+        """
+        Сортирует врачей по расстоянию до ближайшего филиала, в котором врач принимает.
+        Врачи без филиалов с координатами - в конце.
+
+        :rtype: apps.clinics.managers.DoctorQuerySet
+        """
+        ranks: Dict[int, int] = {
+            point.id: rank
+            for rank, point in enumerate(SubsidiaryGeoIndex.nearest(latitude, longitude))
+        }
+        if not ranks:
+            return queryset
+
+        subsidiary_rank = Case(
+            *[When(subsidiary_id=pk, then=Value(rank)) for pk, rank in ranks.items()],
+            output_field=IntegerField(),
+        )
+        nearest_rank = (
+            DoctorToSubsidiary.objects.filter(doctor_id=OuterRef('pk'), subsidiary_id__in=ranks)
+            .annotate(rank=subsidiary_rank)
+            .order_by('rank')
+            .values('rank')[:1]
+        )
+        return queryset.annotate(nearest_subsidiary_rank=Subquery(nearest_rank)).order_by(
+            F('nearest_subsidiary_rank').asc(nulls_last=True), 'public_full_name'
+        )
 
 
 class SubsidiarySelector(SoftDeletedSelector, DisplayedSelector):
     model = Subsidiary
 
+    PREFETCH_RELATIONS = ('images', 'contacts', 'workdays')
+
+    @classmethod
+    def get_prefetch_plan(
+        cls, prefix: str = '', relations: Sequence[str] = PREFETCH_RELATIONS
+    ) -> List[Prefetch]:
+        """
+        Общий план prefetch для всех сериализаторов, в которых есть филиалы.
+        `prefix` - путь до филиалов от основной модели, например 'subsidiaries__'
+        """
+        querysets = {
+            'images': SubsidiaryImage.objects.order_by('is_primary', '-priority'),
+            'contacts': SubsidiaryContact.objects.order_by('-ordering_number'),
+            'workdays': SubsidiaryWorkday.objects.order_by('-ordering_number'),
+        }
+        return [Prefetch(f'{prefix}{relation}', querysets[relation]) for relation in relations]
+
     @classmethod
     def all(cls):
         """
         :rtype: apps.core.models.DeletableDisplayableQuerySet
         """
-        return cls.model.objects.all().prefetch_related('images')
+        return cls.model.objects.all().prefetch_related(*cls.get_prefetch_plan())
 
     @classmethod
     def all_with_deleted(cls):
         """
         :rtype: django.db.models.query.QuerySet
         """
-        return cls.model.all_objects.all().prefetch_related('images')
+        return cls.model.all_objects.all().prefetch_related(*cls.get_prefetch_plan())
 
     @classmethod
     def visible_to_patient(cls):
@@ -95,6 +225,25 @@ class SubsidiarySelector(SoftDeletedSelector, DisplayedSelector):
         """
         return cls.all().displayed()
 
+    @classmethod
+    def nearest(cls, latitude: Decimal, longitude: Decimal, limit: int) -> List[Subsidiary]:
+        """
+        Ближайшие видимые филиалы, по возрастанию расстояния.
+        У каждого филиала проставлен атрибут `distance_km`.
+        """
+        points = SubsidiaryGeoIndex.nearest(latitude, longitude, limit)
+        subsidiaries = cls.visible_to_patient().in_bulk([point.id for point in points])
+
+        result = []
+        for point in points:
+            subsidiary = subsidiaries.get(point.id)
+            if subsidiary is None:
+                # индекс еще не пересобран после скрытия филиала
+                continue
+            subsidiary.distance_km = round(point.distance_km, 3)
+            result.append(subsidiary)
+        return result
+
     @classmethod
     def get_by_integration_id(cls, mis_subsidiary_id: int) -> Optional[Subsidiary]:
         contains: SubsidiaryIntegrationData = {MIS_SUBSIDIARY_ID: mis_subsidiary_id}
@@ -122,7 +271,23 @@ class ServiceSelector(SoftDeletedSelector, DisplayedSelector):
         :rtype: apps.clinics.managers.ServiceQuerySet
         """
         return (
-            cls.model.objects.all().prefetch_related('subsidiaries').order_by('-priority', "title")
+            cls.model.objects.all()
+            .prefetch_related(
+                'subsidiaries',
+                *SubsidiarySelector.get_prefetch_plan('subsidiaries__', relations=('images',)),
+                cls.get_prices_prefetch(),
+            )
+            .order_by('-priority', "title")
+        )
+
+    @classmethod
+    def get_prices_prefetch(cls, prefix: str = '') -> Prefetch:
+        """
+        Prefetch показываемых цен услуги, `prefix` - путь до услуги (`services__`)
+        """
+        return Prefetch(
+            f'{prefix}prices',
+            queryset=ServicePrice.objects.displayed().order_by('-priority', 'pk'),
         )
 
     @classmethod
@@ -132,6 +297,64 @@ class ServiceSelector(SoftDeletedSelector, DisplayedSelector):
         """
         return cls.all().displayed()
 
+    @classmethod
+    def build_displayed_tree(cls) -> List[ServiceTreeNode]:
+        """
+        Дерево показываемых услуг одним запросом в порядке обхода дерева (tree_id, lft).
+        Потомки скрытой услуги в дерево не попадают.
+        """
+        rows = (
+            cls.model.objects.displayed()
+            .order_by('tree_id', 'lft')
+            .values(
+                'id',
+                'title',
+                'description',
+                'level',
+                'parent_id',
+                'priority',
+                'is_visible_for_appointments',
+            )
+        )
+        nodes: Dict[int, ServiceTreeNode] = {}
+        roots: List[ServiceTreeNode] = []
+        for row in rows:
+            parent_id = row['parent_id']
+            if parent_id is None:
+                siblings = roots
+            elif parent_id in nodes:
+                siblings = nodes[parent_id]['children']
+            else:
+                continue
+            node: ServiceTreeNode = {**row, 'children': []}
+            nodes[row['id']] = node
+            siblings.append(node)
+
+        # порядок как в ServiceSelector.all()
+        sort_key = lambda x: (-x['priority'], x['title'])
+        roots.sort(key=sort_key)
+        for node in nodes.values():
+            node['children'].sort(key=sort_key)
+        return roots
+
+    @classmethod
+    def get_catalog_version(cls) -> str:
+        """
+        Версия каталога в общем кэше (Redis): меняется после коммита изменений услуг
+        """
+        return get_cache_version(SERVICE_CATALOG_VERSION_CACHE_KEY)
+
+    @classmethod
+    def get_displayed_tree(cls) -> List[ServiceTreeNode]:
+        """
+        Закэшированное дерево услуг; ключ меняется вместе с версией каталога
+        """
+        return get_or_calculate(
+            f'clinics:service_tree:{cls.get_catalog_version()}',
+            cls.build_displayed_tree,
+            timeout=SERVICE_TREE_CACHE_TIMEOUT,
+        )
+
     @classmethod
     def filter_by_params(cls, queryset: ServiceQuerySet, **kwargs) -> QuerySet:
         subsidiary_ids = kwargs.get('subsidiary_ids')
@@ -160,6 +383,57 @@ class ServiceSelector(SoftDeletedSelector, DisplayedSelector):
         return queryset
 
 
+class PromotionSelector(DisplayedSelector):
+    model = Promotion
+
+    @classmethod
+    def all(cls):
+        """
+        :rtype: apps.clinics.managers.PromotionQuerySet
+        """
+        return cls.model.objects.all().prefetch_related(
+            'subsidiaries',
+            *SubsidiarySelector.get_prefetch_plan('subsidiaries__', relations=('images',)),
+        )
+
+    @classmethod
+    def get_next_publication_boundary(cls, now: datetime.datetime) -> Optional[datetime.datetime]:
+        """
+        Ближайший момент после `now`, когда набор показываемых акций может измениться
+        """
+        boundaries = cls.model.objects.filter(is_displayed=True).aggregate(
+            next_from=Min('published_from', filter=Q(published_from__gt=now)),
+            next_until=Min('published_until', filter=Q(published_until__gt=now)),
+        )
+        values = [value for value in boundaries.values() if value]
+        return min(values) if values else None
+
+    @classmethod
+    def get_active(cls) -> ActivePromotionsCacheData:
+        """
+        Показываемые сейчас акции из кэша.
+        Кэш живет до ближайшей границы публикации и сбрасывается при сохранении акций
+        """
+        data: Optional[ActivePromotionsCacheData] = cache.get(ACTIVE_PROMOTIONS_CACHE_KEY)
+        if data is not None:
+            return data
+
+        now = timezone.now()
+        promotions = list(cls.visible_to_patient())
+        data = {
+            'version': uuid.uuid4().hex,
+            'promotions': promotions,
+            'last_modified': max((x.modified for x in promotions), default=None),
+        }
+
+        timeout = ACTIVE_PROMOTIONS_CACHE_MAX_TIMEOUT
+        boundary = cls.get_next_publication_boundary(now)
+        if boundary:
+            timeout = min(timeout, math.ceil((boundary - now).total_seconds()))
+        cache.set(ACTIVE_PROMOTIONS_CACHE_KEY, data, timeout=timeout)
+        return data
+
+
 class PatientSelector(SoftDeletedSelector, DisplayedSelector):
     model = Patient
 
@@ -1,18 +1,26 @@
+from typing import Union
+
 from django.conf import settings
+from django.db.models import Manager
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError as DRFValidationError
 
 from apps.clinics import models
+from apps.clinics.constants import NEXT_FREE_SLOT_START
 from apps.core.models import DisplayableQuerySet
+from apps.core.serializers import DateTimeTzAwareField, ImageVariantsField
 from apps.profiles.constants import RelationType, Gender
 from apps.profiles.validators import validate_birth_date
+from apps.reviews.serializers import DoctorReviewStatsSerializer
 from apps.reviews.workflow import ReviewWorkflow
 
 
 class ClinicImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = models.ClinicImage
-        fields = ('image',)
+        fields = ('image', 'image_variants')
 
 
 class ClinicInfoSerializer(serializers.Serializer):
@@ -22,9 +30,11 @@ class ClinicInfoSerializer(serializers.Serializer):
 
 
 class SubsidiaryImageSerializer(serializers.ModelSerializer):
+    picture_variants = ImageVariantsField()
+
     class Meta:
         model = models.SubsidiaryImage
-        fields = ('picture', 'priority', 'is_primary')
+        fields = ('picture', 'picture_variants', 'priority', 'is_primary')
 
 
 class SubsidiaryContactSerializer(serializers.ModelSerializer):
@@ -42,6 +52,7 @@ class SubsidiaryWorkdaySerializer(serializers.ModelSerializer):
 class SubsidiarySerializer(serializers.ModelSerializer):
     picture = serializers.ImageField(source='primary_image')  # backwards compatibility
     primary_image = serializers.ImageField()
+    primary_image_variants = ImageVariantsField()
     images = SubsidiaryImageSerializer(many=True, read_only=True)
     contacts = SubsidiaryContactSerializer(many=True, read_only=True)
     workdays = SubsidiaryWorkdaySerializer(many=True, read_only=True)
@@ -58,10 +69,17 @@ class SubsidiarySerializer(serializers.ModelSerializer):
             'longitude',
             'picture',
             'primary_image',
+            'primary_image_variants',
             'images',
             'contacts',
             'workdays',
         )
+        # для ?fields= (см. apps.core.views.SparseFieldsetMixin)
+        sparse_field_dependencies = {
+            'picture': ('images',),
+            'primary_image': ('images',),
+            'primary_image_variants': ('images',),
+        }
 
 
 class SubsidiaryListSerializer(SubsidiarySerializer):
@@ -76,11 +94,19 @@ class SubsidiaryListSerializer(SubsidiarySerializer):
             'longitude',
             'picture',
             'primary_image',
+            'primary_image_variants',
             'contacts',
             'workdays',
         )
 
 
+class SubsidiaryNearestSerializer(SubsidiaryListSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(SubsidiaryListSerializer.Meta):
+        fields = read_only_fields = SubsidiaryListSerializer.Meta.fields + ('distance_km',)
+
+
 class SubsidiaryForDoctorSerializer(SubsidiarySerializer):
     class Meta(SubsidiarySerializer.Meta):
         fields = read_only_fields = ('id', 'title')
@@ -117,8 +143,14 @@ class SubsidiaryForPromotionSerializer(SubsidiarySerializer):
 
 
 class ServicePriceDisplayedListSerializer(serializers.ListSerializer):
-    def to_representation(self, data: DisplayableQuerySet):
-        data = data.displayed()
+    def to_representation(self, data: Union[Manager, DisplayableQuerySet]):
+        if isinstance(data, Manager):
+            data = data.all()
+        if isinstance(data, DisplayableQuerySet) and data._result_cache is None:
+            data = data.displayed()
+        else:
+            # цены уже выбраны через prefetch - фильтруем без запроса
+            data = [price for price in data if price.is_displayed]
         return super(ServicePriceDisplayedListSerializer, self).to_representation(data)
 
 
@@ -153,6 +185,22 @@ class ServiceSerializer(serializers.ModelSerializer):
             'prices',
             'is_visible_for_appointments',
         )
+        sparse_field_dependencies = {'children_count': ('tree_id', 'lft', 'rght', 'level')}
+
+
+class ServiceTreeSerializer(serializers.Serializer):
+    """
+    Узел дерева услуг, для документации ServiceTreeView
+    """
+
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    description = serializers.CharField(allow_null=True)
+    level = serializers.IntegerField()
+    parent_id = serializers.IntegerField(allow_null=True)
+    priority = serializers.IntegerField()
+    is_visible_for_appointments = serializers.BooleanField()
+    children = serializers.ListField(child=serializers.DictField())
 
 
 class ServiceForDoctorSerializer(ServiceSerializer):
@@ -184,6 +232,7 @@ class ServiceForAppointmentSerializer(ServiceSerializer):
 class BaseDoctorSerializer(serializers.ModelSerializer):
     # full_name = serializers.CharField()
     picture = serializers.ImageField(source='profile.picture_draft')
+    picture_variants = ImageVariantsField(source='profile.picture_draft_variants')
     services = ServiceForDoctorSerializer(many=True, read_only=True)
     subsidiaries = SubsidiaryForDoctorSerializer(many=True, read_only=True)
     grade = serializers.SerializerMethodField(read_only=True)
@@ -194,6 +243,7 @@ class BaseDoctorSerializer(serializers.ModelSerializer):
             'id',
             'full_name',
             'picture',
+            'picture_variants',
             'description',
             'experience',
             'education',
@@ -204,19 +254,33 @@ class BaseDoctorSerializer(serializers.ModelSerializer):
             'is_timeslots_available_for_patient',
             "grade",
         )
+        sparse_field_dependencies = {
+            'full_name': ('public_full_name', 'profile'),
+            'grade': ('review_stats',),
+            'youtube_video_id': ('youtube_video_link',),
+            NEXT_FREE_SLOT_START: (),
+        }
 
     def get_grade(self, obj) -> str:
-        value = ReviewWorkflow.get_actual_grade_for_doctor(doctor=obj)
+        stats = getattr(obj, 'review_stats', None)
+        if stats is not None:
+            value = stats.average_grade
+        else:
+            # строки статистики еще нет - до ближайшей сверки считаем по отзывам
+            value = ReviewWorkflow.get_actual_grade_for_doctor(doctor=obj)
         if value:
             return str(value)
 
 
 class DoctorSerializer(BaseDoctorSerializer):
+    review_stats = DoctorReviewStatsSerializer(read_only=True)
+
     class Meta(BaseDoctorSerializer.Meta):
         fields = (
             'id',
             'full_name',
             'picture',
+            'picture_variants',
             'description',
             'experience',
             'education',
@@ -225,18 +289,22 @@ class DoctorSerializer(BaseDoctorSerializer):
             'subsidiaries',
             'is_timeslots_available_for_patient',
             "grade",
+            "review_stats",
             "youtube_video_id",
         )
 
 
 class DoctorListSerializer(BaseDoctorSerializer):
     services = ServiceForDoctorListSerializer(many=True, read_only=True)
+    # только при ?with_next_free_slot=true, иначе поля в ответе нет
+    next_free_slot_start = DateTimeTzAwareField(read_only=True)
 
     class Meta(BaseDoctorSerializer.Meta):
         fields = (
             'id',
             'full_name',
             'picture',
+            'picture_variants',
             'description',
             'experience',
             'education',
@@ -245,6 +313,7 @@ class DoctorListSerializer(BaseDoctorSerializer):
             'subsidiaries',
             'is_timeslots_available_for_patient',
             "grade",
+            NEXT_FREE_SLOT_START,
         )
 
 
@@ -256,6 +325,7 @@ class DoctorForAppointmentSerializer(BaseDoctorSerializer):
             'full_name',
             'description',
             'picture',
+            'picture_variants',
             'speciality_text',
             'is_timeslots_available_for_patient',
         )
@@ -275,6 +345,7 @@ class PatientSerializer(serializers.ModelSerializer):
 
 class PromotionSerializer(serializers.ModelSerializer):
     subsidiaries = SubsidiaryForPromotionSerializer(many=True, read_only=True)
+    primary_image_variants = ImageVariantsField()
 
     class Meta:
         model = models.Promotion
@@ -287,6 +358,7 @@ class PromotionSerializer(serializers.ModelSerializer):
             'published_until',
             'publication_range_text',
             'primary_image',
+            'primary_image_variants',
         )
 
 
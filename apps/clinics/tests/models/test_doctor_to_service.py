@@ -1,4 +1,4 @@
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
 from apps.clinics.factories import DoctorFactory, ServiceFactory
@@ -20,7 +20,18 @@ class DoctorToServiceTest(TestCase):
 
     def test_save__raises(self):
         DoctorToService.objects.create(doctor=self.doctor, service=self.service)
-        with self.assertRaises(IntegrityError):
+        with self.assertRaises(IntegrityError), transaction.atomic():
             DoctorToService.objects.create(doctor=self.doctor, service=self.service)
         self.assertEqual(list(self.doctor.services.all()), [self.service])
         self.assertEqual(list(self.service.doctor_set.all()), [self.doctor])
+
+    def test_link_many__skips_existing(self):
+        DoctorToService.objects.create(doctor=self.doctor, service=self.service)
+        with self.assertNumQueries(1):
+            DoctorToService.objects.link_many(
+                [
+                    DoctorToService(doctor=self.doctor, service=self.service),
+                    DoctorToService(doctor=self.doctor, service=self.service),
+                ]
+            )
+        self.assertEqual(1, DoctorToService.objects.count())
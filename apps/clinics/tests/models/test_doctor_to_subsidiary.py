@@ -1,4 +1,4 @@
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
 from apps.clinics.factories import DoctorFactory, SubsidiaryFactory
@@ -18,7 +18,18 @@ class DoctorToSubsidiaryTest(TestCase):
 
     def test_save__raises(self):
         DoctorToSubsidiary.objects.create(doctor=self.doctor, subsidiary=self.subsidiary)
-        with self.assertRaises(IntegrityError):
+        with self.assertRaises(IntegrityError), transaction.atomic():
             DoctorToSubsidiary.objects.create(doctor=self.doctor, subsidiary=self.subsidiary)
         self.assertEqual(list(self.doctor.subsidiaries.all()), [self.subsidiary])
         self.assertEqual(list(self.subsidiary.doctor_set.all()), [self.doctor])
+
+    def test_link_many__skips_existing(self):
+        DoctorToSubsidiary.objects.create(doctor=self.doctor, subsidiary=self.subsidiary)
+        with self.assertNumQueries(1):
+            DoctorToSubsidiary.objects.link_many(
+                [
+                    DoctorToSubsidiary(doctor=self.doctor, subsidiary=self.subsidiary),
+                    DoctorToSubsidiary(doctor=self.doctor, subsidiary=self.subsidiary),
+                ]
+            )
+        self.assertEqual(1, DoctorToSubsidiary.objects.count())
@@ -1,4 +1,4 @@
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
 from apps.clinics.factories import ServiceFactory, SubsidiaryFactory
@@ -18,7 +18,18 @@ class ServiceToSubsidiaryTest(TestCase):
 
     def test_save__raises(self):
         ServiceToSubsidiary.objects.create(service=self.service, subsidiary=self.subsidiary)
-        with self.assertRaises(IntegrityError):
+        with self.assertRaises(IntegrityError), transaction.atomic():
             ServiceToSubsidiary.objects.create(service=self.service, subsidiary=self.subsidiary)
         self.assertEqual(list(self.service.subsidiaries.all()), [self.subsidiary])
         self.assertEqual(list(self.subsidiary.service_set.all()), [self.service])
+
+    def test_link_many__skips_existing(self):
+        ServiceToSubsidiary.objects.create(service=self.service, subsidiary=self.subsidiary)
+        with self.assertNumQueries(1):
+            ServiceToSubsidiary.objects.link_many(
+                [
+                    ServiceToSubsidiary(service=self.service, subsidiary=self.subsidiary),
+                    ServiceToSubsidiary(service=self.service, subsidiary=self.subsidiary),
+                ]
+            )
+        self.assertEqual(1, ServiceToSubsidiary.objects.count())
@@ -49,3 +49,13 @@ class SubsidiaryTest(TestCase):
         updated_doctor = Subsidiary.all_objects.get(id=doctor.id)
         self.assertFalse(updated_doctor.is_displayed)
         self.assertTrue(updated_doctor.is_removed)
+
+    def test_primary_image__prefetched(self):
+        image = SubsidiaryImage.objects.create(
+            subsidiary=self.subsidiary, is_primary=True, picture='hello.jpg'
+        )
+        SubsidiaryImage.objects.create(subsidiary=self.subsidiary, picture='world.jpg')
+        subsidiary = Subsidiary.objects.prefetch_related('images').get(id=self.subsidiary.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(image.picture, subsidiary.primary_image)
@@ -1,5 +1,6 @@
 from django.core.exceptions import ValidationError
 from django.test import TestCase
+from mock import patch
 
 from apps.clinics.factories import SubsidiaryFactory
 from apps.clinics.models import SubsidiaryImage
@@ -50,3 +51,54 @@ class SubsidiaryImageTest(TestCase):
         with self.assertRaises(ValidationError):
             image_2.is_primary = True
             image_2.clean()
+
+
+class SubsidiaryImageVariantsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.subsidiary = SubsidiaryFactory()
+        touch_media_files(['hello.jpg', 'world.jpg'])
+
+    @patch('apps.core.models.transaction.on_commit')
+    def test_save__schedules_variants_for_new_picture(self, on_commit):
+        image = SubsidiaryImage.objects.create(subsidiary=self.subsidiary, picture='hello.jpg')
+        self.assertEqual(on_commit.call_count, 1)
+
+        image.priority = 10
+        image.save()
+        self.assertEqual(on_commit.call_count, 1)
+
+        image.picture_variants = {'webp': {'64': 'image_variants/ab/abc/64.webp'}}
+        image.save()
+        image.picture = 'world.jpg'
+        image.save()
+
+        self.assertEqual(on_commit.call_count, 2)
+        image.refresh_from_db()
+        self.assertEqual(image.picture_variants, {})
+
+    @patch('apps.core.models.transaction.on_commit')
+    def test_set_image_variants(self, on_commit):
+        image = SubsidiaryImage.objects.create(
+            subsidiary=self.subsidiary, picture='hello.jpg', is_primary=True
+        )
+        variants = {'webp': {'64': 'image_variants/ab/abc/64.webp'}}
+
+        image.set_image_variants('picture', variants)
+
+        self.assertEqual(on_commit.call_count, 1)
+        image.refresh_from_db()
+        self.assertEqual(image.picture_variants, variants)
+        self.assertEqual(self.subsidiary.primary_image_variants, variants)
+
+    @patch('apps.core.models.transaction.on_commit')
+    def test_set_image_variants__picture_replaced(self, on_commit):
+        image = SubsidiaryImage.objects.create(
+            subsidiary=self.subsidiary, picture='hello.jpg', is_primary=True
+        )
+        SubsidiaryImage.objects.filter(pk=image.pk).update(picture='world.jpg')
+
+        image.set_image_variants('picture', {'webp': {'64': 'image_variants/ab/abc/64.webp'}})
+
+        image.refresh_from_db()
+        self.assertEqual(image.picture_variants, {})
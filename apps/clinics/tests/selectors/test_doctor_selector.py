@@ -1,7 +1,10 @@
 from copy import deepcopy
+from datetime import timedelta
 
 from django.test import TestCase
+from django.utils import timezone
 
+from apps.appointments.factories import TimeSlotFactory
 from apps.clinics.factories import DoctorFactory, ServiceFactory, SubsidiaryFactory
 from apps.clinics.selectors import DoctorSelector
 
@@ -161,6 +164,18 @@ class DoctorSelectorFilterTest(TestCase):
             {self.doctor_first, self.doctor_second, self.doctor_mixed},
         )
 
+    def test_filter_by_params__both_filters__without_duplicates(self):
+        qs = self.selector.filter_by_params(
+            self.all_doctors,
+            service_ids=[self.service_first.id, self.service_second.id],
+            subsidiary_ids=[self.subsidiary_first.id, self.subsidiary_second.id],
+        )
+        self.assertNotIn('DISTINCT', str(qs.query))
+        self.assertEqual(
+            sorted(x.id for x in qs),
+            sorted(x.id for x in (self.doctor_first, self.doctor_second, self.doctor_mixed)),
+        )
+
     def test_filter_by_params__nonexistent_service_id(self):
         self.assertEqual(
             list(self.selector.filter_by_params(self.all_doctors, service_ids=[123456])), []
@@ -192,3 +207,92 @@ class DoctorSelectorFilterTest(TestCase):
             transform=lambda x: x,
             ordered=False,
         )
+
+
+class DoctorSelectorNearestSubsidiaryTest(TestCase):
+    selector = DoctorSelector()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subsidiary_moscow = SubsidiaryFactory(latitude='55.755800', longitude='37.617300')
+        cls.subsidiary_spb = SubsidiaryFactory(latitude='59.934300', longitude='30.335100')
+        cls.subsidiary_without_coords = SubsidiaryFactory()
+
+        cls.doctor_moscow = DoctorFactory(
+            subsidiaries=[cls.subsidiary_moscow], public_full_name='a'
+        )
+        cls.doctor_spb = DoctorFactory(subsidiaries=[cls.subsidiary_spb], public_full_name='b')
+        cls.doctor_both = DoctorFactory(
+            subsidiaries=[cls.subsidiary_spb, cls.subsidiary_moscow], public_full_name='c'
+        )
+        cls.doctor_without_coords = DoctorFactory(
+            subsidiaries=[cls.subsidiary_without_coords], public_full_name='d'
+        )
+
+    def test_filter_by_params__near_moscow(self):
+        qs = self.selector.filter_by_params(
+            self.selector.all(), latitude='55.700000', longitude='37.600000'
+        )
+        self.assertEqual(
+            list(qs),
+            [self.doctor_moscow, self.doctor_both, self.doctor_spb, self.doctor_without_coords],
+        )
+
+    def test_filter_by_params__near_spb(self):
+        qs = self.selector.filter_by_params(
+            self.selector.all(), latitude='59.900000', longitude='30.300000'
+        )
+        self.assertEqual(
+            list(qs),
+            [self.doctor_spb, self.doctor_both, self.doctor_moscow, self.doctor_without_coords],
+        )
+
+    def test_filter_by_params__near_moscow__with_subsidiary_filter(self):
+        qs = self.selector.filter_by_params(
+            self.selector.all(),
+            subsidiary_ids=[self.subsidiary_spb.id],
+            latitude='55.700000',
+            longitude='37.600000',
+        )
+        self.assertEqual(list(qs), [self.doctor_both, self.doctor_spb])
+
+
+class DoctorSelectorNextFreeSlotTest(TestCase):
+    selector = DoctorSelector()
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.doctor = DoctorFactory(is_timeslots_available_for_patient=True)
+        cls.doctor_without_slots = DoctorFactory(is_timeslots_available_for_patient=True)
+        cls.doctor_closed = DoctorFactory(is_timeslots_available_for_patient=False)
+
+        TimeSlotFactory(doctor=cls.doctor, initial_datetime=now - timedelta(days=1))
+        TimeSlotFactory(
+            doctor=cls.doctor, initial_datetime=now + timedelta(days=1), is_available=False
+        )
+        cls.next_slot = TimeSlotFactory(doctor=cls.doctor, initial_datetime=now + timedelta(days=2))
+        TimeSlotFactory(doctor=cls.doctor, initial_datetime=now + timedelta(days=3))
+        TimeSlotFactory(doctor=cls.doctor_closed, initial_datetime=now + timedelta(days=1))
+
+    def test_filter_by_params__with_next_free_slot(self):
+        with self.assertNumQueries(1):
+            starts = {
+                doctor.id: doctor.next_free_slot_start
+                for doctor in self.selector.filter_by_params(
+                    self.selector.all(), with_next_free_slot=True
+                ).prefetch_related(None)
+            }
+
+        self.assertEqual(
+            starts,
+            {
+                self.doctor.id: self.next_slot.start,
+                self.doctor_without_slots.id: None,
+                self.doctor_closed.id: None,
+            },
+        )
+
+    def test_filter_by_params__without_next_free_slot(self):
+        doctor = self.selector.filter_by_params(self.selector.all()).get(id=self.doctor.id)
+        self.assertFalse(hasattr(doctor, 'next_free_slot_start'))
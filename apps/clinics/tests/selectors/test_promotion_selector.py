@@ -0,0 +1,82 @@
+import tempfile
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from mock import patch
+
+from apps.clinics.constants import ACTIVE_PROMOTIONS_CACHE_KEY
+from apps.clinics.models import Promotion
+from apps.clinics.selectors import PromotionSelector
+
+GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xff\xff\xff\x21\xf9\x04\x00\x00\x00\x00\x00\x2c\x00\x00\x00\x00'
+    b'\x01\x00\x01\x00\x00\x02\x02\x44\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PromotionSelectorActiveTest(TestCase):
+    selector = PromotionSelector
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def _create(self, **kwargs) -> Promotion:
+        kwargs.setdefault('published_from', self.now - timedelta(days=1))
+        return Promotion.objects.create(
+            title='promotion',
+            content='content',
+            primary_image=SimpleUploadedFile('image.gif', GIF, content_type='image/gif'),
+            **kwargs,
+        )
+
+    def test_get_active(self):
+        active = self._create()
+        self._create(is_displayed=False)
+
+        self.assertEqual(self.selector.get_active()['promotions'], [active])
+
+    def test_get_active__served_from_cache(self):
+        self._create()
+        self.selector.get_active()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.selector.get_active()['promotions']), 1)
+
+    def test_get_active__invalidated_on_save(self):
+        promotion = self._create()
+        version = self.selector.get_active()['version']
+
+        promotion.is_displayed = False
+        promotion.save()
+
+        data = self.selector.get_active()
+        self.assertNotEqual(data['version'], version)
+        self.assertEqual(data['promotions'], [])
+
+    def test_get_active__expires_at_next_boundary(self):
+        self._create(published_until=self.now + timedelta(hours=3))
+        self._create(published_from=self.now + timedelta(hours=1))
+
+        with patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.selector.get_active()
+
+        key, data = cache_set.call_args[0]
+        self.assertEqual(key, ACTIVE_PROMOTIONS_CACHE_KEY)
+        self.assertAlmostEqual(cache_set.call_args[1]['timeout'], 60 * 60, delta=5)
+        self.assertEqual(
+            self.selector.get_next_publication_boundary(self.now), self.now + timedelta(hours=1)
+        )
+
+    def test_get_next_publication_boundary__without_boundaries(self):
+        self._create()
+        self.assertIsNone(self.selector.get_next_publication_boundary(self.now))
+
+    def test_get_next_publication_boundary__hidden_ignored(self):
+        self._create(is_displayed=False, published_from=self.now + timedelta(hours=1))
+        self.assertIsNone(self.selector.get_next_publication_boundary(self.now))
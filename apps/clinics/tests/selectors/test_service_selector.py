@@ -1,6 +1,7 @@
 from django.test import TestCase
 
 from apps.clinics.factories import ServiceFactory, SubsidiaryFactory
+from apps.clinics.models import Service
 from apps.clinics.selectors import ServiceSelector
 
 
@@ -92,3 +93,32 @@ class ServiceSelectorTest(TestCase):
         self.assertEqual(
             set(qs), set(self.service_list),
         )
+
+
+class ServiceSelectorTreeTest(TestCase):
+    def setUp(self):
+        self.root = Service.objects.create(title='root', priority=1)
+        self.top = Service.objects.create(title='top', priority=5)
+        self.child_b = Service.objects.create(title='b', parent=self.root)
+        self.child_a = Service.objects.create(title='a', parent=self.root)
+        self.hidden = Service.objects.create(title='hidden', parent=self.root, is_displayed=False)
+        Service.objects.create(title='hidden child', parent=self.hidden)
+
+    def test_build_displayed_tree__one_query(self):
+        with self.assertNumQueries(1):
+            tree = ServiceSelector.build_displayed_tree()
+
+        self.assertEqual([node['id'] for node in tree], [self.top.id, self.root.id])
+        self.assertEqual(tree[0]['children'], [])
+        self.assertEqual(
+            [node['id'] for node in tree[1]['children']], [self.child_a.id, self.child_b.id]
+        )
+        self.assertEqual(tree[1]['children'][0]['parent_id'], self.root.id)
+
+    def test_get_displayed_tree__invalidated_on_save(self):
+        self.assertEqual(len(ServiceSelector.get_displayed_tree()), 2)
+        self.top.is_displayed = False
+        self.top.save()
+        self.assertEqual(
+            [node['id'] for node in ServiceSelector.get_displayed_tree()], [self.root.id]
+        )
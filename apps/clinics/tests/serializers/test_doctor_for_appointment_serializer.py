@@ -19,6 +19,7 @@ class DoctorForAppointmentSerializerTest(TestCase):
             'description': 'эникей 81уровня',
             'speciality_text': 'ваш лучший друг',
             'picture': doctor.profile.picture_draft,
+            'picture_variants': {},
             'is_timeslots_available_for_patient': False,
         }
         self.assertEqual(expected_data, actual_data)
@@ -23,6 +23,7 @@ class DoctorSerializerTest(TestCase):
             'id': doctor.id,
             'full_name': doctor.profile.full_name,
             'picture': None,
+            'picture_variants': {},
             'description': 'эникей 80уровня',
             'experience': 'experince_1',
             'education': 'Средняя школа №100500',
@@ -31,6 +32,7 @@ class DoctorSerializerTest(TestCase):
             'services': [val for val in doctor.services.all().values('id', 'title')],
             'is_timeslots_available_for_patient': False,
             "grade": None,
+            "review_stats": None,
             "youtube_video_id": "-r1Q04Qq4so",
         }
         self.assertEqual(expected_data, actual_data)
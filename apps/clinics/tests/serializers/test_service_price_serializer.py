@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from apps.clinics.factories import ServiceFactory
+from apps.clinics.models import Service, ServicePrice
+from apps.clinics.selectors import ServiceSelector
+from apps.clinics.serializers import ServicePriceSerializer
+
+
+class ServicePriceDisplayedListSerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.service = ServiceFactory()
+        ServicePrice.objects.create(service=cls.service, title='low', price='100', priority=1)
+        ServicePrice.objects.create(service=cls.service, title='high', price='200', priority=2)
+        ServicePrice.objects.create(
+            service=cls.service, title='hidden', price='300', is_displayed=False
+        )
+        cls.expected = [{'title': 'high', 'price': '200'}, {'title': 'low', 'price': '100'}]
+
+    def _serialize(self, service: Service):
+        return ServicePriceSerializer(instance=service.prices, many=True).data
+
+    def test_without_prefetch(self):
+        self.assertEqual(self._serialize(self.service), self.expected)
+
+    def test_selector_prefetch__no_queries(self):
+        service = ServiceSelector.all().get(pk=self.service.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._serialize(service), self.expected)
+
+    def test_plain_prefetch__filtered_in_memory(self):
+        service = Service.objects.prefetch_related('prices').get(pk=self.service.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._serialize(service), self.expected)
@@ -0,0 +1,52 @@
+from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.test import RequestFactory, TestCase
+
+from apps.clinics.admin import DoctorAdmin
+from apps.clinics.factories import DoctorFactory
+from apps.clinics.models import Doctor
+
+
+class DoctorAdminSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = DoctorFactory(public_full_name='Ivanov Ivan Ivanovich')
+        cls.other = DoctorFactory(public_full_name='Petrov Petr Petrovich')
+        cls.model_admin = DoctorAdmin(Doctor, admin.site)
+
+    def _search(self, search_term):
+        request = RequestFactory().get('/', {SEARCH_VAR: search_term})
+        return self.model_admin.get_search_results(request, Doctor.objects.all(), search_term)
+
+    def test_trigram_search(self):
+        queryset, use_distinct = self._search('Ivanof')
+
+        self.assertFalse(use_distinct)
+        self.assertEqual(list(queryset), [self.doctor])
+
+    def test_trigram_search__rank_computed_once(self):
+        with self.assertNumQueries(1):
+            queryset, _ = self._search('Ivanof')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(list(queryset.order_by('-search_rank')), [self.doctor])
+
+    def test_trigram_search__limited(self):
+        self.model_admin.trigram_search_limit = 1
+        self.addCleanup(delattr, self.model_admin, 'trigram_search_limit')
+
+        queryset, _ = self._search('Ivanovich Petrovich')
+
+        self.assertEqual(queryset.count(), 1)
+
+    def test_numeric_term__default_search(self):
+        queryset, _ = self._search(str(self.doctor.pk))
+
+        self.assertIn(self.doctor, queryset)
+
+    def test_get_ordering__by_rank(self):
+        request = RequestFactory().get('/', {SEARCH_VAR: 'Ivanov'})
+        self.assertEqual(self.model_admin.get_ordering(request), ('-search_rank',))
+
+        request = RequestFactory().get('/')
+        self.assertNotEqual(self.model_admin.get_ordering(request), ('-search_rank',))
@@ -1,11 +1,17 @@
+from datetime import timedelta
 from typing import List
 
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
 
+from apps.appointments.factories import TimeSlotFactory
 from apps.clinics.factories import DoctorFactory, ServiceFactory, SubsidiaryFactory
 from apps.clinics.models import DoctorToService, DoctorToSubsidiary, Service, Doctor
+from apps.clinics.views import DoctorListView
+from apps.core.serializers import DateTimeTzAwareField
 
 
 class DoctorListViewTest(APITestCase):
@@ -19,6 +25,7 @@ class DoctorListViewTest(APITestCase):
             'id': doctor.id,
             'full_name': doctor.profile.full_name,
             'picture': None,
+            'picture_variants': {},
             'description': doctor.description,
             'experience': doctor.experience,
             'education': doctor.education,
@@ -150,3 +157,59 @@ class DoctorListViewTest(APITestCase):
         actual_result_ids = [x['id'] for x in results]
         self.assertEqual([self.doctor.id], actual_result_ids)
         self.assertEqual([self.__doctor_to_dict(self.doctor)], results)
+
+    def test_get__sparse_fields(self):
+        response = self.client.get(self.url, {'fields': 'id,full_name,picture,unknown'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [{'id': self.doctor.id, 'full_name': self.doctor.profile.full_name, 'picture': None}],
+            response.json()['results'],
+        )
+
+    def test_sparse_fields__queryset(self):
+        request = Request(APIRequestFactory().get(self.url, {'fields': 'id,full_name,picture'}))
+        view = DoctorListView(request=request, kwargs={}, format_kwarg=None)
+
+        queryset = view.filter_queryset(view.get_queryset())
+
+        self.assertEqual((), queryset._prefetch_related_lookups)
+        doctor = queryset.get(id=self.doctor.id)
+        self.assertIn('description', doctor.get_deferred_fields())
+        self.assertIn('education', doctor.get_deferred_fields())
+        self.assertNotIn('public_full_name', doctor.get_deferred_fields())
+
+    def test_get__with_next_free_slot(self):
+        self.doctor.is_timeslots_available_for_patient = True
+        self.doctor.save()
+        slot = TimeSlotFactory(
+            doctor=self.doctor, initial_datetime=timezone.now() + timedelta(days=1)
+        )
+
+        response = self.client.get(self.url, {'with_next_free_slot': 'true'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            DateTimeTzAwareField().to_representation(slot.start),
+            response.json()['results'][0]['next_free_slot_start'],
+        )
+
+        response = self.client.get(self.url)
+        self.assertNotIn('next_free_slot_start', response.json()['results'][0])
+
+    def test_get__with_next_free_slot__etag_follows_slots(self):
+        params = {'with_next_free_slot': 'true'}
+        etag = self.client.get(self.url, params)['ETag']
+
+        TimeSlotFactory(doctor=self.doctor, initial_datetime=timezone.now() + timedelta(days=1))
+
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_get__with_next_free_slot__etag_ignores_past_slots(self):
+        params = {'with_next_free_slot': 'true'}
+        etag = self.client.get(self.url, params)['ETag']
+
+        TimeSlotFactory(doctor=self.doctor, initial_datetime=timezone.now() - timedelta(days=1))
+
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
@@ -17,6 +17,7 @@ class OneDoctorViewTest(APITestCase):
             'id': doctor.id,
             'full_name': doctor.profile.full_name,
             'picture': None,
+            'picture_variants': {},
             'description': doctor.description,
             'experience': doctor.experience,
             'education': doctor.education,
@@ -27,6 +28,7 @@ class OneDoctorViewTest(APITestCase):
             ),
             'is_timeslots_available_for_patient': doctor.is_timeslots_available_for_patient,
             "grade": None,
+            "review_stats": None,
             "youtube_video_id": doctor.youtube_video_id,
         }
 
@@ -3,8 +3,8 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from apps.clinics.factories import ServiceFactory, SubsidiaryFactory
-from apps.clinics.models import ServiceToSubsidiary, Service
+from apps.clinics.factories import ServiceFactory, ServicePriceFactory, SubsidiaryFactory
+from apps.clinics.models import ServicePrice, ServiceToSubsidiary, Service
 from apps.clinics.serializers import ServiceSerializer
 
 
@@ -50,3 +50,15 @@ class OneServiceViewTests(APITestCase):
         ]
 
         self.assertEqual(expected, response.json())
+
+    def test_get__etag_follows_prices(self):
+        price = ServicePriceFactory(service=self.service, price='100')
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        # у цен нет modified - изменение видно только по хэшу колонок
+        ServicePrice.objects.filter(pk=price.pk).update(price='200')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
@@ -26,6 +26,7 @@ class OneSubsidiaryViewTest(APITestCase):
             "short_address": subsidiary.short_address,
             "primary_image": None,
             "picture": None,
+            "primary_image_variants": {},
             "images": list(subsidiary.images.all()),
             "contacts": self.__contacts_to_dict_list(list(subsidiary.contacts.all())),
             "workdays": self.__workdays_to_dict_list(list(subsidiary.workdays.all())),
@@ -80,3 +81,14 @@ class OneSubsidiaryViewTest(APITestCase):
 
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(self.__subsidiary_to_dict(subsidiary_workday.subsidiary), response.json())
+
+    def test_get__last_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        last_modified, etag = response['Last-Modified'], response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
@@ -0,0 +1,50 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.clinics.models import Service
+
+
+class ServiceTreeViewTest(APITestCase):
+    url = reverse('api.v1:service_tree')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.root = Service.objects.create(title='root', description='root')
+        cls.child = Service.objects.create(title='child', description='child', parent=cls.root)
+
+    def test_url(self):
+        self.assertEqual(self.url, '/api/v1/services/tree')
+
+    def test_tree(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['id'], self.root.id)
+        self.assertEqual(
+            response.data[0]['children'],
+            [
+                {
+                    'id': self.child.id,
+                    'title': 'child',
+                    'description': 'child',
+                    'level': 1,
+                    'parent_id': self.root.id,
+                    'priority': self.child.priority,
+                    'is_visible_for_appointments': self.child.is_visible_for_appointments,
+                    'children': [],
+                }
+            ],
+        )
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.child.title = 'renamed'
+        self.child.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
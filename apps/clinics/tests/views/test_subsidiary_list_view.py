@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -24,6 +26,7 @@ class SubsidiaryListViewTest(APITestCase):
             "short_address": subsidiary.short_address,
             "primary_image": None,
             "picture": None,
+            "primary_image_variants": {},
             "contacts": self.__contacts_to_dict_list(list(subsidiary.contacts.all())),
             "workdays": self.__workdays_to_dict_list(list(subsidiary.workdays.all())),
             "latitude": subsidiary.latitude,
@@ -99,3 +102,45 @@ class SubsidiaryListViewTest(APITestCase):
         self.assertNotIn(hidden.id, id_values)
         self.assertNotIn(removed_and_hidden.id, id_values)
         self.assertEqual([self.__subsidiary_to_dict(self.subsidiary, add_images=False)], data)
+
+    def test_get__etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        response = self.client.get(self.url, {'limit': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_get__etag__changed_after_new_contact(self):
+        etag = self.client.get(self.url)['ETag']
+        SubsidiaryContactFactory(subsidiary=self.subsidiary)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+
+    def test_get__etag__changed_after_hiding(self):
+        other = SubsidiaryFactory()
+        etag = self.client.get(self.url)['ETag']
+        other.mark_hidden()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_get__constant_query_count(self):
+        with CaptureQueriesContext(connection) as single_context:
+            self.client.get(self.url)
+
+        for _ in range(3):
+            SubsidiaryContactFactory()
+            SubsidiaryWorkdayFactory()
+
+        with CaptureQueriesContext(connection) as many_context:
+            response = self.client.get(self.url)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(len(response.json()['results']), 7)
+        self.assertEqual(len(single_context), len(many_context))
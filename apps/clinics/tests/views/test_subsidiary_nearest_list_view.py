@@ -0,0 +1,61 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.clinics.factories import SubsidiaryFactory
+
+
+class SubsidiaryNearestListViewTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse('api.v1:subsidiary_nearest_list')
+        cls.moscow = SubsidiaryFactory(latitude='55.755800', longitude='37.617300')
+        cls.spb = SubsidiaryFactory(latitude='59.934300', longitude='30.335100')
+        cls.kazan = SubsidiaryFactory(latitude='55.796100', longitude='49.106100')
+        cls.without_coords = SubsidiaryFactory()
+
+    def test_url(self):
+        self.assertEqual(self.url, '/api/v1/subsidiaries/nearest')
+
+    def test_get__ordered_by_distance(self):
+        response = self.client.get(self.url, {'latitude': '55.7', 'longitude': '37.6'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        data = response.json()
+        self.assertEqual(
+            [item['id'] for item in data], [self.moscow.id, self.spb.id, self.kazan.id]
+        )
+        distances = [item['distance_km'] for item in data]
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(distances[1], 637, delta=1)
+
+    def test_get__limit(self):
+        response = self.client.get(self.url, {'latitude': '59.9', 'longitude': '30.3', 'limit': 1})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([item['id'] for item in response.json()], [self.spb.id])
+
+    def test_get__hidden_subsidiary_excluded(self):
+        self.moscow.mark_hidden()
+
+        response = self.client.get(self.url, {'latitude': '55.7', 'longitude': '37.6'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([item['id'] for item in response.json()], [self.spb.id, self.kazan.id])
+
+    def test_get__moved_subsidiary(self):
+        self.kazan.latitude, self.kazan.longitude = '55.710000', '37.610000'
+        self.kazan.save()
+
+        response = self.client.get(self.url, {'latitude': '55.7', 'longitude': '37.6', 'limit': 1})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([item['id'] for item in response.json()], [self.kazan.id])
+
+    def test_get__without_coordinates(self):
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_get__bad_latitude(self):
+        response = self.client.get(self.url, {'latitude': '91', 'longitude': '37.6'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
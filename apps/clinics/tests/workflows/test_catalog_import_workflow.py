@@ -0,0 +1,182 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.clinics.exceptions import CatalogImportError
+from apps.clinics.factories import DoctorFactory, ServiceFactory, SubsidiaryFactory
+from apps.clinics.models import (
+    Service,
+    ServicePrice,
+    ServiceToSubsidiary,
+    DoctorToService,
+    DoctorToSubsidiary,
+)
+from apps.clinics.workflows import CatalogImportWorkflow
+
+
+class CatalogImportWorkflowTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.subsidiary_1 = SubsidiaryFactory()
+        cls.subsidiary_2 = SubsidiaryFactory()
+        cls.doctor = DoctorFactory()
+
+    def _get_catalog(self):
+        return {
+            'services': [
+                {
+                    'title': 'Therapy',
+                    'priority': 2,
+                    'subsidiary_ids': [self.subsidiary_1.id, self.subsidiary_2.id],
+                    'prices': [
+                        {'title': 'first visit', 'price': '1000', 'code': 'T1'},
+                        {'title': 'second visit', 'price': '800'},
+                    ],
+                },
+                {'title': 'Checkup', 'parent_slug': 'therapy', 'subsidiary_ids': []},
+                {'title': 'Checkup', 'parent_slug': 'therapy'},
+                {'slug': 'surgery', 'title': 'Surgery'},
+            ],
+            'doctors': [
+                {
+                    'id': self.doctor.id,
+                    'service_slugs': ['therapy', 'checkup'],
+                    'subsidiary_ids': [self.subsidiary_1.id],
+                }
+            ],
+        }
+
+    def _get_explicit_catalog(self):
+        """
+        Тот же каталог со slug'ами, присвоенными при первом импорте - для повторных импортов
+        """
+        catalog = self._get_catalog()
+        for item, slug in zip(catalog['services'], ('therapy', 'checkup', 'checkup_1', 'surgery')):
+            item['slug'] = slug
+        return catalog
+
+    def test_import_catalog__create(self):
+        result = CatalogImportWorkflow.import_catalog(self._get_catalog())
+
+        self.assertEqual(4, result['services_created'])
+        self.assertEqual(2, result['prices_created'])
+        therapy = Service.objects.get(slug='therapy')
+        self.assertEqual(2, therapy.priority)
+        self.assertEqual(
+            ['checkup', 'checkup_1'], sorted(therapy.get_children().values_list('slug', flat=True)),
+        )
+        self.assertEqual(
+            ['therapy', 'checkup', 'checkup_1', 'surgery'],
+            list(Service.objects.values_list('slug', flat=True)),
+        )
+        self.assertEqual((0, 1, 6), (therapy.level, therapy.lft, therapy.rght))
+        self.assertEqual(
+            {'1000', '800'},
+            set(ServicePrice.objects.filter(service=therapy).values_list('price', flat=True)),
+        )
+        self.assertEqual(2, ServiceToSubsidiary.objects.filter(service=therapy).count())
+        self.assertEqual(
+            {'therapy', 'checkup'},
+            set(
+                DoctorToService.objects.filter(doctor=self.doctor).values_list(
+                    'service__slug', flat=True
+                )
+            ),
+        )
+        self.assertTrue(
+            DoctorToSubsidiary.objects.filter(
+                doctor=self.doctor, subsidiary=self.subsidiary_1
+            ).exists()
+        )
+
+    def test_import_catalog__reimport_is_idempotent(self):
+        CatalogImportWorkflow.import_catalog(self._get_catalog())
+
+        result = CatalogImportWorkflow.import_catalog(self._get_explicit_catalog())
+
+        self.assertEqual(
+            {
+                'services_created': 0,
+                'services_updated': 0,
+                'prices_created': 0,
+                'prices_updated': 0,
+                'prices_deleted': 0,
+                'links_created': 0,
+                'links_deleted': 0,
+            },
+            result,
+        )
+        self.assertEqual(4, Service.objects.count())
+
+    def test_import_catalog__diff(self):
+        CatalogImportWorkflow.import_catalog(self._get_catalog())
+        catalog = self._get_explicit_catalog()
+        catalog['services'][0]['subsidiary_ids'] = [self.subsidiary_2.id]
+        catalog['services'][0]['prices'] = [
+            {'title': 'first visit (new)', 'price': '1200', 'code': 'T1'}
+        ]
+        catalog['services'][3]['parent_slug'] = 'therapy'
+
+        result = CatalogImportWorkflow.import_catalog(catalog)
+
+        self.assertEqual(1, result['services_updated'])
+        self.assertEqual((1, 1), (result['prices_updated'], result['prices_deleted']))
+        self.assertEqual(1, result['links_deleted'])
+        price = ServicePrice.objects.get(code='T1')
+        self.assertEqual(('first visit (new)', '1200'), (price.title, price.price))
+        surgery = Service.objects.get(slug='surgery')
+        self.assertEqual(('therapy', 1), (surgery.parent.slug, surgery.level))
+
+    def _count_import_queries(self, size: int, prefix: str) -> int:
+        catalog = {
+            'services': [
+                {
+                    'title': f'{prefix} {i}',
+                    'subsidiary_ids': [self.subsidiary_1.id],
+                    'prices': [{'title': 'visit', 'price': str(i)}],
+                }
+                for i in range(size)
+            ]
+        }
+        with CaptureQueriesContext(connection) as context:
+            CatalogImportWorkflow.import_catalog(catalog)
+        return len(context.captured_queries)
+
+    def test_import_catalog__query_count_does_not_depend_on_size(self):
+        self.assertEqual(
+            self._count_import_queries(2, 'small'), self._count_import_queries(30, 'large')
+        )
+
+    def test_import_catalog__unknown_references(self):
+        catalog = {
+            'services': [{'title': 'Orphan', 'parent_slug': 'missing'}],
+            'doctors': [{'id': self.doctor.id + 1000, 'service_slugs': ['missing']}],
+        }
+
+        with self.assertRaises(CatalogImportError) as context:
+            CatalogImportWorkflow.import_catalog(catalog)
+
+        self.assertEqual(3, len(context.exception.details))
+        self.assertFalse(Service.objects.exists())
+
+    def test_import_catalog__derived_slug_collision(self):
+        service = ServiceFactory(title='Therapy', slug='therapy', priority=7)
+
+        with self.assertRaises(CatalogImportError) as context:
+            CatalogImportWorkflow.import_catalog(
+                {'services': [{'title': 'Therapy', 'priority': 1}]}
+            )
+
+        self.assertEqual(1, len(context.exception.details))
+        service.refresh_from_db()
+        self.assertEqual(7, service.priority)
+
+    def test_import_catalog__duplicate_prices_deleted(self):
+        CatalogImportWorkflow.import_catalog(self._get_catalog())
+        therapy = Service.objects.get(slug='therapy')
+        ServicePrice.objects.create(service=therapy, title='copy', price='1000', code='T1')
+
+        result = CatalogImportWorkflow.import_catalog(self._get_explicit_catalog())
+
+        self.assertEqual(1, result['prices_deleted'])
+        self.assertEqual(1, ServicePrice.objects.filter(service=therapy, code='T1').count())
@@ -0,0 +1,31 @@
+from django.test import TestCase
+
+from apps.clinics.factories import PatientFactory
+from apps.clinics.workflows import PatientWorkflow
+from apps.profiles.models import ProfileGroup, ProfileToGroup
+
+
+class MergePatientsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient_from = PatientFactory()
+        cls.patient_to = PatientFactory()
+        cls.moved_group = ProfileGroup.objects.create(title='moved')
+        cls.shared_group = ProfileGroup.objects.create(title='shared')
+
+    def test_move_profile_groups(self):
+        profile_from, profile_to = self.patient_from.profile, self.patient_to.profile
+        ProfileToGroup.objects.create(profile=profile_from, group=self.moved_group)
+        ProfileToGroup.objects.create(profile=profile_from, group=self.shared_group)
+        ProfileToGroup.objects.create(profile=profile_to, group=self.shared_group)
+
+        PatientWorkflow.merge_patients(self.patient_from, self.patient_to, move_profile_groups=True)
+
+        self.assertEqual(
+            {self.moved_group.id, self.shared_group.id},
+            set(profile_to.groups.values_list('id', flat=True)),
+        )
+        # из групп, где profile_to уже был, profile_from не убирается
+        self.assertEqual(
+            [self.shared_group.id], list(profile_from.groups.values_list('id', flat=True))
+        )
@@ -0,0 +1,76 @@
+from datetime import date
+
+from django.test import TestCase
+
+from apps.clinics.exceptions import RelatedPatientCreateError
+from apps.clinics.factories import PatientFactory
+from apps.clinics.workflows import RelatedPatientsWorkflow
+from apps.profiles.constants import Gender, RelationType
+from apps.profiles.models import ProfileGroup, ProfileToGroup, Relation
+
+
+class CreateRelatedPatientsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.master_patient = PatientFactory()
+        cls.group = ProfileGroup.objects.create(title='family import')
+
+    def _get_patient_data(self, first_name: str, **kwargs):
+        data = {
+            'last_name': 'Ivanov',
+            'first_name': first_name,
+            'patronymic': 'Petrovich',
+            'birth_date': date(2015, 1, 1),
+            'gender': Gender.MAN,
+            'type': RelationType.CHILD,
+        }
+        data.update(kwargs)
+        return data
+
+    def test_bulk_create(self):
+        patients_data = [self._get_patient_data(f'Child {number}') for number in range(10)]
+
+        with self.assertNumQueries(8):
+            created = RelatedPatientsWorkflow.create_related_patients(
+                self.master_patient.profile, patients_data, group_ids=[self.group.id]
+            )
+
+        self.assertEqual(len(created), 10)
+        relation, patient = created[0]
+        self.assertIsNotNone(relation.pk)
+        self.assertEqual(relation.slave_id, patient.profile_id)
+        self.assertEqual(patient.profile.full_name, 'Ivanov Child 0 Petrovich')
+        self.assertFalse(patient.is_confirmed)
+        self.assertEqual(
+            Relation.objects.filter(
+                master=self.master_patient.profile, can_update_slave_appointments=True
+            ).count(),
+            10,
+        )
+        self.assertEqual(ProfileToGroup.objects.filter(group=self.group).count(), 10)
+
+    def test_duplicates_skipped(self):
+        RelatedPatientsWorkflow.create_related_patients(
+            self.master_patient.profile, [self._get_patient_data('Anna')]
+        )
+
+        created = RelatedPatientsWorkflow.create_related_patients(
+            self.master_patient.profile,
+            [
+                self._get_patient_data('Anna'),
+                self._get_patient_data('Maria'),
+                self._get_patient_data('Maria'),
+            ],
+        )
+
+        self.assertEqual([patient.profile.first_name for _, patient in created], ['Maria'])
+
+    def test_create_related_patient_duplicate(self):
+        RelatedPatientsWorkflow.create_related_patient(
+            self.master_patient, self._get_patient_data('Anna')
+        )
+
+        with self.assertRaises(RelatedPatientCreateError):
+            RelatedPatientsWorkflow.create_related_patient(
+                self.master_patient, self._get_patient_data('Anna')
+            )
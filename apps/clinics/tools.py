@@ -3,7 +3,6 @@ import random
 from datetime import timedelta
 from typing import Optional, List
 
-from constance import config as constance_config
 from django.conf import settings
 from django.core.mail import send_mail
 from django.utils import timezone
@@ -12,6 +11,7 @@ from apps.appointments.factories import _generate_valid_time_slot_start_end, Tim
 from apps.clinics.factories import SubsidiaryFactory
 from apps.clinics.models import Doctor, Patient
 from apps.core.admin import get_change_url
+from apps.core.config import runtime_config
 from apps.core.utils import make_absolute_url
 
 
@@ -34,7 +34,7 @@ def create_random_month_slots_for_doctor(doctor: Doctor):
 
 
 def send_email_about_merged_patients(parient_from, patient_to, actor: Optional[str] = None):
-    emails_str: str = constance_config.PATIENT_INTEGRATION_UPDATE_EMAILS
+    emails_str: str = runtime_config.PATIENT_INTEGRATION_UPDATE_EMAILS
     if not emails_str:
         return
     emails: List[str] = emails_str.split(" ")
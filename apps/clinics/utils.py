@@ -1,9 +1,10 @@
-from typing import List
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
 
 from rest_framework.views import APIView
 
 from apps.clinics.models import Patient
-from apps.profiles.models import User
+from apps.profiles.models import Relation, User, UserToProfile
 from apps.profiles.permissions import IsPatient
 
 
@@ -33,6 +34,36 @@ class PatientUtils:
         user_ids = User.objects.filter(profile__id__in=profile_ids).values_list('id', flat=True)
         return list(user_ids)
 
+    @classmethod
+    def get_user_ids_to_notify_by_profile(cls, profile_ids: Iterable[int]) -> Dict[int, Set[int]]:
+        """
+        Для пачки профилей пациентов: пользователь самого профиля (как `profile.user`)
+        и пользователи основных профилей (как `get_master_user_ids`), двумя запросами
+        :return: {profile_id: {user_id, ...}}
+        """
+        profile_ids = set(profile_ids)
+        user_ids: Dict[int, Set[int]] = defaultdict(set)
+
+        own_links = (
+            UserToProfile.objects.filter(profile_id__in=profile_ids)
+            .order_by('profile_id', 'id')
+            .values_list('profile_id', 'user_id')
+        )
+        for profile_id, user_id in own_links:
+            if profile_id not in user_ids:
+                user_ids[profile_id].add(user_id)
+
+        master_links = Relation.objects.filter(
+            slave_id__in=profile_ids,
+            can_update_slave_appointments=True,
+            master_id__in=Patient.objects.values('profile_id'),
+            master__users__isnull=False,
+        ).values_list('slave_id', 'master__users')
+        for profile_id, user_id in master_links:
+            user_ids[profile_id].add(user_id)
+
+        return dict(user_ids)
+
 
 class PatientAPIViewMixin(APIView):
     permission_classes = (IsPatient,)
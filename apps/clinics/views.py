@@ -1,5 +1,7 @@
-from constance import config
+from typing import Optional
+
 from django.conf import settings
+from django.db.models import Count, Max
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status, permissions
 from rest_framework.generics import (
@@ -12,10 +14,12 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.clinics.constants import I_NEED_CONSULTATION
+from apps.appointments.selectors import TimeSlots
+from apps.clinics.constants import I_NEED_CONSULTATION, WITH_NEXT_FREE_SLOT
 from apps.clinics.filter_serializers import (
     DoctorListFilterParamsSerializer,
     ServiceListFilterParamsSerializer,
+    SubsidiaryNearestFilterParamsSerializer,
 )
 from apps.clinics.models import ClinicImage, Patient
 from apps.clinics.models import Promotion
@@ -26,12 +30,15 @@ from apps.clinics.selectors import (
     SubsidiarySelector,
     ServiceSelector,
     PatientSelector,
+    PromotionSelector,
 )
 from apps.clinics.serializers import (
     SubsidiarySerializer,
     SubsidiaryListSerializer,
+    SubsidiaryNearestSerializer,
     DoctorListSerializer,
     ServiceSerializer,
+    ServiceTreeSerializer,
     PromotionSerializer,
     PromotionFilterSerializer,
     ClinicInfoSerializer,
@@ -41,30 +48,71 @@ from apps.clinics.serializers import (
 )
 from apps.clinics.utils import PatientAPIViewMixin
 from apps.clinics.workflows import RelatedPatientsWorkflow
+from apps.core.config import runtime_config
+from apps.core.constants import MODIFIED
+from apps.core.views import ConditionalGetMixin, SparseFieldsetMixin
 from apps.profiles.models import Relation
 from apps.profiles.permissions import IsPatient
 
 
-class DoctorListView(ListAPIView):
+class DoctorListView(ConditionalGetMixin, SparseFieldsetMixin, ListAPIView):
     """
     Список врачей
 
     Получить всех неудаленных `is_removed=False` И видимых `is_displayed=True` врачей.
     Фильтрация через параметры `?service_ids=2&service_ids=12&subsidiary_ids=55`
+    Сортировка по ближайшему филиалу: `?latitude=55.75&longitude=37.61`
+    Ближайший свободный талон каждого врача (`next_free_slot_start`): `?with_next_free_slot=true`
+    Только нужные поля: `?fields=id,full_name,picture`
     """
 
     serializer_class = DoctorListSerializer
     pagination_class = DoctorPagination
+    conditional_related_lookups = (
+        'profile',
+        'review',
+        'services',
+        'subsidiaries',
+        # окна 30/90 дней сдвигаются ночной сверкой без изменения отзывов
+        'review_stats',
+    )
 
-    def get_queryset(self):
-        query_params = self.request.query_params
-        filter_params_serializer = DoctorListFilterParamsSerializer(data=query_params)
-        filter_params_serializer.is_valid(raise_exception=True)
-        qs = DoctorSelector.visible_to_patient()
-        return DoctorSelector.filter_by_params(qs, **filter_params_serializer.validated_data)
+    # проверенные параметры фильтра: нужны и для ETag, и для основного запроса
+    _filter_params: Optional[dict] = None
 
+    def get_filter_params(self) -> dict:
+        if self._filter_params is None:
+            query_params = self.request.query_params
+            filter_params_serializer = DoctorListFilterParamsSerializer(data=query_params)
+            filter_params_serializer.is_valid(raise_exception=True)
+            self._filter_params = filter_params_serializer.validated_data
+        return self._filter_params
 
-class OneDoctorView(RetrieveAPIView):
+    def get_queryset(self):
+        qs = DoctorSelector.visible_to_patient().select_related('review_stats')
+        return DoctorSelector.filter_by_params(qs, **self.get_filter_params())
+
+    def get_conditional_state(self):
+        parts, last_modified = super().get_conditional_state()
+        if self.get_filter_params().get(WITH_NEXT_FREE_SLOT):
+            # ближайший талон меняется и без изменения данных - когда наступает его время.
+            # Только свободные будущие талоны (как в next_free_start): прошедший талон
+            # выпадает из количества, занятый или освобожденный - меняет его или modified
+            doctor_ids = self.get_conditional_queryset().order_by().values('pk')
+            state = (
+                TimeSlots.model.all_objects.free()
+                .future()
+                .filter(doctor_id__in=doctor_ids)
+                .aggregate(modified=Max(MODIFIED), count=Count('pk'))
+            )
+            parts.append(':'.join(f'{key}={value}' for key, value in sorted(state.items())))
+            modified = state['modified']
+            if modified and (last_modified is None or modified > last_modified):
+                last_modified = modified
+        return parts, last_modified
+
+
+class OneDoctorView(ConditionalGetMixin, SparseFieldsetMixin, RetrieveAPIView):
     """
     Получить информацию по одному доктору
     Если врач помечен как удаленный - будет 404
@@ -72,13 +120,20 @@ class OneDoctorView(RetrieveAPIView):
     """
 
     serializer_class = DoctorSerializer
+    # цены услуг отдаются только в карточке врача, список их не показывает
+    conditional_related_lookups = DoctorListView.conditional_related_lookups + ('services__prices',)
 
     def get_queryset(self):
         # return DoctorSelector.visible_to_patient()
-        return DoctorSelector.all().without_hidden()
+        return (
+            DoctorSelector.all()
+            .without_hidden()
+            .select_related('review_stats')
+            .prefetch_related(ServiceSelector.get_prices_prefetch('services__'))
+        )
 
 
-class SubsidiaryListView(ListAPIView):
+class SubsidiaryListView(ConditionalGetMixin, SparseFieldsetMixin, ListAPIView):
     """
     Список филиалов
 
@@ -86,21 +141,42 @@ class SubsidiaryListView(ListAPIView):
     """
 
     serializer_class = SubsidiaryListSerializer
+    conditional_related_lookups = ('contacts', 'workdays', 'images')
 
     def get_queryset(self):
         return SubsidiarySelector.visible_to_patient()
 
 
-class OneSubsidiaryView(RetrieveAPIView):
+class SubsidiaryNearestListView(ListAPIView):
+    """
+    Ближайшие филиалы
+
+    Видимые филиалы, отсортированные по расстоянию до точки
+    `?latitude=55.75&longitude=37.61&limit=5`
+    """
+
+    serializer_class = SubsidiaryNearestSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        filter_params_serializer = SubsidiaryNearestFilterParamsSerializer(
+            data=self.request.query_params
+        )
+        filter_params_serializer.is_valid(raise_exception=True)
+        return SubsidiarySelector.nearest(**filter_params_serializer.validated_data)
+
+
+class OneSubsidiaryView(ConditionalGetMixin, SparseFieldsetMixin, RetrieveAPIView):
     """ Позволяет получить информацию по одном филиале """
 
     serializer_class = SubsidiarySerializer
+    conditional_related_lookups = SubsidiaryListView.conditional_related_lookups
 
     def get_queryset(self):
         return SubsidiarySelector.visible_to_patient()
 
 
-class ServiceListView(ListAPIView):
+class ServiceListView(ConditionalGetMixin, SparseFieldsetMixin, ListAPIView):
     """
     Список услуг
 
@@ -113,6 +189,7 @@ class ServiceListView(ListAPIView):
     """
 
     serializer_class = ServiceSerializer
+    conditional_related_lookups = ('subsidiaries', 'prices', 'children')
 
     def get_queryset(self):
         query_params = self.request.query_params
@@ -126,45 +203,75 @@ class ServiceListView(ListAPIView):
         )
 
 
-class OneServiceView(RetrieveAPIView):
+class ServiceTreeView(ConditionalGetMixin, ListAPIView):
+    """
+    Дерево услуг
+
+    Все показываемые услуги одним ответом, вложенные в `children`.
+    Строится одним запросом и кэшируется до изменения любой услуги.
+    """
+
+    serializer_class = ServiceTreeSerializer
+    pagination_class = None
+
+    def get_conditional_state(self):
+        return [ServiceSelector.get_catalog_version()], None
+
+    def list(self, request, *args, **kwargs):
+        return Response(ServiceSelector.get_displayed_tree())
+
+
+class OneServiceView(ConditionalGetMixin, SparseFieldsetMixin, RetrieveAPIView):
     """
     Информация об отдельной услуге
     """
 
     serializer_class = ServiceSerializer
+    conditional_related_lookups = ServiceListView.conditional_related_lookups
 
     def get_queryset(self):
         return ServiceSelector().visible_to_patient()
 
 
-class PromotionListView(ListAPIView):
+class PromotionListView(ConditionalGetMixin, ListAPIView):
     """
     Список акций
 
+    Отдается из кэша показываемых акций (см. `PromotionSelector.get_active`)
+
     Параметры фильтрации:
     * ?subsidiary_ids=2&subsidiary_ids=3
     """
 
     serializer_class = PromotionSerializer
 
+    def get_conditional_state(self):
+        active = PromotionSelector.get_active()
+        return [active['version']], active['last_modified']
+
     def get_queryset(self):
         query_params = self.request.query_params
         filter_params_serializer = PromotionFilterSerializer(data=query_params)
         filter_params_serializer.is_valid(raise_exception=True)
-        data = filter_params_serializer.validated_data
+        subsidiary_ids = set(filter_params_serializer.validated_data.get('subsidiary_ids') or ())
 
-        qs = Promotion.objects.displayed()
-        if data and data['subsidiary_ids']:
-            qs = qs.filter(subsidiaries__id__in=data['subsidiary_ids'])
-        return qs
+        promotions = PromotionSelector.get_active()['promotions']
+        if subsidiary_ids:
+            promotions = [
+                promotion
+                for promotion in promotions
+                if subsidiary_ids.intersection(x.id for x in promotion.subsidiaries.all())
+            ]
+        return promotions
 
 
-class OnePromotionView(RetrieveAPIView):
+class OnePromotionView(ConditionalGetMixin, RetrieveAPIView):
     """
     Отдельная акция
     """
 
     serializer_class = PromotionSerializer
+    conditional_related_lookups = ('subsidiaries',)
 
     def get_queryset(self):
         return Promotion.objects.displayed()
@@ -178,7 +285,7 @@ class ClinicInfoView(APIView):
     def get(self, *args, **kwargs):
         data = {
             'images': ClinicImage.objects.all(),
-            'text': config.CLINIC_INFO_TEXT,
+            'text': runtime_config.CLINIC_INFO_TEXT,
             'empty_appointment_text': I_NEED_CONSULTATION,
         }
         serializer = ClinicInfoSerializer(instance=data)
@@ -1,15 +1,36 @@
 import logging
-from typing import List
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple, Type, Union
 
 from asgiref.sync import async_to_sync
 from django.db import transaction
+from django.db.models import Model
+from django.utils import timezone
 
-from apps.clinics.constants import INTEGRATION_DATA
-from apps.clinics.data_models import RelatedPatientCreateData, RelatedPatientUpdateData
-from apps.clinics.exceptions import RelatedPatientCreateError
-from apps.clinics.models import Patient
+from apps.clinics.constants import INTEGRATION_DATA, SERVICE_CATALOG_VERSION_CACHE_KEY
+from apps.clinics.data_models import (
+    RelatedPatientCreateData,
+    RelatedPatientUpdateData,
+    CatalogData,
+    CatalogServiceData,
+    CatalogDoctorData,
+    CatalogPriceData,
+    CatalogImportResult,
+)
+from apps.clinics.exceptions import RelatedPatientCreateError, CatalogImportError
+from apps.clinics.models import (
+    Patient,
+    Doctor,
+    Subsidiary,
+    Service,
+    ServicePrice,
+    ServiceToSubsidiary,
+    DoctorToService,
+    DoctorToSubsidiary,
+)
 from apps.clinics.selectors import PatientSelector
 from apps.clinics.tools import send_email_about_merged_patients
+from apps.core.cache_utils import bump_cache_version, invalidate_on_commit
 from apps.integration.constants import PatientItemDict, MIS_SUBSIDIARY_ID, EXTRA_SUBSIDIARY_INFO
 from apps.integration.get_workflow import get_integration_workflow
 from apps.profiles.constants import (
@@ -20,7 +41,7 @@ from apps.profiles.constants import (
     BIRTH_DATE,
     GENDER,
 )
-from apps.profiles.models import ProfileGroup, Relation, Profile
+from apps.profiles.models import ProfileGroup, ProfileToGroup, Relation, Profile
 
 
 class PatientWorkflow:
@@ -59,13 +80,18 @@ class PatientWorkflow:
         if move_profile_groups:
             profile_from = patient_from.profile
             profile_to = patient_to.profile
-            groups_from = profile_from.groups.all()
-            for g in groups_from:
-                g: ProfileGroup
-                if profile_to not in g.profiles.all():
-                    g.profiles.add(profile_to)
-                    g.profiles.remove(profile_from)
-                    g.save()
+            group_ids = set(profile_from.groups.values_list('id', flat=True))
+            # как раньше: из групп, где profile_to уже состоит, profile_from не убираем
+            group_ids -= set(
+                ProfileToGroup.objects.filter(
+                    profile=profile_to, group_id__in=group_ids
+                ).values_list('group_id', flat=True)
+            )
+            ProfileToGroup.objects.link_many(
+                [ProfileToGroup(profile=profile_to, group_id=group_id) for group_id in group_ids]
+            )
+            ProfileToGroup.objects.filter(profile=profile_from, group_id__in=group_ids).delete()
+            ProfileGroup.objects.filter(id__in=group_ids).update(modified=timezone.now())
 
         if delete_patient_from is True:
             patient_from.is_confirmed = False
@@ -120,41 +146,91 @@ class PatientWorkflow:
 
 
 class RelatedPatientsWorkflow:
+    PERSONAL_DATA_FIELDS = (LAST_NAME, FIRST_NAME, PATRONYMIC, BIRTH_DATE, GENDER)
+
     @classmethod
-    @transaction.atomic
     def create_related_patient(
         cls, author_patient: Patient, new_patient_data: RelatedPatientCreateData
     ) -> (Relation, Patient):
-        # existing_slave_relations = PatientSelector.get_slave_relations(patient=author_patient)
-        existing_slave_patients = PatientSelector.get_slave_related_patients(patient=author_patient)
-
-        if existing_slave_patients.filter(
-            profile__last_name=new_patient_data['last_name'],
-            profile__first_name=new_patient_data['first_name'],
-            profile__patronymic=new_patient_data['patronymic'],
-            profile__birth_date=new_patient_data['birth_date'],
-            profile__gender=new_patient_data['gender'],
-        ).exists():
+        created = cls.create_related_patients(author_patient.profile, [new_patient_data])
+        if not created:
             raise RelatedPatientCreateError(
                 "Такой пациент уже есть среди ваших связанных пациентов"
             )
+        return created[0]
 
-        new_profile = Profile.objects.create(
-            last_name=new_patient_data['last_name'],
-            first_name=new_patient_data['first_name'],
-            patronymic=new_patient_data['patronymic'],
-            birth_date=new_patient_data['birth_date'],
-            gender=new_patient_data['gender'],
-            type=ProfileType.PATIENT,
-        )
-        new_patient = Patient.objects.create(profile=new_profile, is_confirmed=False)
-        new_relation = Relation.objects.create(
-            master=author_patient.profile,
-            slave=new_profile,
-            can_update_slave_appointments=True,
-            type=new_patient_data['type'],
-        )
-        return new_relation, new_patient
+    @classmethod
+    def create_related_patients(
+        cls,
+        master_profile: Profile,
+        patients_data: Iterable[RelatedPatientCreateData],
+        group_ids: Iterable[int] = (),
+    ) -> List[Tuple[Relation, Patient]]:
+        """
+        Связанные (зависимые) пациенты профиля `master_profile` пачкой - для импорта семей
+        из МИС и при подключении клиники.
+
+        Профили, пациенты и отношения создаются через bulk_create, связи с группами
+        `group_ids` - `link_many` (ON CONFLICT DO NOTHING), все в одной транзакции.
+        Пациенты, совпадающие по персональным данным с уже связанными или с предыдущими
+        в `patients_data`, пропускаются.
+        """
+        group_ids = list(group_ids)
+        with transaction.atomic():
+            known_keys = set(
+                PatientSelector.all()
+                .filter(
+                    profile__slave_relations__master=master_profile,
+                    profile__slave_relations__can_update_slave_appointments=True,
+                )
+                .values_list(*(f'profile__{field}' for field in cls.PERSONAL_DATA_FIELDS))
+            )
+            new_patients_data = []
+            for data in patients_data:
+                key = tuple(data[field] for field in cls.PERSONAL_DATA_FIELDS)
+                if key not in known_keys:
+                    known_keys.add(key)
+                    new_patients_data.append(data)
+            if not new_patients_data:
+                return []
+
+            profiles = []
+            for data in new_patients_data:
+                profile = Profile(
+                    type=ProfileType.PATIENT,
+                    **{field: data[field] for field in cls.PERSONAL_DATA_FIELDS},
+                )
+                # bulk_create не вызывает Profile.save
+                profile.update_full_name()
+                profiles.append(profile)
+            Profile.objects.bulk_create(profiles)
+
+            patients = Patient.objects.bulk_create(
+                [Patient(profile=profile, is_confirmed=False) for profile in profiles]
+            )
+            # зависимые профили только что созданы - конфликтов по (master, slave) быть не может,
+            # а pk отношений нужны вызывающему коду
+            relations = Relation.objects.bulk_create(
+                [
+                    Relation(
+                        master=master_profile,
+                        slave=profile,
+                        can_update_slave_appointments=True,
+                        type=data['type'],
+                    )
+                    for profile, data in zip(profiles, new_patients_data)
+                ]
+            )
+            if group_ids:
+                ProfileToGroup.objects.link_many(
+                    [
+                        ProfileToGroup(profile=profile, group_id=group_id)
+                        for profile in profiles
+                        for group_id in group_ids
+                    ]
+                )
+                ProfileGroup.objects.filter(id__in=group_ids).update(modified=timezone.now())
+        return list(zip(relations, patients))
 
     @classmethod
     @transaction.atomic
@@ -187,3 +263,358 @@ class RelatedPatientsWorkflow:
         patient = slave_profile.patient
 
         return relation, patient
+
+
+class CatalogImportWorkflow:
+    """
+    Импорт каталога (услуги, цены, связи врачей и услуг с филиалами) одним документом.
+
+    Документ сравнивается с БД за фиксированное число запросов, не зависящее от размера
+    каталога: slug'и новых услуг подбираются в памяти по уже занятым, услуги и цены
+    пишутся через bulk_create/bulk_update, связи - `link_many` (ON CONFLICT DO NOTHING),
+    поля дерева MPTT пересчитываются один раз в конце.
+
+    Ключ услуги - явно заданный slug. Если slug не задан, услуга считается новой: slug
+    строится из title так же, как в `Service.get_slug`, а совпадение построенного slug'а
+    с уже существующей услугой - ошибка документа (чужую услугу не перезаписываем).
+    Услуги, цены и врачи, которых нет в документе, не удаляются.
+    """
+
+    SERVICE_FIELDS = (
+        'title',
+        'description',
+        'priority',
+        'is_displayed',
+        'is_visible_for_appointments',
+    )
+    PRICE_FIELDS = ('title', 'price', 'code', 'priority', 'is_displayed')
+    TREE_FIELDS = ('tree_id', 'lft', 'rght', 'level')
+
+    @classmethod
+    def import_catalog(cls, data: CatalogData) -> CatalogImportResult:
+        services_data: List[CatalogServiceData] = data.get('services') or []
+        doctors_data: List[CatalogDoctorData] = data.get('doctors') or []
+        result = CatalogImportResult(
+            services_created=0,
+            services_updated=0,
+            prices_created=0,
+            prices_updated=0,
+            prices_deleted=0,
+            links_created=0,
+            links_deleted=0,
+        )
+
+        with transaction.atomic():
+            rows = {
+                row['id']: row
+                for row in Service.objects.order_by().values(
+                    'id', 'slug', 'parent_id', *cls.SERVICE_FIELDS, *cls.TREE_FIELDS
+                )
+            }
+            id_by_slug = {row['slug']: pk for pk, row in rows.items() if row['slug']}
+            slugs = cls._resolve_slugs(services_data)
+            cls._validate(services_data, doctors_data, slugs, id_by_slug)
+
+            cls._import_services(services_data, slugs, rows, id_by_slug, result)
+            cls._import_prices(services_data, slugs, id_by_slug, result)
+
+            cls._sync_links(
+                ServiceToSubsidiary,
+                'service_id',
+                'subsidiary_id',
+                {
+                    id_by_slug[slug]: set(item['subsidiary_ids'])
+                    for item, slug in zip(services_data, slugs)
+                    if item.get('subsidiary_ids') is not None
+                },
+                result,
+            )
+            cls._sync_links(
+                DoctorToService,
+                'doctor_id',
+                'service_id',
+                {
+                    item['id']: {id_by_slug[slug] for slug in item['service_slugs']}
+                    for item in doctors_data
+                    if item.get('service_slugs') is not None
+                },
+                result,
+            )
+            cls._sync_links(
+                DoctorToSubsidiary,
+                'doctor_id',
+                'subsidiary_id',
+                {
+                    item['id']: set(item['subsidiary_ids'])
+                    for item in doctors_data
+                    if item.get('subsidiary_ids') is not None
+                },
+                result,
+            )
+
+        # bulk-операции не вызывают Service.save()
+        invalidate_on_commit(bump_cache_version, SERVICE_CATALOG_VERSION_CACHE_KEY)
+        return result
+
+    @staticmethod
+    def _resolve_slugs(services_data: List[CatalogServiceData]) -> List[str]:
+        """
+        slug для каждой услуги документа. Явно заданные slug'и не переиспользуются
+        для построенных из title; повторы title получают постфикс, как в `Service.get_slug`
+        """
+        explicit = {item['slug'] for item in services_data if item.get('slug')}
+        claimed = set()
+        slugs = []
+        for item in services_data:
+            slug = item.get('slug')
+            if not slug:
+                postfix_number = 0
+                slug = Service.build_slug(item.get('title') or '')
+                while slug in claimed or slug in explicit:
+                    postfix_number += 1
+                    slug = Service.build_slug(item.get('title') or '', postfix_number)
+                claimed.add(slug)
+            slugs.append(slug)
+        return slugs
+
+    @classmethod
+    def _validate(
+        cls,
+        services_data: List[CatalogServiceData],
+        doctors_data: List[CatalogDoctorData],
+        slugs: List[str],
+        id_by_slug: Dict[str, int],
+    ) -> None:
+        errors = []
+        known_slugs = set(id_by_slug) | set(slugs)
+
+        duplicated_slugs = {slug for slug, count in Counter(slugs).items() if count > 1}
+        if duplicated_slugs:
+            errors.append(f'Повторяющиеся slug услуг: {sorted(duplicated_slugs)}')
+
+        subsidiary_ids = set()
+        for item, slug in zip(services_data, slugs):
+            if not item.get('title'):
+                errors.append(f'Услуга {slug!r}: не задано название')
+            if not item.get('slug') and slug in id_by_slug:
+                errors.append(
+                    f'Услуга {item.get("title")!r}: slug {slug!r} уже занят существующей '
+                    f'услугой, для обновления укажите slug явно'
+                )
+            parent_slug = item.get('parent_slug')
+            if parent_slug and parent_slug not in known_slugs:
+                errors.append(f'Услуга {slug!r}: неизвестная родительская услуга {parent_slug!r}')
+            price_keys = [cls._get_price_key(price) for price in item.get('prices') or []]
+            if len(price_keys) != len(set(price_keys)):
+                errors.append(f'Услуга {slug!r}: повторяющиеся цены (code/title)')
+            subsidiary_ids.update(item.get('subsidiary_ids') or [])
+
+        for item in doctors_data:
+            unknown_slugs = set(item.get('service_slugs') or []) - known_slugs
+            if unknown_slugs:
+                errors.append(f'Врач {item["id"]}: неизвестные услуги {sorted(unknown_slugs)}')
+            subsidiary_ids.update(item.get('subsidiary_ids') or [])
+
+        doctor_ids = {item['id'] for item in doctors_data}
+        unknown_doctor_ids = doctor_ids - set(
+            Doctor.objects.filter(id__in=doctor_ids).values_list('id', flat=True)
+        )
+        if unknown_doctor_ids:
+            errors.append(f'Неизвестные врачи: {sorted(unknown_doctor_ids)}')
+
+        unknown_subsidiary_ids = subsidiary_ids - set(
+            Subsidiary.objects.filter(id__in=subsidiary_ids).values_list('id', flat=True)
+        )
+        if unknown_subsidiary_ids:
+            errors.append(f'Неизвестные филиалы: {sorted(unknown_subsidiary_ids)}')
+
+        if errors:
+            raise CatalogImportError('Некорректный документ каталога', details=errors)
+
+    @classmethod
+    def _import_services(
+        cls,
+        services_data: List[CatalogServiceData],
+        slugs: List[str],
+        rows: Dict[int, dict],
+        id_by_slug: Dict[str, int],
+        result: CatalogImportResult,
+    ) -> None:
+        new_services = [
+            # поля дерева - заглушки, пересчитываются в _rebuild_tree
+            Service(slug=slug, tree_id=0, lft=0, rght=0, level=0, **cls._get_values(item))
+            for item, slug in zip(services_data, slugs)
+            if slug not in id_by_slug
+        ]
+        Service.objects.bulk_create(new_services)
+        for service in new_services:
+            id_by_slug[service.slug] = service.id
+            rows[service.id] = {
+                'id': service.id,
+                'slug': service.slug,
+                'parent_id': None,
+                **{field: getattr(service, field) for field in cls.SERVICE_FIELDS},
+                **{field: 0 for field in cls.TREE_FIELDS},
+            }
+        result['services_created'] = len(new_services)
+
+        now = timezone.now()
+        created_ids = {service.id for service in new_services}
+        changed_services = []
+        for item, slug in zip(services_data, slugs):
+            row = rows[id_by_slug[slug]]
+            values = cls._get_values(item)
+            if 'parent_slug' in item:
+                parent_slug = item['parent_slug']
+                values['parent_id'] = id_by_slug[parent_slug] if parent_slug else None
+            changed = {key: value for key, value in values.items() if row[key] != value}
+            if not changed:
+                continue
+            row.update(changed)
+            changed_services.append(
+                Service(
+                    id=row['id'],
+                    parent_id=row['parent_id'],
+                    modified=now,
+                    **{field: row[field] for field in cls.SERVICE_FIELDS},
+                )
+            )
+            if row['id'] not in created_ids:
+                result['services_updated'] += 1
+        Service.objects.bulk_update(
+            changed_services, fields=(*cls.SERVICE_FIELDS, 'parent', 'modified')
+        )
+
+        Service.objects.bulk_update(cls._rebuild_tree(rows), fields=cls.TREE_FIELDS)
+
+    @classmethod
+    def _get_values(cls, item: CatalogServiceData) -> dict:
+        return {field: item[field] for field in cls.SERVICE_FIELDS if field in item}
+
+    @classmethod
+    def _rebuild_tree(cls, rows: Dict[int, dict]) -> List[Service]:
+        """
+        Пересчет полей MPTT по parent_id в памяти - как `TreeManager.rebuild`, но без
+        запроса на каждый узел. Порядок узлов сохраняется, новые - в конце, по id.
+        :return: услуги с изменившимися полями дерева
+        """
+        children = defaultdict(list)
+        for row in rows.values():
+            children[row['parent_id']].append(row)
+
+        def order(row: dict) -> tuple:
+            return (0, row['tree_id'], row['lft']) if row['tree_id'] else (1, row['id'])
+
+        changed = []
+        visited = set()
+
+        def walk(row: dict, tree_id: int, left: int, level: int) -> int:
+            visited.add(row['id'])
+            right = left + 1
+            for child in sorted(children[row['id']], key=order):
+                right = walk(child, tree_id, right, level + 1) + 1
+            values = {'tree_id': tree_id, 'lft': left, 'rght': right, 'level': level}
+            if any(row[key] != value for key, value in values.items()):
+                row.update(values)
+                changed.append(Service(id=row['id'], **values))
+            return right
+
+        for tree_id, root in enumerate(sorted(children[None], key=order), start=1):
+            walk(root, tree_id, 1, 0)
+
+        if len(visited) != len(rows):
+            looped = sorted(rows[pk]['slug'] for pk in set(rows) - visited)
+            raise CatalogImportError(
+                'Некорректный документ каталога',
+                details=[f'Циклические связи родительских услуг: {looped}'],
+            )
+        return changed
+
+    @staticmethod
+    def _get_price_key(price: Union[CatalogPriceData, dict]) -> str:
+        return price.get('code') or price['title']
+
+    @classmethod
+    def _import_prices(
+        cls,
+        services_data: List[CatalogServiceData],
+        slugs: List[str],
+        id_by_slug: Dict[str, int],
+        result: CatalogImportResult,
+    ) -> None:
+        prices_by_service = {
+            id_by_slug[slug]: item['prices']
+            for item, slug in zip(services_data, slugs)
+            if item.get('prices') is not None
+        }
+        existing, duplicate_ids = {}, []
+        for row in (
+            ServicePrice.objects.filter(service_id__in=prices_by_service)
+            .order_by('id')
+            .values('id', 'service_id', *cls.PRICE_FIELDS)
+        ):
+            key = (row['service_id'], cls._get_price_key(row))
+            if key in existing:
+                # дубли по ключу: остается самая старая цена, остальные удаляются
+                duplicate_ids.append(row['id'])
+            else:
+                existing[key] = row
+
+        new_prices, changed_prices, actual_ids = [], [], set()
+        for service_id, prices in prices_by_service.items():
+            for price in prices:
+                values = {field: price[field] for field in cls.PRICE_FIELDS if field in price}
+                row = existing.get((service_id, cls._get_price_key(price)))
+                if row is None:
+                    new_prices.append(ServicePrice(service_id=service_id, **values))
+                    continue
+                actual_ids.add(row['id'])
+                changed = {key: value for key, value in values.items() if row[key] != value}
+                if changed:
+                    row.update(changed)
+                    changed_prices.append(
+                        ServicePrice(id=row['id'], **{f: row[f] for f in cls.PRICE_FIELDS})
+                    )
+        stale_ids = [row['id'] for row in existing.values() if row['id'] not in actual_ids]
+        stale_ids.extend(duplicate_ids)
+
+        ServicePrice.objects.bulk_create(new_prices)
+        ServicePrice.objects.bulk_update(changed_prices, fields=cls.PRICE_FIELDS)
+        ServicePrice.objects.filter(id__in=stale_ids).delete()
+        result['prices_created'] = len(new_prices)
+        result['prices_updated'] = len(changed_prices)
+        result['prices_deleted'] = len(stale_ids)
+
+    @staticmethod
+    def _sync_links(
+        model: Type[Model],  # связующая модель с LinkManager
+        owner_field: str,
+        target_field: str,
+        desired: Dict[int, Set[int]],
+        result: CatalogImportResult,
+    ) -> None:
+        """
+        Приводит связи владельцев из `desired` к заданному набору: недостающие создаются,
+        лишние (и дубли) удаляются
+        """
+        if not desired:
+            return
+        existing, stale_ids = set(), []
+        for pk, owner_id, target_id in model.objects.filter(
+            **{f'{owner_field}__in': desired}
+        ).values_list('pk', owner_field, target_field):
+            if target_id in desired[owner_id] and (owner_id, target_id) not in existing:
+                existing.add((owner_id, target_id))
+            else:
+                stale_ids.append(pk)
+
+        new_links = [
+            model(**{owner_field: owner_id, target_field: target_id})
+            for owner_id, target_ids in desired.items()
+            for target_id in target_ids
+            if (owner_id, target_id) not in existing
+        ]
+        model.objects.link_many(new_links)
+        model.objects.filter(pk__in=stale_ids).delete()
+        result['links_created'] += len(new_links)
+        result['links_deleted'] += len(stale_ids)
@@ -1,11 +1,17 @@
 from functools import partial
+from typing import Tuple
 
 from django import forms
 from django.conf import settings
 from django.contrib import admin
 from django.contrib.admin.checks import BaseModelAdminChecks
 from django.contrib.admin.templatetags.admin_urls import add_preserved_filters
+from django.contrib.admin.views.main import SEARCH_VAR
 from django.contrib.sites.models import Site
+from django.db.models import Case, FloatField, Func, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Greatest
+from django.forms.models import BaseInlineFormSet
 from django.http import HttpRequest
 from django.urls import reverse
 from django.utils.html import format_html
@@ -212,3 +218,119 @@ class DisplayableMPTTAdmin(
     DraggableMPTTAdmin, MpttAdminMixin, DisplayableAdmin,
 ):
     mptt_level_indent = 20
+
+
+class LinkInlineFormSet(BaseInlineFormSet):
+    """
+    Формсет инлайна связующей модели (`objects = LinkManager()`):
+    новые связи сохраняются одним INSERT ... ON CONFLICT DO NOTHING
+    вместо INSERT на каждую строку
+    """
+
+    def save_new_objects(self, commit=True):
+        new_objects = super(LinkInlineFormSet, self).save_new_objects(commit=False)
+        if commit:
+            self.model.objects.link_many(new_objects)
+        return new_objects
+
+
+class LinkInlineMixin(object):
+    """
+    Add this class to TabularInline/StackedInline of a through model with `LinkManager`
+    """
+
+    formset = LinkInlineFormSet
+
+
+class TrigramWordSimilarity(Func):
+    """
+    word_similarity(term, column) - та же мера, что у lookup `trigram_word_similar`
+    (в django до 4.0 такого выражения нет)
+    """
+
+    function = 'WORD_SIMILARITY'
+    output_field = FloatField()
+
+    def __init__(self, expression, term, **extra):
+        if not hasattr(term, 'resolve_expression'):
+            term = Value(term)
+        super().__init__(term, expression, **extra)
+
+
+class TrigramSearchMixin(object):
+    """
+    Поиск в списке объектов по триграммам (pg_trgm) вместо OR из icontains.
+
+    `trigram_search_fields` - пути до текстовых колонок с GIN-индексом gin_trgm_ops.
+    Пути через обратные и many-to-many связи проверяются подзапросом по pk,
+    поэтому join не размножает строки и DISTINCT не нужен.
+    Найденное сортируется по word_similarity (как и фильтр; для связей - лучшая
+    из связанных строк) и ограничено `trigram_search_limit` строками.
+    Короткие и числовые запросы (id, номера из интеграции) ищутся как раньше, по `search_fields`.
+    """
+
+    trigram_search_fields: Tuple[str, ...] = ()
+    trigram_search_min_length = 3
+    trigram_search_limit = 200
+
+    def use_trigram_search(self, search_term: str) -> bool:
+        term = search_term.strip()
+        return (
+            bool(self.trigram_search_fields)
+            and len(term) >= self.trigram_search_min_length
+            and not term.isdigit()
+        )
+
+    @staticmethod
+    def _is_multi_valued(model, path: str) -> bool:
+        for part in path.split(LOOKUP_SEP)[:-1]:
+            field = model._meta.get_field(part)
+            if field.many_to_many or field.one_to_many:
+                return True
+            model = field.related_model
+        return False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not self.use_trigram_search(search_term):
+            return super().get_search_results(request, queryset, search_term)
+
+        term = search_term.strip()
+        model = queryset.model
+        condition = Q()
+        # GREATEST пропускает NULL, 0 - если похожесть не по чему считать
+        ranks = [Value(0.0, output_field=FloatField())]
+        for path in self.trigram_search_fields:
+            lookup = {f'{path}__trigram_word_similar': term}
+            if self._is_multi_valued(model, path):
+                condition |= Q(pk__in=model._base_manager.filter(**lookup).values('pk'))
+                best_related = (
+                    model._base_manager.filter(pk=OuterRef('pk'))
+                    .values('pk')
+                    .annotate(rank=Max(TrigramWordSimilarity(path, term)))
+                    .values('rank')
+                )
+                ranks.append(Subquery(best_related, output_field=FloatField()))
+            else:
+                condition |= Q(**lookup)
+                ranks.append(TrigramWordSimilarity(path, term))
+
+        rank = Greatest(*ranks) if len(ranks) > 1 else ranks[0]
+        # похожесть (с подзапросами по связям) считается один раз - при отборе лучших;
+        # список, сортировка и COUNT в changelist берут готовые значения по pk
+        best = dict(
+            queryset.filter(condition)
+            .annotate(search_rank=rank)
+            .order_by('-search_rank', '-pk')
+            .values_list('pk', 'search_rank')[: self.trigram_search_limit]
+        )
+        search_rank = Case(
+            *(When(pk=pk, then=Value(value)) for pk, value in best.items()),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=list(best)).annotate(search_rank=search_rank), False
+
+    def get_ordering(self, request):
+        if self.use_trigram_search(request.GET.get(SEARCH_VAR, '')):
+            return ('-search_rank',)
+        return super().get_ordering(request)
@@ -8,4 +8,9 @@ class CoreConfig(AppConfig):
     verbose_name = name
 
     def ready(self):
-        pass
+        from celery.signals import task_postrun, task_prerun
+
+        from apps.core.config import end_task_scope, start_task_scope
+
+        task_prerun.connect(start_task_scope, dispatch_uid='core.runtime_config.start')
+        task_postrun.connect(end_task_scope, dispatch_uid='core.runtime_config.end')
@@ -4,8 +4,12 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import uuid
+from functools import partial
+
 from django.core.cache import cache
 from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
 
 
 def get_or_calculate(key, calculator_function, timeout=None, args=None, kwargs=None):
@@ -22,3 +26,31 @@ def get_or_calculate(key, calculator_function, timeout=None, args=None, kwargs=N
         value = calculator_function(*args, **kwargs)
         cache.set(key, value, timeout=timeout)
     return value
+
+
+def get_cache_version(key):
+    """
+    Current version of a cached data set, shared between processes.
+    Use it as a part of cache keys or to detect stale in-process data.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(key):
+    """
+    Mark all data cached under the previous version of `key` as stale
+    """
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+
+
+def invalidate_on_commit(invalidate, *args):
+    """
+    Call `invalidate` now and once more after the current transaction commits:
+    a concurrent request may re-cache the old rows between the first call and the commit
+    """
+    invalidate(*args)
+    transaction.on_commit(partial(invalidate, *args))
@@ -0,0 +1,106 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from constance import config as constance_config
+from constance.backends.redisd import RedisBackend
+from django.conf import settings
+
+
+class RuntimeConfig:
+    """
+    Process-local копия всех значений constance.
+
+    Значения читаются из backend одним mget и держатся в памяти процесса.
+    Актуальность сверяется с версией в Redis constance (см. `invalidate`) не чаще
+    одного раза за запрос или задачу (см. `scope`); вне scope - при каждом обращении.
+    """
+
+    _lock = threading.Lock()
+    _local = threading.local()
+    _values: Optional[Dict[str, Any]] = None
+    _version: Optional[str] = None
+
+    @classmethod
+    def invalidate(cls) -> None:
+        constance_config._backend.bump_version()
+
+    @classmethod
+    def start_scope(cls) -> None:
+        cls._local.in_scope, cls._local.checked = True, False
+
+    @classmethod
+    def end_scope(cls) -> None:
+        cls._local.in_scope = cls._local.checked = False
+
+    @classmethod
+    @contextmanager
+    def scope(cls):
+        """
+        Запрос или задача: внутри версия проверяется только при первом обращении
+        """
+        cls.start_scope()
+        try:
+            yield
+        finally:
+            cls.end_scope()
+
+    @classmethod
+    def _load_values(cls) -> Dict[str, Any]:
+        values = {key: options[0] for key, options in settings.CONSTANCE_CONFIG.items()}
+        values.update(constance_config._backend.mget(list(values)) or ())
+        return values
+
+    @classmethod
+    def get_values(cls) -> Dict[str, Any]:
+        values = cls._values
+        if values is not None and getattr(cls._local, 'checked', False):
+            return values
+
+        version = constance_config._backend.get_version()
+        with cls._lock:
+            if cls._values is None or cls._version != version:
+                cls._values = cls._load_values()
+                cls._version = version
+            cls._local.checked = getattr(cls._local, 'in_scope', False)
+            return cls._values
+
+    def __getattr__(self, key: str) -> Any:
+        try:
+            return self.get_values()[key]
+        except KeyError:
+            raise AttributeError(key)
+
+
+runtime_config = RuntimeConfig()
+
+
+class VersionedRedisBackend(RedisBackend):
+    """
+    Redis backend constance, сбрасывающий копии RuntimeConfig во всех процессах.
+    Версия настроек хранится рядом с ними, в том же Redis
+    """
+
+    VERSION_KEY = 'runtime_config:version'
+
+    def get_version(self) -> Optional[bytes]:
+        return self._rd.get(self.add_prefix(self.VERSION_KEY))
+
+    def bump_version(self) -> None:
+        self._rd.incr(self.add_prefix(self.VERSION_KEY))
+
+    def set(self, key, value):
+        changed = self.get(key) != value
+        super().set(key, value)
+        if changed:
+            RuntimeConfig.invalidate()
+
+
+def start_task_scope(**kwargs) -> None:
+    """ celery task_prerun, см. CoreConfig.ready """
+    RuntimeConfig.start_scope()
+
+
+def end_task_scope(**kwargs) -> None:
+    """ celery task_postrun, см. CoreConfig.ready """
+    RuntimeConfig.end_scope()
@@ -0,0 +1,73 @@
+import hashlib
+import io
+from typing import Dict, List
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage, default_storage
+
+# {формат: {ширина: имя файла в storage}}
+ImageVariants = Dict[str, Dict[str, str]]
+
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def get_variant_name(content_hash: str, width: int, image_format: str) -> str:
+    """
+    Имя зависит только от содержимого оригинала - файл можно кэшировать навсегда
+    """
+    return (
+        f'{settings.IMAGE_VARIANTS_DIR}/{content_hash[:2]}/{content_hash}/'
+        f'{width}.{EXTENSIONS[image_format]}'
+    )
+
+
+def get_variant_widths(original_width: int) -> List[int]:
+    """
+    Ширины из настроек, не больше оригинала (не увеличиваем).
+    Если оригинал уже самой маленькой ширины - одна копия в его размер
+    """
+    widths = [width for width in sorted(settings.IMAGE_VARIANT_WIDTHS) if width <= original_width]
+    return widths or [original_width]
+
+
+def render_variant(image: Image.Image, width: int, image_format: str) -> bytes:
+    height = max(1, round(image.height * width / image.width))
+    variant = image.resize((width, height), Image.LANCZOS)
+    if image_format == 'jpeg' and variant.mode != 'RGB':
+        # у JPEG нет прозрачности - подкладываем белый фон
+        background = Image.new('RGB', variant.size, (255, 255, 255))
+        variant = variant.convert('RGBA')
+        background.paste(variant, mask=variant.split()[-1])
+        variant = background
+
+    buffer = io.BytesIO()
+    variant.save(buffer, PIL_FORMATS[image_format], quality=settings.IMAGE_VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def build_image_variants(name: str, storage: Storage = default_storage) -> ImageVariants:
+    """
+    Уменьшенные копии картинки `name` во всех форматах и ширинах из настроек.
+    Уже сохраненные копии (тот же оригинал загружен повторно) не пересчитываются.
+    """
+    with storage.open(name, 'rb') as file:
+        content = file.read()
+    content_hash = hashlib.sha256(content).hexdigest()[:32]
+
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(content)))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    variants: ImageVariants = {}
+    for image_format in settings.IMAGE_VARIANT_FORMATS:
+        names = variants[image_format] = {}
+        for width in get_variant_widths(image.width):
+            variant_name = get_variant_name(content_hash, width, image_format)
+            if not storage.exists(variant_name):
+                variant_content = render_variant(image, width, image_format)
+                variant_name = storage.save(variant_name, ContentFile(variant_content))
+            names[str(width)] = variant_name
+    return variants
@@ -1,5 +1,6 @@
 from django.utils.deprecation import MiddlewareMixin
 
+from apps.core.config import RuntimeConfig
 from apps.logging.handlers import RequestHandler
 from apps.tools.http_client.handlers import HttpClientHandler
 
@@ -11,3 +12,16 @@ class HttpClientMiddleware(MiddlewareMixin):
 
     def process_request(self, request):
         request.http_client = HttpClientHandler(RequestHandler().get_user_agent(request))
+
+
+class RuntimeConfigMiddleware:
+    """
+    Настройки constance сверяются с версией в кэше один раз за запрос (см. RuntimeConfig)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with RuntimeConfig.scope():
+            return self.get_response(request)
@@ -1,5 +1,9 @@
-from django.db import models
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import models, transaction
 from django.db.models import Manager, QuerySet
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 from model_utils.fields import AutoCreatedField, AutoLastModifiedField
@@ -36,6 +40,72 @@ class TimeStampIndexedModel(ReloadableModel, TimeStampedModel):
         abstract = True
 
 
+class TrackedFieldsMixin(models.Model):
+    """
+    Отслеживание изменений полей из `tracked_fields` без повторного чтения строки.
+
+    Значения запоминаются при загрузке из базы и после сохранения (только записанные поля).
+    В `tracked_fields` - attname полей (`user_id`, а не `user`). Отложенные (.only/.defer)
+    поля не отслеживаются и считаются неизмененными; у нового объекта изменены все.
+    """
+
+    tracked_fields: Tuple[str, ...] = ()
+
+    _tracked_values: Dict[str, Any] = {}
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_tracked_values()
+        return instance
+
+    def _remember_tracked_values(self, field_names: Optional[Iterable[str]] = None) -> None:
+        values = {
+            name: self.__dict__[name] for name in self.tracked_fields if name in self.__dict__
+        }
+        if field_names is not None:
+            attnames = {self._meta.get_field(name).attname for name in field_names}
+            values = {name: value for name, value in values.items() if name in attnames}
+        self._tracked_values = {**self._tracked_values, **values}
+
+    def get_changed_fields(self) -> Set[str]:
+        if self._state.adding:
+            return set(self.tracked_fields)
+        return {
+            name
+            for name, value in self._tracked_values.items()
+            if name in self.__dict__ and self.__dict__[name] != value
+        }
+
+    def has_changed(self, *field_names: str) -> bool:
+        return not self.get_changed_fields().isdisjoint(field_names or self.tracked_fields)
+
+    def save_changed(self, *extra_fields: str) -> bool:
+        """
+        Записывает только измененные отслеживаемые поля и `extra_fields`.
+        Новый объект сохраняется целиком. False - если писать нечего
+        """
+        if self._state.adding:
+            self.save()
+            return True
+        update_fields = self.get_changed_fields().union(extra_fields)
+        if not update_fields:
+            return False
+        self.save(update_fields=update_fields)
+        return True
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_tracked_values(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._remember_tracked_values(fields)
+
+
 class ClinicSoftDeletableModel(SoftDeletableModel):
     is_removed = models.BooleanField(_('удален'), default=False)
 
@@ -43,10 +113,111 @@ class ClinicSoftDeletableModel(SoftDeletableModel):
         abstract = True
 
 
+class LinkQuerySet(QuerySet):
+    """
+    QuerySet связующих (through) моделей с уникальной парой внешних ключей
+    """
+
+    def link_many(self, links: Iterable[models.Model], batch_size: Optional[int] = None) -> List:
+        """
+        Создает связи одним INSERT ... ON CONFLICT DO NOTHING на пачку:
+        уже существующие пропускает база по уникальному ограничению.
+        pk созданным объектам не проставляется.
+        """
+        return self.bulk_create(links, batch_size=batch_size, ignore_conflicts=True)
+
+
+class LinkManager(Manager.from_queryset(LinkQuerySet)):
+    pass
+
+
+class ImageVariantsMixin(models.Model):
+    """
+    Уменьшенные копии картинок (см. apps.core.images).
+
+    Для каждого поля из `image_variant_fields` модель объявляет JSONField `<поле>_variants`.
+    При сохранении нового файла копии сбрасываются, а после коммита
+    задача `generate_image_variants` строит их заново и записывает в это поле.
+    """
+
+    image_variant_fields: Tuple[str, ...] = ()
+
+    class Meta:
+        abstract = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._image_names = self._get_image_names()
+
+    def _get_image_names(self) -> Dict[str, Optional[str]]:
+        # отложенные (.only/.defer) поля не запоминаем и не отслеживаем
+        return {
+            field_name: getattr(self.__dict__[field_name], 'name', self.__dict__[field_name])
+            for field_name in self.image_variant_fields
+            if field_name in self.__dict__
+        }
+
+    def _get_changed_image_fields(self) -> List[str]:
+        current = self._get_image_names()
+        if self._state.adding:
+            return [field_name for field_name, name in current.items() if name]
+        return [
+            field_name
+            for field_name, name in current.items()
+            if field_name in self._image_names and self._image_names[field_name] != name
+        ]
+
+    @staticmethod
+    def get_image_variants_field(field_name: str) -> str:
+        return f'{field_name}_variants'
+
+    def set_image_variants(self, field_name: str, variants: Dict) -> None:
+        """
+        Пишет только JSON с копиями, без save(): проверки и побочные действия модели
+        не повторяются, а параллельные правки других полей не затираются.
+        Если картинку уже заменили, копии устарели - ничего не пишем
+        """
+        variants_field = self.get_image_variants_field(field_name)
+        setattr(self, variants_field, variants)
+        conditions = {'pk': self.pk}
+        if field_name in self._image_names:
+            conditions[field_name] = self._image_names[field_name]
+        type(self)._base_manager.filter(**conditions).update(**{variants_field: variants})
+
+    def save(self, *args, **kwargs):
+        from apps.tools.tasks import generate_image_variants
+
+        changed_fields = self._get_changed_image_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            changed_fields = [name for name in changed_fields if name in update_fields]
+            kwargs['update_fields'] = set(update_fields).union(
+                self.get_image_variants_field(name) for name in changed_fields
+            )
+        for field_name in changed_fields:
+            setattr(self, self.get_image_variants_field(field_name), {})
+
+        super().save(*args, **kwargs)
+        self._image_names = self._get_image_names()
+
+        for field_name in changed_fields:
+            if getattr(self, field_name):
+                transaction.on_commit(
+                    partial(generate_image_variants.delay, self._meta.label, self.pk, field_name)
+                )
+
+
 # region Displayable
 
 
 class DisplayableQuerySet(QuerySet):
+    def _set_displayed(self, is_displayed: bool) -> None:
+        values = {'is_displayed': is_displayed}
+        if any(field.name == 'modified' for field in self.model._meta.concrete_fields):
+            # update() не трогает auto_now - без этого ETag списков не заметит скрытия
+            values['modified'] = timezone.now()
+        self.update(**values)
+
     def displayed(self):
         return self.filter(is_displayed=True)
 
@@ -57,10 +228,10 @@ class DisplayableQuerySet(QuerySet):
         return self.filter(is_displayed=False)
 
     def mark_hidden(self) -> None:
-        self.update(is_displayed=False)
+        self._set_displayed(False)
 
     def mark_displayed(self) -> None:
-        self.update(is_displayed=True)
+        self._set_displayed(True)
 
 
 class DisplayableManager(Manager.from_queryset(DisplayableQuerySet)):
@@ -71,10 +242,10 @@ class DisplayableManager(Manager.from_queryset(DisplayableQuerySet)):
         return self.filter(is_displayed=False)
 
     def mark_hidden(self) -> None:
-        self.update(is_displayed=False)
+        self.get_queryset().mark_hidden()
 
     def mark_displayed(self) -> None:
-        self.update(is_displayed=True)
+        self.get_queryset().mark_displayed()
 
 
 class DisplayableModel(models.Model):
@@ -9,6 +9,17 @@ from rest_framework.throttling import SimpleRateThrottle, UserRateThrottle
 from apps.core.constants import SYSTEM_SERVICE, SystemUserNames
 
 
+def is_system_service(user) -> bool:
+    """
+    Состоит ли пользователь в группе System Service.
+    CachedTokenAuthentication проставляет флаг из кэша токена, иначе - один запрос
+    """
+    value = getattr(user, '_is_system_service', None)
+    if value is None:
+        value = user._is_system_service = user.groups.filter(name=SYSTEM_SERVICE).exists()
+    return value
+
+
 class IsSystemService(permissions.IsAuthenticated):
     """
     A DRF permission to check if the remote user is in System Services group
@@ -17,7 +28,7 @@ class IsSystemService(permissions.IsAuthenticated):
 
     def has_permission(self, request, view):
         is_auth = super(IsSystemService, self).has_permission(request, view)
-        return is_auth and request.user.groups.filter(name=SYSTEM_SERVICE).exists()
+        return is_auth and is_system_service(request.user)
 
 
 class IsSystemServiceUser(IsSystemService):
@@ -3,6 +3,7 @@ from typing import Set, Dict
 import requests
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
 from django.core.validators import RegexValidator
 
 try:
@@ -16,6 +17,7 @@ from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 from rest_framework.serializers import ManyRelatedField, PrimaryKeyRelatedField  # noqa
+from .config import runtime_config
 from .utils import parse_multivalue_params
 
 
@@ -150,6 +152,28 @@ class DateTimeTzAwareField(serializers.DateTimeField):
 #         )
 
 
+class ImageVariantsField(serializers.Field):
+    """
+    Resized copies of an image (see apps.core.models.ImageVariantsMixin):
+    `{"webp": {"256": "<url>", ...}, "jpeg": {...}}`
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super(ImageVariantsField, self).__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        result = {}
+        for image_format, names in (value or {}).items():
+            urls = {}
+            for width, name in names.items():
+                url = default_storage.url(name)
+                urls[width] = request.build_absolute_uri(url) if request is not None else url
+            result[image_format] = urls
+        return result
+
+
 class RecaptchaField(serializers.CharField):
     default_error_messages = {
         'blank': _('No reCaptcha value provided.'),
@@ -160,7 +184,7 @@ class RecaptchaField(serializers.CharField):
 
     def is_recaptcha_enabled(self):
         return False
-        return config.RECAPTCHA_ENABLED and settings.RECAPTCHA_ENABLED
+        return runtime_config.RECAPTCHA_ENABLED and settings.RECAPTCHA_ENABLED
 
     def is_fake_recaptcha_enabled(self):
         return settings.FAKE_RECAPTCHA
@@ -0,0 +1,48 @@
+from django.test import SimpleTestCase
+from mock import patch
+
+from apps.core.config import RuntimeConfig, VersionedRedisBackend, runtime_config
+
+
+@patch.object(RuntimeConfig, '_load_values', return_value={'CLINIC_INFO_TEXT': 'text'})
+class RuntimeConfigTest(SimpleTestCase):
+    def setUp(self):
+        RuntimeConfig._values = RuntimeConfig._version = None
+
+    def test_get__loaded_once(self, load_values):
+        self.assertEqual(runtime_config.CLINIC_INFO_TEXT, 'text')
+        self.assertEqual(runtime_config.CLINIC_INFO_TEXT, 'text')
+
+        self.assertEqual(load_values.call_count, 1)
+
+    def test_get__unknown_key(self, load_values):
+        with self.assertRaises(AttributeError):
+            runtime_config.UNKNOWN
+
+    def test_invalidate__reloaded(self, load_values):
+        runtime_config.CLINIC_INFO_TEXT
+        RuntimeConfig.invalidate()
+        load_values.return_value = {'CLINIC_INFO_TEXT': 'new text'}
+
+        self.assertEqual(runtime_config.CLINIC_INFO_TEXT, 'new text')
+
+    def test_scope__version_checked_once(self, load_values):
+        with patch.object(VersionedRedisBackend, 'get_version', return_value=b'1') as get_version:
+            with RuntimeConfig.scope():
+                runtime_config.CLINIC_INFO_TEXT
+                runtime_config.CLINIC_INFO_TEXT
+            self.assertEqual(get_version.call_count, 1)
+
+            runtime_config.CLINIC_INFO_TEXT
+            runtime_config.CLINIC_INFO_TEXT
+            self.assertEqual(get_version.call_count, 3)
+        self.assertEqual(load_values.call_count, 1)
+
+    def test_scope__invalidated_between_requests(self, load_values):
+        with RuntimeConfig.scope():
+            runtime_config.CLINIC_INFO_TEXT
+        RuntimeConfig.invalidate()
+        load_values.return_value = {'CLINIC_INFO_TEXT': 'new text'}
+
+        with RuntimeConfig.scope():
+            self.assertEqual(runtime_config.CLINIC_INFO_TEXT, 'new text')
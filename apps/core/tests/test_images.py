@@ -0,0 +1,51 @@
+import io
+import tempfile
+
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+
+from apps.core.images import build_image_variants
+
+
+def make_image(width: int, height: int, mode: str = 'RGBA', image_format: str = 'PNG') -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), (255, 0, 0, 128)[: len(mode)]).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    IMAGE_VARIANT_WIDTHS=(64, 128, 256, 512),
+    IMAGE_VARIANT_FORMATS=('webp', 'jpeg'),
+)
+class BuildImageVariantsTest(SimpleTestCase):
+    def _save(self, content: bytes) -> str:
+        return default_storage.save('originals/image.png', ContentFile(content))
+
+    def test_widths_and_formats(self):
+        name = self._save(make_image(300, 150))
+
+        variants = build_image_variants(name)
+
+        self.assertEqual(set(variants), {'webp', 'jpeg'})
+        self.assertEqual(set(variants['webp']), {'64', '128', '256'})
+        with default_storage.open(variants['jpeg']['128']) as file:
+            image = Image.open(file)
+            self.assertEqual((image.format, image.size, image.mode), ('JPEG', (128, 64), 'RGB'))
+        self.assertTrue(variants['webp']['256'].endswith('/256.webp'))
+
+    def test_small_original__not_upscaled(self):
+        name = self._save(make_image(40, 40, mode='RGB'))
+
+        variants = build_image_variants(name)
+
+        self.assertEqual(set(variants['webp']), {'40'})
+
+    def test_same_content__same_names(self):
+        content = make_image(100, 100)
+        first = build_image_variants(self._save(content))
+        second = build_image_variants(self._save(content))
+
+        self.assertEqual(first, second)
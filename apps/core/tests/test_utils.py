@@ -1,10 +1,11 @@
 from datetime import datetime
 from unittest import TestCase
 
+from django.test import override_settings
 from django.utils import timezone
 from freezegun import freeze_time
 
-from apps.core.utils import is_now_workday, now_in_default_tz
+from apps.core.utils import CompanyInfo, is_now_workday, now_in_default_tz
 
 
 def datetime_to_freezable_str(dt: datetime) -> str:
@@ -93,3 +94,41 @@ class IsNowWorkdayTest(TestCase):
         with freeze_time(freezed_str):
             value = is_now_workday()
             self.assertFalse(value, now_in_default_tz())
+
+
+class CompanyInfoTest(TestCase):
+    def setUp(self) -> None:
+        tzinfo = timezone.get_default_timezone()
+        self.first = datetime(2021, 1, 1, tzinfo=tzinfo)
+        self.second = datetime(2021, 6, 1, tzinfo=tzinfo)
+        self.settings = override_settings(
+            TIMELESS_COMPANY_INFO={'name': 'Clinic'},
+            TEMPORARY_COMPANY_INFO={
+                self.second: {'owner': 'Petrov'},
+                self.first: {'owner': 'Ivanov', 'inn': '7700000000'},
+            },
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def test_get__timeless(self):
+        self.assertEqual(CompanyInfo().get('name'), 'Clinic')
+
+    def test_get__latest_actual_date(self):
+        info = CompanyInfo()
+
+        self.assertEqual(info.get('owner', self.first), 'Ivanov')
+        self.assertEqual(info.get('owner', datetime(2021, 5, 31)), 'Ivanov')
+        self.assertEqual(info.get('owner', self.second), 'Petrov')
+        self.assertEqual(info.get('inn', self.second), '7700000000')
+
+    def test_get__before_first_date(self):
+        with self.assertRaises(KeyError):
+            CompanyInfo(timestamp=datetime(2020, 1, 1)).owner
+
+    def test_index_shared_between_instances(self):
+        CompanyInfo(timestamp=self.first).owner
+        index = CompanyInfo._index
+
+        self.assertEqual(CompanyInfo(timestamp=self.second).owner, 'Petrov')
+        self.assertIs(CompanyInfo._index, index)
@@ -4,9 +4,11 @@ import random
 import re
 import uuid
 from binascii import hexlify
+from bisect import bisect_right
 from datetime import tzinfo, timedelta, datetime, time
 from distutils.dir_util import create_tree
 from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
 
 from celery.schedules import crontab
 from django.conf import settings
@@ -476,6 +478,10 @@ class CompanyInfo:
     Company info, like INN, owner, and something like that
     """
 
+    # key -> (sorted dates of temporary configs with the key, values for these dates)
+    _index: Optional[Dict[str, Tuple[List[datetime], List[Any]]]] = None
+    _index_source: Optional[Dict] = None
+
     def __init__(self, timestamp=None):
         self.timestamp = timestamp
 
@@ -487,6 +493,22 @@ class CompanyInfo:
     def temporary_config(self):
         return settings.TEMPORARY_COMPANY_INFO
 
+    def _get_index(self) -> Dict[str, Tuple[List[datetime], List[Any]]]:
+        # shared by all instances (one per timestamp is common);
+        # rebuilt only when the settings dict itself is replaced (override_settings)
+        cls = type(self)
+        temporary_config = self.temporary_config
+        if cls._index is None or cls._index_source is not temporary_config:
+            index: Dict[str, Tuple[List[datetime], List[Any]]] = {}
+            for date in sorted(temporary_config):
+                for key, value in temporary_config[date].items():
+                    dates, values = index.setdefault(key, ([], []))
+                    dates.append(date)
+                    values.append(value)
+            cls._index = index
+            cls._index_source = temporary_config
+        return cls._index
+
     def get(self, key, timestamp=None):
         if key in self.timeless_config:
             return self.timeless_config[key]
@@ -495,17 +517,12 @@ class CompanyInfo:
         if not timestamp.tzinfo:
             timestamp = timezone.make_aware(timestamp, timezone.get_default_timezone())
 
-        # find max actual config date with exists config key
-        try:
-            max_actual_config_date = max(
-                date
-                for date in self.temporary_config.keys()
-                if timestamp >= date and key in self.temporary_config[date]
-            )
-        except ValueError:
-            max_actual_config_date = None
-
-        return self.temporary_config[max_actual_config_date][key]
+        # latest config date not after timestamp among configs with the key
+        dates, values = self._get_index().get(key, ((), ()))
+        position = bisect_right(dates, timestamp)
+        if not position:
+            raise KeyError(key)
+        return values[position - 1]
 
     def __getitem__(self, key):
         return self.get(key)
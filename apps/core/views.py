@@ -0,0 +1,240 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Max, Model, Prefetch, QuerySet, TextField, Value
+from django.db.models.functions import MD5, Cast, Concat
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from apps.core.constants import MODIFIED
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET (ETag / Last-Modified) для ListAPIView и RetrieveAPIView.
+
+    Валидатор ответа считается агрегирующими запросами без сериализации:
+    max(`modified`) и количество строк основного queryset и связей из
+    `conditional_related_lookups` + path, query-параметры и пользователь.
+    У моделей без `modified` изменение значений агрегатами не видно - для них в ETag
+    идет количество, max(pk) и посчитанный в БД md5 всех колонок связанных строк.
+    На совпавший `If-None-Match` / `If-Modified-Since` отдаем 304 до основного запроса.
+
+    `If-Modified-Since` учитываем только для одного объекта: из списка строка может
+    пропасть без изменения max(`modified`), это ловит только ETag (через количество).
+    """
+
+    conditional_related_lookups: Tuple[str, ...] = ()
+
+    def get_conditional_queryset(self) -> QuerySet:
+        queryset = self.filter_queryset(self.get_queryset())
+        if self._is_conditional_retrieve():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def _is_conditional_retrieve(self) -> bool:
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return lookup_url_kwarg in self.kwargs
+
+    @staticmethod
+    def _get_lookup_model(queryset: QuerySet, lookup: str = '') -> Type[Model]:
+        model = queryset.model
+        for part in filter(None, lookup.split('__')):
+            model = model._meta.get_field(part).related_model
+        return model
+
+    @staticmethod
+    def _has_modified_field(model: Type[Model]) -> bool:
+        try:
+            model._meta.get_field(MODIFIED)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def _aggregate_state(
+        self, queryset: QuerySet, lookup: str = ''
+    ) -> Tuple[Optional[datetime], str]:
+        """
+        Время последнего изменения и часть ETag для строк `lookup`
+        """
+        prefix = f'{lookup}__' if lookup else ''
+        model = self._get_lookup_model(queryset, lookup)
+        if self._has_modified_field(model):
+            state = queryset.aggregate(
+                count=Count(f'{prefix}pk'), last_modified=Max(f'{prefix}{MODIFIED}')
+            )
+            last_modified = state['last_modified']
+            return last_modified, f'{last_modified and last_modified.isoformat()}:{state["count"]}'
+
+        # нет modified: цена или картинка меняются без изменения количества строк.
+        # Хэш считается в БД - строки в python не читаем
+        columns = []
+        for field in model._meta.concrete_fields:
+            columns.extend((Cast(f'{prefix}{field.attname}', TextField()), Value(':')))
+        row = Concat(*columns, output_field=TextField())
+        state = queryset.aggregate(
+            count=Count(f'{prefix}pk'),
+            last_pk=Max(f'{prefix}pk'),
+            digest=MD5(StringAgg(row, '|', ordering=f'{prefix}pk')),
+        )
+        return None, f'{state["count"]}:{state["last_pk"]}:{state["digest"]}'
+
+    def get_conditional_state(self) -> Tuple[List[str], Optional[datetime]]:
+        """
+        Состояние данных ответа: части для ETag и время последнего изменения
+        """
+        queryset = self.get_conditional_queryset()
+        # без distinct/сортировок/prefetch основного запроса - только pk найденных строк
+        queryset = queryset.model._base_manager.filter(pk__in=queryset.order_by().values('pk'))
+
+        parts = []
+        last_modified = None
+        for lookup in ('',) + tuple(self.conditional_related_lookups):
+            modified, state = self._aggregate_state(queryset, lookup)
+            parts.append(f'{lookup}:{state}')
+            if modified and (last_modified is None or modified > last_modified):
+                last_modified = modified
+        return parts, last_modified
+
+    def get_conditional_validators(self) -> Tuple[str, Optional[datetime]]:
+        request = self.request
+        state_parts, last_modified = self.get_conditional_state()
+
+        parts = [request.path, str(getattr(request.user, 'pk', None))]
+        parts.extend(f'{key}={value}' for key, value in sorted(request.query_params.lists()))
+        parts.extend(state_parts)
+
+        etag = quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+        return etag, last_modified
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_conditional_validators()
+        last_modified_ts = last_modified and int(last_modified.timestamp())
+
+        not_modified = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified_ts if self._is_conditional_retrieve() else None,
+        )
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified_ts:
+                response['Last-Modified'] = http_date(last_modified_ts)
+        return response
+
+
+def _flatten_select_related(tree: Dict, prefix: str = '') -> List[str]:
+    paths = []
+    for name, subtree in tree.items():
+        path = f'{prefix}{name}'
+        paths.append(path)
+        paths.extend(_flatten_select_related(subtree, f'{path}__'))
+    return paths
+
+
+class SparseFieldsetMixin:
+    """
+    `?fields=id,full_name,picture` - в ответе только перечисленные поля сериализатора.
+
+    По запрошенным полям сужается и запрос: `.only()` нужных колонок,
+    лишние select_related/prefetch_related отбрасываются.
+    Поля, зависимости которых не выводятся из `source` (свойства модели,
+    SerializerMethodField), описываются в `Meta.sparse_field_dependencies` сериализатора:
+    `{'grade': ('review',)}`. Если зависимости хоть одного поля неизвестны -
+    колонки не сужаем, только поля ответа.
+    """
+
+    sparse_fields_param = 'fields'
+
+    def get_sparse_fields(self) -> Optional[Set[str]]:
+        value = self.request.query_params.get(self.sparse_fields_param)
+        if not value:
+            return None
+        existing = set(self.get_serializer_class()().fields)
+        fields = {name.strip() for name in value.split(',')} & existing
+        return fields or None
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        sparse_fields = self.get_sparse_fields()
+        if sparse_fields:
+            target = getattr(serializer, 'child', serializer)
+            for field_name in set(target.fields) - sparse_fields:
+                target.fields.pop(field_name)
+        return serializer
+
+    def get_sparse_lookups(self, field_names: Iterable[str]) -> Optional[Set[str]]:
+        """
+        Поля модели и связи, нужные для отображения `field_names`.
+        None - если зависимости какого-то поля неизвестны
+        """
+        serializer_class = self.get_serializer_class()
+        model = serializer_class.Meta.model
+        dependencies = getattr(serializer_class.Meta, 'sparse_field_dependencies', {})
+        fields = serializer_class().fields
+
+        lookups = set()
+        for field_name in field_names:
+            if field_name in dependencies:
+                lookups.update(dependencies[field_name])
+                continue
+            attr = fields[field_name].source.split('.')[0]
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return None
+            lookups.add(model_field.name)
+        return lookups
+
+    def apply_sparse_fieldset(self, queryset: QuerySet, field_names: Iterable[str]) -> QuerySet:
+        lookups = self.get_sparse_lookups(field_names)
+        if lookups is None:
+            return queryset
+
+        opts = queryset.model._meta
+        relations = set()
+        columns = {opts.pk.name}
+        for lookup in lookups:
+            field = opts.get_field(lookup)
+            if field.many_to_many or field.one_to_many or (field.one_to_one and not field.concrete):
+                relations.add(lookup)
+            else:
+                columns.add(lookup)
+                if field.is_relation:
+                    relations.add(lookup)
+
+        prefetch_lookups = []
+        for prefetch in queryset._prefetch_related_lookups:
+            path = prefetch.prefetch_to if isinstance(prefetch, Prefetch) else prefetch
+            if path.split('__')[0] in relations:
+                prefetch_lookups.append(prefetch)
+        queryset = queryset.prefetch_related(None).prefetch_related(*prefetch_lookups)
+
+        select_related = queryset.query.select_related
+        if select_related is True:
+            return queryset
+        if select_related:
+            paths = [
+                path
+                for path in _flatten_select_related(select_related)
+                if path.split('__')[0] in relations
+            ]
+            queryset = queryset.select_related(None).select_related(*paths)
+
+        return queryset.only(*columns)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        sparse_fields = self.get_sparse_fields()
+        if sparse_fields and isinstance(queryset, QuerySet):
+            queryset = self.apply_sparse_fieldset(queryset, sparse_fields)
+        return queryset
@@ -0,0 +1,86 @@
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple
+
+from apps.profiles.constants import ContactType
+from apps.profiles.models import Contact, User
+
+CONTACT_FIELDS = ('user_id', 'type', 'value', 'is_primary', 'is_confirmed', 'is_stale')
+
+
+class NotificationAddress(NamedTuple):
+    # см. User.get_notification_phone
+    phone: str
+    # см. User.get_notification_email
+    email: str
+    # см. ContactManager.get_notifyable_types (только подтвержденные)
+    notifyable_types: FrozenSet[str]
+
+
+class NotificationAddressBook:
+    """
+    Адреса для уведомлений (телефон, email, типы контактов) пачки пользователей -
+    одним запросом к контактам. Рассылки по многим получателям берут адреса отсюда
+    один раз на пачку вместо запросов на каждого пользователя.
+    """
+
+    @staticmethod
+    def resolve(contacts: Iterable) -> NotificationAddress:
+        """
+        Адрес по неудаленным контактам одного пользователя, упорядоченным по pk
+        (экземпляры Contact или строки `values_list(*CONTACT_FIELDS, named=True)`)
+        """
+        phones: List = []
+        emails: List = []
+        notifyable_types = set()
+        for contact in contacts:
+            if contact.type == ContactType.PHONE:
+                phones.append(contact)
+            elif contact.type == ContactType.EMAIL:
+                emails.append(contact)
+            if contact.is_primary and contact.is_confirmed:
+                notifyable_types.add(contact.type)
+
+        phone = next((c for c in phones if c.is_primary and c.is_confirmed), None)
+        if phone is None and phones:
+            phone = phones[0]
+
+        email = (
+            next((c for c in emails if c.is_primary and c.is_confirmed), None)
+            or next((c for c in emails if c.is_confirmed), None)
+            or next((c for c in emails if c.is_primary), None)
+        )
+        return NotificationAddress(
+            phone=phone.value if phone else '',
+            email=email.value if email and not email.is_stale else '',
+            notifyable_types=frozenset(notifyable_types),
+        )
+
+    @classmethod
+    def get_addresses(cls, user_ids: Iterable[int]) -> Dict[int, NotificationAddress]:
+        """
+        {id пользователя: адрес}; у пользователей без контактов все поля пустые
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return {}
+
+        contacts_by_user = defaultdict(list)
+        rows = (
+            Contact.objects.filter(user_id__in=user_ids)
+            .order_by('user_id', 'pk')
+            .values_list(*CONTACT_FIELDS, named=True)
+        )
+        for row in rows:
+            contacts_by_user[row.user_id].append(row)
+
+        return {user_id: cls.resolve(contacts_by_user.get(user_id, ())) for user_id in user_ids}
+
+    @classmethod
+    def get_address(cls, user: User) -> NotificationAddress:
+        """
+        Адрес одного пользователя; контакты из with_contacts() используются без запроса
+        """
+        contacts = user.contacts._get_prefetched_contacts()
+        if contacts is not None:
+            return cls.resolve(sorted(contacts, key=lambda contact: contact.pk))
+        return cls.get_addresses([user.pk])[user.pk]
@@ -7,7 +7,7 @@ from django.utils.html import format_html
 from django.utils.translation import ugettext_lazy as _
 from push_notifications.models import GCMDevice
 
-from apps.core.admin import get_change_href
+from apps.core.admin import get_change_href, LinkInlineMixin, TrigramSearchMixin
 from apps.profiles.admin_utils import get_user_link, UserHasPhoneFilter
 from apps.profiles.constants import BIRTH_DATE
 from apps.profiles.models import (
@@ -60,7 +60,7 @@ class UserToProfileInline(admin.TabularInline):
 
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(TrigramSearchMixin, UserAdmin):
     class Media:
         js = ("profiles/user_admin.js",)
 
@@ -77,6 +77,7 @@ class CustomUserAdmin(UserAdmin):
         'modified',
     )
     search_fields = ('username', 'profile__full_name', 'contacts__value')
+    trigram_search_fields = ('username', 'profile__full_name', 'contacts__value')
     readonly_fields = (
         'email',
         'last_login',
@@ -129,7 +130,7 @@ class CustomUserAdmin(UserAdmin):
         return qs
 
 
-class ProfileToGroupInline(admin.TabularInline):
+class ProfileToGroupInline(LinkInlineMixin, admin.TabularInline):
     model = ProfileToGroup
     show_change_link = True
     raw_id_fields = ('profile',)
@@ -183,7 +184,7 @@ class RelationAdmin(admin.ModelAdmin):
     )
 
 
-class ProfileGroupInline(admin.TabularInline):
+class ProfileGroupInline(LinkInlineMixin, admin.TabularInline):
     verbose_name = _("Группа профилей")
     verbose_name_plural = _("Группы профилей")
     model = ProfileToGroup
@@ -212,11 +213,12 @@ class SlaveRelationInline(admin.TabularInline):
 
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(TrigramSearchMixin, admin.ModelAdmin):
     date_hierarchy = "created"
     list_display = ('id', 'full_name', BIRTH_DATE, 'links_fn', 'type', 'is_active', 'created')
     list_display_links = ('id', 'full_name')
     search_fields = ('id', 'users__contacts__value', 'users__name', 'full_name')
+    trigram_search_fields = ('full_name', 'users__username', 'users__contacts__value')
     list_filter = (
         'created',
         'modified',
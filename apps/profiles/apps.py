@@ -11,4 +11,19 @@ class ProfilesConfig(AppConfig):
     app_name = 'profiles'
 
     def ready(self):
+        from django.db.models.signals import m2m_changed, post_delete
+        from rest_framework.authtoken.models import Token
+
         from .models import User
+        from .token_cache import invalidate_on_groups_change, invalidate_on_token_delete
+
+        m2m_changed.connect(
+            invalidate_on_groups_change,
+            sender=User.groups.through,
+            dispatch_uid='profiles_token_identity_groups',
+        )
+        post_delete.connect(
+            invalidate_on_token_delete,
+            sender=Token,
+            dispatch_uid='profiles_token_identity_token_delete',
+        )
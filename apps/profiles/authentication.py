@@ -0,0 +1,58 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+
+from apps.auth.authenticate import ClinicTokenAuthentication
+from apps.core.permissions import is_system_service
+from apps.profiles.identity import load_identity
+from apps.profiles.models import User
+from apps.profiles.token_cache import TokenIdentity, TokenIdentityCache
+
+# пароль в кэш не кладем - при обращении догрузится из БД
+CACHED_USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields if field.attname != 'password'
+)
+
+
+class CachedTokenAuthentication(ClinicTokenAuthentication):
+    """
+    ClinicTokenAuthentication без запросов в БД на горячем пути:
+    пользователь, его группа System Service и id профиля берутся из TokenIdentityCache.
+    Промах кэша - обычная проверка токена, результат кладется в кэш.
+    """
+
+    @staticmethod
+    def build_identity(user: User) -> TokenIdentity:
+        profile = load_identity(user)
+        return TokenIdentity(
+            user_values={name: getattr(user, name) for name in CACHED_USER_FIELDS},
+            is_system_service=is_system_service(user),
+            profile_id=profile.pk if profile else None,
+        )
+
+    @staticmethod
+    def build_user(identity: TokenIdentity) -> User:
+        # значения могут отставать от БД: такого пользователя сохранять только с update_fields
+        user_values = identity.user_values
+        field_names = [
+            field.attname for field in User._meta.concrete_fields if field.attname in user_values
+        ]
+        user = User.from_db(
+            DEFAULT_DB_ALIAS, field_names, [user_values[name] for name in field_names]
+        )
+        user._is_system_service = identity.is_system_service
+        user._identity_profile_id = identity.profile_id
+        return user
+
+    def authenticate_credentials(self, key):
+        identity = TokenIdentityCache.get(key)
+        if identity is None:
+            user, token = super().authenticate_credentials(key)
+            TokenIdentityCache.set(key, self.build_identity(user))
+            return user, token
+
+        if not identity.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        user = self.build_user(identity)
+        return user, Token(key=key, user=user)
@@ -20,6 +20,9 @@ RELATION_ID: Final = "relation_id"
 RELATION_TYPE: Final = "relation_type"
 
 
+# код страны для номеров без него (8XXXXXXXXXX, XXXXXXXXXX), см. normalize_phone
+DEFAULT_PHONE_COUNTRY_CODE: Final = '7'
+
 ADD_PRIMARY_PHONE = 'add_primary_phone'
 ADD_PRIMARY_EMAIL = 'add_primary_email'
 
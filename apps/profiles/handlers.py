@@ -1,7 +1,6 @@
 from typing import Dict
 
 from django.contrib.auth.models import AnonymousUser
-from django.db.models import Q
 from django.db.transaction import atomic
 from django.shortcuts import get_object_or_404
 from django.utils.crypto import get_random_string
@@ -18,19 +17,13 @@ from .models import User, ContactVerification, Contact, Profile
 class ContactHandler:
     _contact_validators = {ContactType.EMAIL: EmailSerializer, ContactType.PHONE: PhoneSerializer}
 
-    @staticmethod
-    def get_phone_query(phone_value):
-        return Q(value=phone_value, type=ContactType.PHONE)
-
     @classmethod
     def get_phone_contact(cls, phone_value):
         """
         :type phone_value: str
         :rtype: apps.profiles.models.Contact | None
         """
-        phone_contacts = Contact.objects.select_related('user').filter(
-            cls.get_phone_query(phone_value)
-        )
+        phone_contacts = Contact.objects.select_related('user').filter_phone(phone_value)
         try:
             contact = phone_contacts.get(
                 # is_confirmed=False,
@@ -150,7 +143,8 @@ class UserHandler(object):
         # that enable them to proceed to the next step
         if self.user.has_primary_contacts():
             self.user.set_username()
-            self.user.save()
+            # request.user может быть собран из кэша токена - пишем только username
+            self.user.save(update_fields=['username'])
 
     def add_contact(self, contact_type, value, send_notify=False, **kwargs):
         """
@@ -219,7 +213,7 @@ class UserHandler(object):
             except ValidationError:
                 pass
             else:
-                self.user.save()
+                self.user.save(update_fields=['username'])
         else:
             contact.confirm()
 
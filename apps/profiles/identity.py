@@ -0,0 +1,30 @@
+from typing import Optional
+
+from apps.profiles.models import Profile, User
+
+
+def load_identity(user: Optional[User]) -> Optional[Profile]:
+    """
+    Профиль пользователя вместе с пациентом и врачом - одним запросом.
+
+    Результат запоминается на объектах: дальше `user.profile`, `profile.user`,
+    `profile.patient` и `profile.doctor` в рамках запроса не ходят в БД.
+    Повторный вызов для того же пользователя запросов не делает.
+    """
+    if user is None or not user.is_authenticated:
+        return None
+    if getattr(user, '_identity_loaded', False):
+        return user._profile
+
+    profiles = Profile.objects.select_related('patient', 'doctor')
+    profile_id = getattr(user, '_identity_profile_id', None)
+    if profile_id:
+        # id профиля уже известен из кэша токена (CachedTokenAuthentication)
+        profile = profiles.filter(pk=profile_id).first()
+    else:
+        profile = profiles.filter(users=user).first()
+    user._profile = profile
+    if profile is not None:
+        profile._user = user
+    user._identity_loaded = True
+    return profile
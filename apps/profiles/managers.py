@@ -4,6 +4,8 @@ from django.db import models
 from django.db.models.query import QuerySet
 from django.utils.translation import ugettext as _
 
+from apps.profiles.utils import normalize_phone
+
 
 class UserOwnsContact(ValidationError):
     pass
@@ -13,11 +15,20 @@ class ClinicUserQuerySet(QuerySet):
     def active(self):
         return self.filter(is_active=True)
 
+    def with_contacts(self):
+        """
+        Контакты одним запросом на всю выборку - user.phone / user.email без запросов
+        """
+        return self.prefetch_related('contacts')
+
 
 class ClinicUserManager(UserManager):
     def get_queryset(self):
         return ClinicUserQuerySet(self.model, using=self._db)
 
+    def with_contacts(self):
+        return self.get_queryset().with_contacts()
+
 
 class ContactMixin:
     def _normal_type(self, _type):
@@ -42,6 +53,15 @@ class ContactMixin:
             kwargs['type'] = self._normal_type(kwargs['type'])
         return super(ContactMixin, self).filter(*args, **kwargs)
 
+    def filter_phone(self, phone: str):
+        """
+        Телефоны с тем же номером в любом формате записи (по индексу phone_key)
+        """
+        phone_key = normalize_phone(phone)
+        if phone_key is None:
+            return self.filter(type=self.model.PHONE, value=phone)
+        return self.filter(type=self.model.PHONE, phone_key=phone_key)
+
 
 class ContactQuerySet(ContactMixin, QuerySet):
     def check_if_stale(self, value):
@@ -52,63 +72,6 @@ class ContactManager(ContactMixin, models.Manager):
     def get_queryset(self):
         return ContactQuerySet(self.model, using=self._db).exclude(is_deleted=True)
 
-    def _reactivate_contact(self, user, value, type):
-        try:
-            contact = self.model.default_manager.get(
-                user=user, value=value.lower(), is_deleted=True, type=type
-            )
-        except ObjectDoesNotExist:
-            pass
-        else:
-            contact.is_deleted = False
-            contact.is_primary = False
-            contact.save(update_fields=['is_deleted', 'is_primary'])
-            return contact
-        return False
-
-    def clean_contact(self, type, value, user=None, change_primary=False):
-        """
-        Raises a ValidationError whenever another contact of specified type and value is found in the database,
-        returns True if no duplicates found.
-         Two types of validation: for contacts that cannot be verified (i.e. skype) and verifiable ones.
-        """
-        clean_value = value.lower()
-        lookup_params = dict(type=type, value=clean_value)
-        lookup_params_unique = dict(type=type, value=clean_value)
-        if user:
-            lookup_params_unique.update(dict(user=user))
-
-        existing_contacts = self.model.objects.filter(is_confirmed=True, **lookup_params)
-        unique_existing_contacts = self.model.default_manager.filter(**lookup_params_unique)
-
-        if user and existing_contacts.filter(user=user).exists():
-            raise UserOwnsContact(_('Пользователь уже имеет данный контакт'))
-        elif existing_contacts.exists():
-            raise ValidationError(_('Контакт принадлежит другому пользователю'))
-
-        if change_primary and unique_existing_contacts:
-            found_contact = unique_existing_contacts[0]
-            if not found_contact.is_confirmed:
-                # delete unconfirmed contact to allow changing primary contact with the same value
-                found_contact.delete()
-
-        return clean_value
-
-    def _check_duplicates(self, type, value, user):
-        # Pre-validate attempt to add duplicate:
-        clean_value = value.lower()
-        lookup_params = dict(type=type, value=clean_value)
-        if user:
-            lookup_params.update(dict(user=user))
-        existing = self.model.default_manager.filter(**lookup_params)
-
-        if existing.exists():
-            raise ValidationError(
-                _('Контакт, который вы пытаетесь добавить пользователю {} уже используется').format(
-                    user
-                )
-            )
-
     def _get_related_user(self):
         assert (
             hasattr(self, 'core_filters') and 'user' in self.core_filters
@@ -132,30 +95,58 @@ class ContactManager(ContactMixin, models.Manager):
 
         existing_primary.update(is_primary=False, is_deleted=True, is_confirmed=False)
 
+    def _get_same_contacts(self, type, clean_value):
+        """
+        Все контакты (в т.ч. удаленные) с тем же значением у всех пользователей.
+        Телефоны сравниваются по phone_key
+        """
+        queryset = self.model.default_manager.filter(type=type)
+        phone_key = normalize_phone(clean_value) if type == self.model.PHONE else None
+        if phone_key is not None:
+            return list(queryset.filter(phone_key=phone_key))
+        return list(queryset.filter(value=clean_value))
+
     def add_contact(self, value, type, change_primary=False, **kwargs):
         """
-        Serves to simplify adding contacts to user instances
+        Serves to simplify adding contacts to user instances.
+
+        Все проверки (чужой/свой подтвержденный контакт, удаленный свой контакт,
+        дубликат) - по одной выборке контактов с тем же значением.
         """
         # Set the user parameter for create() method explicitly
         # so it cannot be overridden by our method caller
         user = self._get_related_user()
         type = self._normal_type(type)
+        clean_value = value.lower()
 
-        # Check contact records for possible duplicates before adding
-        clean_value = self.clean_contact(
-            type=type, value=value, user=user, change_primary=change_primary
-        )
+        same_contacts = self._get_same_contacts(type, clean_value)
+        confirmed = [c for c in same_contacts if c.is_confirmed and not c.is_deleted]
+        if any(contact.user_id == user.pk for contact in confirmed):
+            raise UserOwnsContact(_('Пользователь уже имеет данный контакт'))
+        elif confirmed:
+            raise ValidationError(_('Контакт принадлежит другому пользователю'))
 
-        # If an old contact was found and re-activated, our job here is done, just return the contact
-        reactivated_contact = self._reactivate_contact(user=user, value=value, type=type)
-        if reactivated_contact:
-            return reactivated_contact
+        own_contacts = [c for c in same_contacts if c.user_id == user.pk]
+        if change_primary and own_contacts and not own_contacts[0].is_confirmed:
+            # delete unconfirmed contact to allow changing primary contact with the same value
+            own_contacts.pop(0).delete()
 
-        self._check_duplicates(type=type, value=clean_value, user=user)
+        # If an old contact was found and re-activated, our job here is done, just return the contact
+        for contact in own_contacts:
+            if contact.is_deleted:
+                contact.is_deleted = False
+                contact.is_primary = False
+                contact.save(update_fields=['is_deleted', 'is_primary'])
+                return contact
+
+        if own_contacts:
+            raise ValidationError(
+                _('Контакт, который вы пытаетесь добавить пользователю {} уже используется').format(
+                    user
+                )
+            )
 
-        # Deactivate a previous primary contact of the same type
-        if kwargs.get('is_primary', False) and kwargs.get('is_confirmed', False):
-            self.unset_primary(type)
+        # предыдущий основной контакт того же типа снимается в Contact.save
         return self.create(user=user, value=clean_value, type=type, **kwargs)
 
     def delete_contact(self, value, type, **kwargs):
@@ -232,21 +223,36 @@ class ContactManager(ContactMixin, models.Manager):
                 return contact.user == ignore_user
         return True
 
-    @property
-    def email(self):
+    def _get_prefetched_contacts(self):
+        """
+        Контакты пользователя из prefetch_related('contacts') (см. with_contacts) или None
+        """
+        instance = getattr(self, 'instance', None)
+        if instance is None:
+            return None
+        cache = getattr(instance, '_prefetched_objects_cache', {})
+        return cache.get(self.field.remote_field.get_cache_name())
+
+    def _get_primary_value(self, contact_type) -> str:
+        contacts = self._get_prefetched_contacts()
+        if contacts is not None:
+            for contact in contacts:
+                if contact.type == contact_type and contact.is_primary and contact.is_confirmed:
+                    return contact.value
+            return ''
         try:
-            contact = self.get_primary_email()
+            contact = self.get_primary_contact_by_type(contact_type)
         except self.model.DoesNotExist:
             contact = None
         return contact.value if contact else ''
 
+    @property
+    def email(self):
+        return self._get_primary_value(self.model.EMAIL)
+
     @property
     def phone(self) -> str:
-        try:
-            contact = self.get_primary_phone()
-        except self.model.DoesNotExist:
-            contact = None
-        return contact.value if contact else ''
+        return self._get_primary_value(self.model.PHONE)
 
     def get_primary_verification_code(self, contact_type):
         try:
@@ -0,0 +1,35 @@
+# Generated by Django 3.1.12 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+DEDUPLICATE_SQL = '''
+DELETE FROM {table} AS t USING {table} AS d
+WHERE t.{left} = d.{left} AND t.{right} = d.{right} AND t.id > d.id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_auto_20210113_2151'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            DEDUPLICATE_SQL.format(table='profiles_usertoprofile', left='user_id', right='profile_id'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            DEDUPLICATE_SQL.format(table='profiles_profiletogroup', left='profile_id', right='group_id'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='usertoprofile',
+            constraint=models.UniqueConstraint(fields=('user', 'profile'), name='profiles_user_to_profile_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='profiletogroup',
+            constraint=models.UniqueConstraint(fields=('profile', 'group'), name='profiles_profile_to_group_unique'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.1.12 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_link_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='picture_draft_variants',
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, verbose_name='уменьшенные копии фото'
+            ),
+        ),
+    ]
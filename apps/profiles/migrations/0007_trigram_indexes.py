@@ -0,0 +1,34 @@
+# Generated by Django 3.1.12 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_profile_picture_draft_variants'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['username'], name='user_username_trgm', opclasses=['gin_trgm_ops']
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['full_name'], name='profile_full_name_trgm', opclasses=['gin_trgm_ops']
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['value'], name='contact_value_trgm', opclasses=['gin_trgm_ops']
+            ),
+        ),
+    ]
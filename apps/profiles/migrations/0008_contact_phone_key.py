@@ -0,0 +1,80 @@
+# Generated by Django 3.1.12 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+from apps.profiles.utils import normalize_phone
+
+BATCH_SIZE = 1000
+
+
+def fill_phone_key(apps, schema_editor):
+    Contact = apps.get_model('profiles', 'Contact')
+    contacts = Contact.objects.filter(type='phone').only('id', 'value').order_by('id')
+
+    batch = []
+    for contact in contacts.iterator(chunk_size=BATCH_SIZE):
+        contact.phone_key = normalize_phone(contact.value)
+        if contact.phone_key is not None:
+            batch.append(contact)
+        if len(batch) >= BATCH_SIZE:
+            Contact.objects.bulk_update(batch, ['phone_key'])
+            batch = []
+    if batch:
+        Contact.objects.bulk_update(batch, ['phone_key'])
+
+
+def unconfirm_duplicate_primary_phones(apps, schema_editor):
+    """
+    Один номер подтвержден основным у нескольких пользователей - подтвержденным
+    остается самый старый контакт, остальным нужно подтвердить номер заново
+    """
+    Contact = apps.get_model('profiles', 'Contact')
+    confirmed = Contact.objects.filter(
+        phone_key__isnull=False, is_primary=True, is_confirmed=True, is_deleted=False
+    )
+    duplicates = (
+        confirmed.order_by()
+        .values('phone_key')
+        .annotate(first_id=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicates.iterator():
+        confirmed.filter(phone_key=row['phone_key']).exclude(id=row['first_id']).update(
+            is_confirmed=False
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='phone_key',
+            field=models.BigIntegerField(
+                blank=True, editable=False, null=True, verbose_name='телефон (E.164)'
+            ),
+        ),
+        migrations.RunPython(fill_phone_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(
+                condition=models.Q(phone_key__isnull=False),
+                fields=['phone_key'],
+                name='contact_phone_key',
+            ),
+        ),
+        migrations.RunPython(unconfirm_duplicate_primary_phones, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='contact',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(is_confirmed=True, is_deleted=False, is_primary=True),
+                fields=('phone_key',),
+                name='contact_primary_phone_key_unique',
+            ),
+        ),
+    ]
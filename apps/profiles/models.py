@@ -4,11 +4,13 @@ from typing import Optional
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.contrib.postgres.indexes import GinIndex
 from django.core import validators
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import validate_email
-from django.db import models, IntegrityError
+from django.db import models
+from django.db.models import Q
 from django.db.models.fields.json import JSONField
 from django.urls import reverse
 from django.utils import timezone
@@ -21,12 +23,19 @@ from rest_framework.authtoken.models import Token
 from rest_framework.exceptions import ValidationError
 
 from apps.core import utils
-from apps.core.models import TimeStampIndexedModel
+from apps.core.cache_utils import invalidate_on_commit
+from apps.core.models import (
+    ImageVariantsMixin,
+    TimeStampIndexedModel,
+    LinkManager,
+    TrackedFieldsMixin,
+)
 from apps.core.utils import validate_image_max_size
 from apps.profiles import managers
 from apps.profiles.constants import ProfileType, ContactType, Gender, ProfileGroupType, RelationType
 from apps.profiles.managers import ProfileQuerySet
-from apps.profiles.utils import make_full_name
+from apps.profiles.token_cache import TokenIdentityCache
+from apps.profiles.utils import make_full_name, normalize_phone
 from apps.profiles.validators import phone_validator
 
 
@@ -70,7 +79,9 @@ class GenderMixin(Gender, ProfileConstantMixin):
         return self._get_type_obj().gender != self.NOT_SET
 
 
-class User(ProfileTypeMixin, AbstractBaseUser, PermissionsMixin, TimeStampIndexedModel):
+class User(
+    ProfileTypeMixin, AbstractBaseUser, PermissionsMixin, TrackedFieldsMixin, TimeStampIndexedModel
+):
     username = models.CharField(
         _('username'),
         max_length=100,
@@ -110,12 +121,19 @@ class User(ProfileTypeMixin, AbstractBaseUser, PermissionsMixin, TimeStampIndexe
     REQUIRED_FIELDS = ['name']
     REQUIRED_CONTACT_TYPES = [ContactType.PHONE]
 
+    # изменение этих полей сбрасывает кэш токенов пользователя (TokenIdentityCache)
+    tracked_fields = ('password', 'username', 'name', 'is_active', 'is_staff', 'is_superuser')
+
     _profile = None
 
     class Meta:
         verbose_name = _('пользователь')
         verbose_name_plural = _('пользователи')
         swappable = 'AUTH_USER_MODEL'
+        # поиск в админке, см. apps.core.admin.TrigramSearchMixin
+        indexes = [
+            GinIndex(fields=['username'], name='user_username_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
     def __init__(self, *args, **kwargs):
         self.save_as_type = kwargs.pop('type', None)
@@ -123,20 +141,32 @@ class User(ProfileTypeMixin, AbstractBaseUser, PermissionsMixin, TimeStampIndexe
 
     def save(self, *args, **kwargs):
         created = not self.pk
-        if not created:
-            # Need to get the password here before the instance is saved
-            previous_password = User.objects.get(pk=self.pk).password
-            password_changed = previous_password != self.password
+        identity_changed = not created and self.has_changed()
 
         super(User, self).save(*args, **kwargs)
         if created:
             # Create a new token for DRF token authentication
             self.get_drf_token()
+        elif identity_changed:
+            # is_active и прочие поля пользователя закэшированы по токену
+            invalidate_on_commit(TokenIdentityCache.invalidate_users, [self.pk])
+
+    def mark_visited(self, visited_at=None):
+        """
+        Один UPDATE last_visited и modified - без проверок и сброса кэша токенов.
+        Отметка посещения в apps.auth пока пишет через полный user.save() - ее нужно
+        перевести на этот метод
+        """
+        self.last_visited = visited_at or timezone.now()
+        self.save(update_fields=['last_visited'])
 
     @property
     def profile(self):
         """Temporary solution until we implement multiple profiles logic"""
         if not self._profile:
+            if getattr(self, '_identity_loaded', False):
+                # уже искали в load_identity - профиля нет
+                return None
             try:
                 self._profile = self.profile_set.all()[0]
             except (IndexError, ValueError):
@@ -160,6 +190,9 @@ class User(ProfileTypeMixin, AbstractBaseUser, PermissionsMixin, TimeStampIndexe
         return token
 
     def recreate_token(self):
+        # после коммита старых токенов в БД уже нет - сбрасываем по их ключам
+        token_keys = list(Token.objects.filter(user=self).values_list('key', flat=True))
+        invalidate_on_commit(TokenIdentityCache.invalidate, token_keys)
         Token.objects.filter(user=self).delete()
         # manually update current instance
         self.auth_token = self.get_drf_token()
@@ -218,14 +251,19 @@ class User(ProfileTypeMixin, AbstractBaseUser, PermissionsMixin, TimeStampIndexe
     def get_primary_email_verification_code(self):
         return self.contacts.get_primary_verification_code(Contact.EMAIL)
 
+    def get_notification_address(self):
+        """
+        :rtype: apps.profiles.address_book.NotificationAddress
+        """
+        from apps.profiles.address_book import NotificationAddressBook
+
+        return NotificationAddressBook.get_address(self)
+
     def get_notification_phone(self) -> str:
-        primary_phone = self.contacts.phone
-        if not primary_phone:
-            contact = self.contacts.get_phones(confirmed_only=None).first()
-            contact_to = contact.value if contact else ''
-        else:
-            contact_to = primary_phone
-        return contact_to
+        """
+        Primary confirmed phone, otherwise the first phone of any confirmation state.
+        """
+        return self.get_notification_address().phone
 
     def get_notification_email(self) -> str:
         """
@@ -233,21 +271,7 @@ class User(ProfileTypeMixin, AbstractBaseUser, PermissionsMixin, TimeStampIndexe
         For unconfirmed, get a non-confirmed primary email.
         Finally, ignore stale emails.
         """
-        contact = None
-        try:
-            contact = self.contacts.get_primary_email()
-        except Contact.DoesNotExist:
-            pass
-
-        if not contact:
-            contact = self.contacts.get_emails().first()
-
-        if not contact:
-            try:
-                contact = self.contacts.get_primary_email(confirmed_only=False)
-            except Contact.DoesNotExist:
-                pass
-        return contact.value if contact and not contact.is_stale else ''
+        return self.get_notification_address().email
 
     def get_picture_url(self):
         return self.profile.get_picture_url()
@@ -291,20 +315,21 @@ class UserToProfile(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     profile = models.ForeignKey('Profile', on_delete=models.DO_NOTHING)
 
-    def save(self, *args, **kwargs):
-        if UserToProfile.objects.filter(user=self.user, profile=self.profile).exists():
-            raise IntegrityError(
-                f'UserToProfile already exists for '
-                f'user_id={self.user.pk}, profile_id={self.profile.id}'
-            )
-        super(UserToProfile, self).save(*args, **kwargs)
+    objects = LinkManager()
 
     class Meta:
         verbose_name = _('связь профиля с пользователем')
         verbose_name_plural = _('связи профилей с пользователями')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'profile'], name='profiles_user_to_profile_unique'
+            ),
+        ]
 
 
-class Profile(TimeStampIndexedModel, GenderMixin, ProfileTypeMixin):
+class Profile(
+    ImageVariantsMixin, TrackedFieldsMixin, TimeStampIndexedModel, GenderMixin, ProfileTypeMixin
+):
     type = models.PositiveSmallIntegerField(
         _('тип'),
         choices=ProfileTypeMixin.PROFILE_TYPES,
@@ -328,6 +353,9 @@ class Profile(TimeStampIndexedModel, GenderMixin, ProfileTypeMixin):
         blank=True,
         validators=[validate_image_max_size],
     )
+    picture_draft_variants = JSONField(
+        _('уменьшенные копии фото'), default=dict, blank=True, editable=False
+    )
     region_as_text = models.CharField(_('регион текстом'), max_length=256, null=True, blank=True)
     # region = models.ForeignKey(
     #     Region, related_name='profiles', blank=True, null=True, on_delete=models.PROTECT)
@@ -338,6 +366,14 @@ class Profile(TimeStampIndexedModel, GenderMixin, ProfileTypeMixin):
     class Meta:
         verbose_name = _('профиль')
         verbose_name_plural = _('профили')
+        indexes = [
+            GinIndex(
+                fields=['full_name'], name='profile_full_name_trgm', opclasses=['gin_trgm_ops']
+            ),
+        ]
+
+    image_variant_fields = ('picture_draft',)
+    tracked_fields = ('full_name',)
 
     def __str__(self):
         if self.full_name:
@@ -373,7 +409,7 @@ class Profile(TimeStampIndexedModel, GenderMixin, ProfileTypeMixin):
         """Temporary solution until we implement multiple users logic"""
         assert user.pk, f'Cannot set user before {user.__class__.__name__} is saved'
         assert self.pk, f'Cannot set user before {self.__class__.__name__} is saved'
-        UserToProfile.objects.create(user=user, profile=self)
+        UserToProfile.objects.link_many([UserToProfile(user=user, profile=self)])
 
     @cached_property
     def picture(self):
@@ -430,6 +466,10 @@ class Profile(TimeStampIndexedModel, GenderMixin, ProfileTypeMixin):
 
     def save(self, *args, **kwargs):
         self.update_full_name()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.has_changed('full_name'):
+            # full_name пересчитан из частей имени - пишем вместе с ними
+            kwargs['update_fields'] = {*update_fields, 'full_name'}
         super(Profile, self).save(*args, **kwargs)
 
     def post_approve(self):
@@ -451,16 +491,16 @@ class ProfileToGroup(TimeStampIndexedModel):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
     group = models.ForeignKey('ProfileGroup', on_delete=models.CASCADE)
 
-    def save(self, *args, **kwargs):
-        if ProfileToGroup.objects.filter(profile=self.profile, group=self.group).exists():
-            raise IntegrityError(
-                f'Profile if {self.profile_id} already exists ' f'for group id={self.group_id}'
-            )
-        super(ProfileToGroup, self).save(*args, **kwargs)
+    objects = LinkManager()
 
     class Meta:
         verbose_name = _('связь профиля с группой')
         verbose_name_plural = _('связи профилей с группами')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['profile', 'group'], name='profiles_profile_to_group_unique'
+            ),
+        ]
 
 
 class ProfileGroup(TimeStampIndexedModel):
@@ -610,7 +650,7 @@ class Relation(TimeStampIndexedModel):
 #         verbose_name_plural = _('изображения профиля')
 
 
-class Contact(TimeStampedModel, ContactType):
+class Contact(TrackedFieldsMixin, TimeStampedModel, ContactType):
     type_validators = {ContactType.PHONE: phone_validator, ContactType.EMAIL: validate_email}
 
     user = models.ForeignKey(
@@ -630,11 +670,16 @@ class Contact(TimeStampedModel, ContactType):
         help_text=_('email удален, телефон не отвечает'),
     )
     contact_name = models.CharField(_('контактное лицо'), max_length=255, blank=True)
+    # номер в E.164 числом, только для телефонов; заполняется в save()
+    phone_key = models.BigIntegerField(_('телефон (E.164)'), null=True, blank=True, editable=False)
 
     objects = managers.ContactManager()
     default_manager = models.Manager()
     UserOwnsContact = managers.UserOwnsContact
 
+    # от этих полей зависят проверки в clean() и снятие прежнего основного контакта
+    tracked_fields = ('user_id', 'type', 'value', 'is_primary', 'is_confirmed', 'is_deleted')
+
     def __str__(self):
         return '{}[{}]: {}'.format(self.user, self.type, self.value)
 
@@ -655,10 +700,18 @@ class Contact(TimeStampedModel, ContactType):
                 raise ValidationError(_('У пользователя уже есть основной контакт такого типа'))
 
     def save(self, *args, **kwargs):
-        if self.is_primary and self.is_confirmed:
-            self.user.contacts.unset_primary(type=self.type, exclude_pk=self.pk)
-
-        self.full_clean()
+        changed_fields = self.get_changed_fields()
+        if changed_fields & {'type', 'value'}:
+            self.phone_key = normalize_phone(self.value) if self.type == ContactType.PHONE else None
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'phone_key'}
+
+        # без изменений отслеживаемых полей проверять и снимать основной контакт незачем
+        if changed_fields:
+            if self.is_primary and self.is_confirmed:
+                self.user.contacts.unset_primary(type=self.type, exclude_pk=self.pk)
+            self.full_clean()
         super(Contact, self).save(*args, **kwargs)
 
     @property
@@ -671,12 +724,28 @@ class Contact(TimeStampedModel, ContactType):
 
     def confirm(self):
         self.is_confirmed = True
-        self.save()
+        self.save_changed()
 
     class Meta:
         verbose_name = _('контакт')
         verbose_name_plural = _('контакты')
         unique_together = [('user', 'type', 'value')]
+        indexes = [
+            # поиск в админке, см. apps.core.admin.TrigramSearchMixin
+            GinIndex(fields=['value'], name='contact_value_trgm', opclasses=['gin_trgm_ops']),
+            # поиск по телефону, см. ContactMixin.filter_phone
+            models.Index(
+                fields=['phone_key'], name='contact_phone_key', condition=Q(phone_key__isnull=False)
+            ),
+        ]
+        constraints = [
+            # один подтвержденный основной телефон - один пользователь
+            models.UniqueConstraint(
+                fields=['phone_key'],
+                condition=Q(is_primary=True, is_confirmed=True, is_deleted=False),
+                name='contact_primary_phone_key_unique',
+            ),
+        ]
 
 
 class ContactVerification(TimeStampedModel):
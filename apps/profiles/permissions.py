@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from apps.profiles.identity import load_identity
+
 
 class IsProfileOwner(permissions.IsAuthenticated):
     """
@@ -19,6 +21,8 @@ class IsPatient(permissions.IsAuthenticated):
 
     def has_permission(self, request, view):
         is_auth = super(IsPatient, self).has_permission(request, view)
+        # первая проверка после аутентификации: профиль, пациент и врач одним запросом
+        load_identity(request.user)
         return is_auth and request.user.profile and request.user.profile.is_patient
 
 
@@ -29,4 +33,5 @@ class IsDoctor(permissions.IsAuthenticated):
 
     def has_permission(self, request, view):
         is_auth = super(IsDoctor, self).has_permission(request, view)
+        load_identity(request.user)
         return is_auth and request.user.profile and request.user.profile.is_doctor
@@ -0,0 +1,55 @@
+from django.test import TestCase
+
+from apps.profiles.address_book import NotificationAddressBook
+from apps.profiles.constants import ContactType
+from apps.profiles.models import User
+
+
+class NotificationAddressBookTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='notify@django_example.com')
+        cls.user.contacts.add_phone('79001111111')
+        cls.user.contacts.add_primary_phone('79002222222', is_confirmed=True)
+        cls.user.contacts.add_email('first@example.com', is_confirmed=True)
+
+        cls.unconfirmed_user = User.objects.create(username='unconfirmed@django_example.com')
+        cls.unconfirmed_user.contacts.add_phone('79003333333')
+        cls.unconfirmed_user.contacts.add_primary_email('stale@example.com', is_stale=True)
+
+        cls.empty_user = User.objects.create(username='empty@django_example.com')
+
+    def test_get_addresses(self):
+        with self.assertNumQueries(1):
+            addresses = NotificationAddressBook.get_addresses(
+                [self.user.pk, self.unconfirmed_user.pk, self.empty_user.pk]
+            )
+
+        address = addresses[self.user.pk]
+        self.assertEqual(address.phone, '79002222222')
+        self.assertEqual(address.email, 'first@example.com')
+        self.assertEqual(address.notifyable_types, {ContactType.PHONE})
+
+        address = addresses[self.unconfirmed_user.pk]
+        self.assertEqual((address.phone, address.email), ('79003333333', ''))
+        self.assertEqual(address.notifyable_types, frozenset())
+
+        address = addresses[self.empty_user.pk]
+        self.assertEqual((address.phone, address.email), ('', ''))
+
+    def test_user_helpers_match(self):
+        for user in (self.user, self.unconfirmed_user, self.empty_user):
+            with self.subTest(user=user):
+                address = NotificationAddressBook.get_addresses([user.pk])[user.pk]
+                self.assertEqual(user.get_notification_phone(), address.phone)
+                self.assertEqual(user.get_notification_email(), address.email)
+                self.assertEqual(
+                    address.notifyable_types, set(user.contacts.get_notifyable_types())
+                )
+
+    def test_prefetched_contacts(self):
+        user = User.objects.with_contacts().get(pk=self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_notification_phone(), '79002222222')
+            self.assertEqual(user.get_notification_email(), 'first@example.com')
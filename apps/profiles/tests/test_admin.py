@@ -0,0 +1,37 @@
+from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.test import RequestFactory, TestCase
+
+from apps.profiles.admin import ProfileAdmin
+from apps.profiles.factories import ProfileFactory, UserToProfileFactory
+from apps.profiles.models import Contact, Profile
+
+
+class ProfileAdminSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.by_contact = ProfileFactory(last_name='Orlova', first_name='Anna', patronymic='')
+        link = UserToProfileFactory(profile=cls.by_contact)
+        link.user.contacts.add_email('kuznetsova@example.com')
+        cls.by_name = ProfileFactory(last_name='Kuznetsov', first_name='Ivan', patronymic='')
+        cls.model_admin = ProfileAdmin(Profile, admin.site)
+
+    def _search(self, search_term):
+        request = RequestFactory().get('/', {SEARCH_VAR: search_term})
+        return self.model_admin.get_search_results(request, Profile.objects.all(), search_term)
+
+    def test_trigram_search__related_ranked(self):
+        queryset, _ = self._search('kuznetsova')
+
+        self.assertEqual(list(queryset.order_by('-search_rank')), [self.by_contact, self.by_name])
+
+    def test_trigram_search__limited_keeps_related_match(self):
+        self.model_admin.trigram_search_limit = 1
+        self.addCleanup(delattr, self.model_admin, 'trigram_search_limit')
+
+        queryset, _ = self._search('kuznetsova')
+
+        self.assertEqual(list(queryset), [self.by_contact])
+
+    def test_contact_value_index(self):
+        self.assertIn('contact_value_trgm', [index.name for index in Contact._meta.indexes])
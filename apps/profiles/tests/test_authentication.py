@@ -0,0 +1,115 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from mock import patch
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.clinics.factories import PatientUserFactory
+from apps.core.constants import SYSTEM_SERVICE
+from apps.profiles.authentication import CachedTokenAuthentication
+from apps.profiles.handlers import UserHandler
+from apps.profiles.identity import load_identity
+from apps.profiles.models import User
+from apps.profiles.token_cache import TokenIdentityCache
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = PatientUserFactory().patient
+        cls.user_id = cls.patient.profile.user.pk
+
+    def setUp(self) -> None:
+        TokenIdentityCache.clear_local()
+        self.user = User.objects.get(pk=self.user_id)
+        self.token_key = self.user.get_drf_token().key
+        self.authentication = CachedTokenAuthentication()
+
+    def test_cached_after_first_call(self):
+        self.authentication.authenticate_credentials(self.token_key)
+
+        with self.assertNumQueries(0):
+            user, token = self.authentication.authenticate_credentials(self.token_key)
+            self.assertEqual(user.pk, self.user_id)
+            self.assertEqual(user.username, self.user.username)
+            self.assertEqual(token.key, self.token_key)
+
+    def test_identity_profile_reused(self):
+        self.authentication.authenticate_credentials(self.token_key)
+        TokenIdentityCache.clear_local()
+
+        user, _ = self.authentication.authenticate_credentials(self.token_key)
+        self.assertEqual(user._identity_profile_id, self.patient.profile_id)
+        with self.assertNumQueries(1):
+            self.assertEqual(load_identity(user).patient, self.patient)
+
+    def test_recreate_token_invalidates(self):
+        self.authentication.authenticate_credentials(self.token_key)
+
+        self.user.recreate_token()
+
+        self.assertIsNone(TokenIdentityCache.get(self.token_key))
+
+    def test_token_delete_invalidates(self):
+        self.authentication.authenticate_credentials(self.token_key)
+
+        Token.objects.filter(key=self.token_key).delete()
+
+        self.assertIsNone(TokenIdentityCache.get(self.token_key))
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.token_key)
+
+    def test_user_delete_invalidates(self):
+        self.authentication.authenticate_credentials(self.token_key)
+
+        self.user.delete()
+
+        self.assertIsNone(TokenIdentityCache.get(self.token_key))
+
+    def test_deactivation_invalidates(self):
+        self.authentication.authenticate_credentials(self.token_key)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(TokenIdentityCache.get(self.token_key))
+
+    def test_groups_change_invalidates(self):
+        identity = self.authentication.build_identity(self.user)
+        self.assertFalse(identity.is_system_service)
+        self.authentication.authenticate_credentials(self.token_key)
+
+        group, _ = Group.objects.get_or_create(name=SYSTEM_SERVICE)
+        self.user.groups.add(group)
+        self.assertIsNone(TokenIdentityCache.get(self.token_key))
+
+        user, _ = self.authentication.authenticate_credentials(self.token_key)
+        self.assertTrue(user._is_system_service)
+
+        self.authentication.authenticate_credentials(self.token_key)
+        group.user_set.clear()
+        self.assertIsNone(TokenIdentityCache.get(self.token_key))
+
+    def test_recreate_token_invalidates_after_commit(self):
+        identity = self.authentication.build_identity(self.user)
+
+        with patch('apps.core.cache_utils.transaction.on_commit') as on_commit:
+            self.user.recreate_token()
+        # параллельный запрос успел закэшировать старый токен до коммита
+        TokenIdentityCache.set(self.token_key, identity)
+        TokenIdentityCache.clear_local()
+        on_commit.call_args[0][0]()
+
+        self.assertIsNone(TokenIdentityCache.get(self.token_key))
+
+    def test_cached_user_save_keeps_other_columns(self):
+        self.authentication.authenticate_credentials(self.token_key)
+        user, _ = self.authentication.authenticate_credentials(self.token_key)
+        User.objects.filter(pk=self.user_id).update(name='Renamed')
+        contact = user.contacts.add_primary_phone('79001234567', is_confirmed=True)
+
+        UserHandler(user)._post_confirm_contact_hook(contact)
+
+        user = User.objects.get(pk=self.user_id)
+        self.assertNotEqual(user.username, self.user.username)
+        self.assertEqual(user.name, 'Renamed')
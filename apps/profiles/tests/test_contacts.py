@@ -0,0 +1,66 @@
+from django.test import SimpleTestCase, TestCase
+from rest_framework.exceptions import ValidationError
+
+from apps.profiles.models import Contact, User
+from apps.profiles.utils import normalize_phone
+
+
+class NormalizePhoneTest(SimpleTestCase):
+    def test_formats(self):
+        for value in ('79001234567', '+7 (900) 123-45-67', '89001234567', '9001234567'):
+            with self.subTest(value=value):
+                self.assertEqual(normalize_phone(value), 79001234567)
+
+    def test_invalid(self):
+        for value in ('', None, '123', '0123456789', '1234567890123456'):
+            with self.subTest(value=value):
+                self.assertIsNone(normalize_phone(value))
+
+
+class ContactPhoneKeyTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='phone_owner@django_example.com')
+        cls.other_user = User.objects.create(username='phone_other@django_example.com')
+
+    def test_phone_key_saved(self):
+        contact = self.user.contacts.add_phone('79001234567')
+
+        self.assertEqual(contact.phone_key, 79001234567)
+        self.assertIsNone(self.user.contacts.add_email('Owner@Example.com').phone_key)
+
+    def test_filter_phone_any_format(self):
+        contact = self.user.contacts.add_phone('79001234567')
+
+        self.assertEqual(list(Contact.objects.filter_phone('8 900 123 45 67')), [contact])
+        self.assertEqual(list(self.user.contacts.filter_phone('+79001234567')), [contact])
+        self.assertFalse(self.other_user.contacts.filter_phone('79001234567').exists())
+
+    def test_add_contact_confirmed_by_other_user(self):
+        self.other_user.contacts.add_primary_phone('79001234567', is_confirmed=True)
+
+        with self.assertRaises(ValidationError):
+            self.user.contacts.add_phone('89001234567')
+
+    def test_add_contact_owned(self):
+        self.user.contacts.add_phone('79001234567', is_confirmed=True)
+
+        with self.assertRaises(Contact.UserOwnsContact):
+            self.user.contacts.add_phone('89001234567')
+
+    def test_add_contact_reactivates_deleted(self):
+        contact = self.user.contacts.add_phone('79001234567')
+        self.user.contacts.delete_phone('79001234567')
+
+        reactivated = self.user.contacts.add_phone('79001234567')
+        self.assertEqual(reactivated.pk, contact.pk)
+        self.assertFalse(reactivated.is_deleted)
+
+    def test_with_contacts(self):
+        self.user.contacts.add_primary_phone('79001234567', is_confirmed=True)
+        self.user.contacts.add_primary_email('owner@example.com', is_confirmed=True)
+
+        user = User.objects.with_contacts().get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.contacts.phone, '79001234567')
+            self.assertEqual(user.contacts.email, 'owner@example.com')
@@ -0,0 +1,39 @@
+from django.test import TestCase
+
+from apps.clinics.factories import PatientUserFactory
+from apps.profiles.identity import load_identity
+from apps.profiles.models import User
+
+
+class LoadIdentityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = PatientUserFactory().patient
+
+    def _get_user(self) -> User:
+        return User.objects.get(pk=self.patient.profile.user.pk)
+
+    def test_single_query(self):
+        user = self._get_user()
+
+        with self.assertNumQueries(1):
+            profile = load_identity(user)
+            self.assertEqual(user.profile, profile)
+            self.assertEqual(profile.user, user)
+            self.assertEqual(user.profile.patient, self.patient)
+            self.assertFalse(hasattr(user.profile, 'doctor'))
+            self.assertTrue(user.is_patient)
+
+    def test_loaded_once(self):
+        user = self._get_user()
+        load_identity(user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(load_identity(user).patient, self.patient)
+
+    def test_user_without_profile(self):
+        user = User.objects.create(username='no_profile@django_example.com')
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(load_identity(user))
+            self.assertIsNone(user.profile)
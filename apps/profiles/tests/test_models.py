@@ -0,0 +1,79 @@
+from django.test import TestCase
+from django.utils import timezone
+from mock import patch
+
+from apps.profiles.models import Contact, User
+
+
+class TrackedFieldsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='tracked@django_example.com')
+        cls.contact = cls.user.contacts.add_phone('79001234567')
+
+    def _get_user(self) -> User:
+        return User.objects.get(pk=self.user.pk)
+
+    def test_changed_fields(self):
+        user = self._get_user()
+        self.assertEqual(user.get_changed_fields(), set())
+
+        user.is_active = False
+        user.last_visited = timezone.now()
+        self.assertEqual(user.get_changed_fields(), {'is_active'})
+
+        user.save()
+        self.assertFalse(user.has_changed())
+
+    def test_deferred_fields_not_tracked(self):
+        user = User.objects.only('id', 'username').get(pk=self.user.pk)
+
+        user.is_active = False
+        self.assertFalse(user.has_changed('is_active'))
+
+    @patch('apps.profiles.models.TokenIdentityCache.invalidate_users')
+    def test_mark_visited(self, invalidate_users):
+        user = self._get_user()
+
+        with self.assertNumQueries(1):
+            user.mark_visited()
+        invalidate_users.assert_not_called()
+        self.assertIsNotNone(self._get_user().last_visited)
+
+    @patch('apps.profiles.models.TokenIdentityCache.invalidate_users')
+    def test_user_save_invalidates_on_change(self, invalidate_users):
+        user = self._get_user()
+
+        with self.assertNumQueries(1):
+            user.save()
+        invalidate_users.assert_not_called()
+
+        user.is_active = False
+        user.save()
+        invalidate_users.assert_called_once_with([user.pk])
+
+    def test_contact_save_unchanged(self):
+        contact = Contact.objects.get(pk=self.contact.pk)
+
+        with self.assertNumQueries(1):
+            contact.is_shown = True
+            contact.save(update_fields=['is_shown'])
+
+    def test_contact_save_changed_value(self):
+        contact = Contact.objects.get(pk=self.contact.pk)
+
+        contact.value = '79007654321'
+        contact.save(update_fields=['value'])
+
+        self.assertEqual(Contact.objects.get(pk=contact.pk).phone_key, 79007654321)
+
+    def test_contact_save_changed(self):
+        contact = Contact.objects.get(pk=self.contact.pk)
+
+        self.assertTrue(contact.save_changed('is_shown'))
+        contact.is_confirmed = True
+        self.assertEqual(contact.get_changed_fields(), {'is_confirmed'})
+        contact.confirm()
+
+        self.assertFalse(contact.has_changed())
+        self.assertTrue(Contact.objects.get(pk=contact.pk).is_confirmed)
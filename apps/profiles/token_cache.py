@@ -0,0 +1,114 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+
+from apps.core.cache_utils import invalidate_on_commit
+
+
+class TokenIdentity(NamedTuple):
+    # значения полей пользователя (кроме пароля), см. CachedTokenAuthentication.build_identity
+    user_values: Dict[str, Any]
+    is_system_service: bool
+    profile_id: Optional[int]
+
+    @property
+    def is_active(self) -> bool:
+        return self.user_values['is_active']
+
+
+class TokenIdentityCache:
+    """
+    token -> TokenIdentity: в общем django cache (Redis, см. CACHES) и в коротком LRU процесса.
+
+    Записи удаляются при смене и удалении токена, сохранении пользователя и изменении
+    его групп (см. `invalidate_users`) - сразу и еще раз после коммита транзакции.
+    Локальная копия другого процесса живет не дольше LOCAL_TIMEOUT секунд.
+    """
+
+    CACHE_KEY = 'profiles:token_identity:v1:{}'
+    TIMEOUT = 10 * 60
+    LOCAL_TIMEOUT = 10
+    LOCAL_MAXSIZE = 1024
+
+    _lock = threading.Lock()
+    _local: 'OrderedDict[str, Tuple[float, TokenIdentity]]' = OrderedDict()
+
+    @classmethod
+    def get_cache_key(cls, token_key: str) -> str:
+        # сам токен в ключах кэша не храним
+        return cls.CACHE_KEY.format(hashlib.sha256(token_key.encode()).hexdigest()[:32])
+
+    @classmethod
+    def _remember_locally(cls, cache_key: str, identity: TokenIdentity) -> None:
+        with cls._lock:
+            cls._local[cache_key] = (time.monotonic() + cls.LOCAL_TIMEOUT, identity)
+            cls._local.move_to_end(cache_key)
+            while len(cls._local) > cls.LOCAL_MAXSIZE:
+                cls._local.popitem(last=False)
+
+    @classmethod
+    def get(cls, token_key: str) -> Optional[TokenIdentity]:
+        cache_key = cls.get_cache_key(token_key)
+        with cls._lock:
+            item = cls._local.get(cache_key)
+            if item is not None and item[0] > time.monotonic():
+                cls._local.move_to_end(cache_key)
+                return item[1]
+
+        value = cache.get(cache_key)
+        if value is None:
+            return None
+        identity = TokenIdentity(**value)
+        cls._remember_locally(cache_key, identity)
+        return identity
+
+    @classmethod
+    def set(cls, token_key: str, identity: TokenIdentity) -> None:
+        cache_key = cls.get_cache_key(token_key)
+        cache.set(cache_key, identity._asdict(), cls.TIMEOUT)
+        cls._remember_locally(cache_key, identity)
+
+    @classmethod
+    def invalidate(cls, token_keys: Iterable[str]) -> None:
+        cache_keys = [cls.get_cache_key(token_key) for token_key in token_keys]
+        if not cache_keys:
+            return
+        cache.delete_many(cache_keys)
+        with cls._lock:
+            for cache_key in cache_keys:
+                cls._local.pop(cache_key, None)
+
+    @classmethod
+    def invalidate_users(cls, user_ids: Iterable[int]) -> None:
+        token_keys = Token.objects.filter(user_id__in=list(user_ids)).values_list('key', flat=True)
+        cls.invalidate(list(token_keys))
+
+    @classmethod
+    def clear_local(cls) -> None:
+        with cls._lock:
+            cls._local.clear()
+
+
+def invalidate_on_groups_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """ m2m_changed для User.groups, см. ProfilesConfig.ready """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_on_commit(TokenIdentityCache.invalidate_users, [instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        invalidate_on_commit(TokenIdentityCache.invalidate_users, list(pk_set))
+    elif action == 'pre_clear':
+        user_ids = list(instance.user_set.values_list('pk', flat=True))
+        invalidate_on_commit(TokenIdentityCache.invalidate_users, user_ids)
+
+
+def invalidate_on_token_delete(sender, instance, **kwargs):
+    """
+    post_delete для Token, см. ProfilesConfig.ready: удаление токена в админке
+    и удаление пользователя (токен удаляется каскадом)
+    """
+    invalidate_on_commit(TokenIdentityCache.invalidate, [instance.key])
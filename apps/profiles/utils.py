@@ -1,9 +1,13 @@
 # coding: utf-8
+import re
 from datetime import timedelta
+from typing import Optional
 
 from django.conf import settings
 from django.utils import timezone
 
+from apps.profiles.constants import DEFAULT_PHONE_COUNTRY_CODE
+
 
 def lookup_user(email=None, phone=None):
     """
@@ -23,6 +27,22 @@ def lookup_user(email=None, phone=None):
     return None
 
 
+def normalize_phone(value: Optional[str]) -> Optional[int]:
+    """
+    Номер телефона в E.164 без '+', числом - ключ Contact.phone_key.
+    Национальный формат (8XXXXXXXXXX или 10 цифр) приводится к DEFAULT_PHONE_COUNTRY_CODE.
+    None - если номер не похож на E.164
+    """
+    digits = re.sub(r'\D', '', value or '')
+    if len(digits) == 11 and digits.startswith('8'):
+        digits = DEFAULT_PHONE_COUNTRY_CODE + digits[1:]
+    elif len(digits) == 10 and digits.startswith('9'):
+        digits = DEFAULT_PHONE_COUNTRY_CODE + digits
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+    return int(digits)
+
+
 def phone_change_timeout():
     return timezone.now() + timedelta(seconds=settings.PRIMARY_PHONE_CONFIRM_AND_CHANGE_TIMEOUT)
 
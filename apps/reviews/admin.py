@@ -4,16 +4,16 @@ from django.contrib import admin
 from django.utils.translation import ugettext_lazy as _
 
 from apps.appointments.constants import AUTHOR_PATIENT, APPOINTMENT_ID, APPOINTMENT, DOCTOR, SERVICE
-from apps.core.admin import DisplayableAdmin, get_change_href
+from apps.core.admin import DisplayableAdmin, TrigramSearchMixin, get_change_href
 from apps.core.constants import CREATED, MODIFIED
 from apps.feature_toggles.ops_features import is_reviews_enabled
 from apps.reviews.admin_tools import HasTextFilter
 from apps.reviews.constants import GRADE
-from apps.reviews.models import Review
+from apps.reviews.models import DoctorReviewStats, Review
 
 
 @admin.register(Review)
-class ReviewAdmin(DisplayableAdmin):
+class ReviewAdmin(TrigramSearchMixin, DisplayableAdmin):
     date_hierarchy = CREATED
     list_display = (
         'id',
@@ -51,6 +51,15 @@ class ReviewAdmin(DisplayableAdmin):
         APPOINTMENT_ID,
         'appointment__id',
     )
+    trigram_search_fields = (
+        f'{AUTHOR_PATIENT}__profile__full_name',
+        f'{AUTHOR_PATIENT}__profile__users__username',
+        f'{AUTHOR_PATIENT}__profile__users__contacts__value',
+        'text',
+        f'{DOCTOR}__profile__full_name',
+        f'{DOCTOR}__public_full_name',
+        f'{DOCTOR}__public_short_name',
+    )
     readonly_fields = (
         CREATED,
         MODIFIED,
@@ -129,5 +138,66 @@ class ReviewAdmin(DisplayableAdmin):
     get_doctor_link.allow_tags = True
 
 
+@admin.register(DoctorReviewStats)
+class DoctorReviewStatsAdmin(admin.ModelAdmin):
+    """
+    Отчет по оценкам врачей: только из DoctorReviewStats, таблицу отзывов не читает
+    """
+
+    list_display = (
+        'doctor',
+        'get_doctor_link',
+        'reviews_count',
+        'get_average_grade',
+        'get_average_grade_30d',
+        'get_average_grade_90d',
+        'grade_5',
+        'grade_4',
+        'grade_3',
+        'grade_2',
+        'grade_1',
+        MODIFIED,
+    )
+    list_select_related = (DOCTOR, f'{DOCTOR}__profile')
+    search_fields = (
+        f'{DOCTOR}__profile__full_name',
+        f'{DOCTOR}__public_full_name',
+        f'{DOCTOR}__public_short_name',
+    )
+    ordering = ('-reviews_count',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_doctor_link(self, obj: DoctorReviewStats) -> str:
+        doctor = obj.doctor
+        return get_change_href(doctor, label=f'{doctor.short_full_name}')
+
+    get_doctor_link.short_description = _('доктор (ссылка)')
+    get_doctor_link.allow_tags = True
+
+    def get_average_grade(self, obj: DoctorReviewStats) -> Optional[float]:
+        return obj.average_grade
+
+    get_average_grade.short_description = _('средняя оценка')
+
+    def get_average_grade_30d(self, obj: DoctorReviewStats) -> Optional[float]:
+        return obj.average_grade_30d
+
+    get_average_grade_30d.short_description = _('средняя за 30 дней')
+
+    def get_average_grade_90d(self, obj: DoctorReviewStats) -> Optional[float]:
+        return obj.average_grade_90d
+
+    get_average_grade_90d.short_description = _('средняя за 90 дней')
+
+
 if not is_reviews_enabled.is_enabled:
     admin.site.unregister(Review)
+    admin.site.unregister(DoctorReviewStats)
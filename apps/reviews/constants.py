@@ -6,6 +6,14 @@ GRADE = 'grade'
 
 MAX_REVIEW_REQUEST_DAYS = 7
 
+# сколько завершенных приемов обрабатывается за раз при массовом запросе отзывов
+REVIEW_REQUEST_CHUNK_SIZE = 500
+
+# окна скользящих средних оценок в DoctorReviewStats, дней
+REVIEW_STATS_WINDOWS_DAYS = (30, 90)
+# сколько врачей пересчитывается за раз при ночной сверке DoctorReviewStats
+REVIEW_STATS_RECONCILE_CHUNK_SIZE = 500
+
 
 class ReviewStatus(BaseStatus):
     NEW = 0
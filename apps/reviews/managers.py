@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.db.models import Manager
 
 from apps.appointments.constants import AUTHOR_PATIENT, APPOINTMENT
@@ -5,7 +6,42 @@ from apps.clinics.models import Doctor
 from apps.core.models import DisplayableQuerySet
 
 
+# поля, от которых зависит DoctorReviewStats
+STATS_FIELDS = {'doctor', 'doctor_id', 'is_displayed', 'grade', 'created'}
+
+
 class ReviewQuerySet(DisplayableQuerySet):
+    def update(self, **kwargs):
+        """
+        Массовое изменение (в т.ч. mark_displayed/mark_hidden из админки) минует save(),
+        поэтому статистику затронутых врачей пересчитываем целиком
+        """
+        if not STATS_FIELDS & set(kwargs):
+            return super().update(**kwargs)
+
+        from apps.reviews.models import DoctorReviewStats
+
+        with transaction.atomic():
+            doctor_ids = set(self.order_by().values_list('doctor_id', flat=True).distinct())
+            rows = super().update(**kwargs)
+            new_doctor = kwargs.get('doctor_id', kwargs.get('doctor'))
+            if new_doctor is not None:
+                doctor_ids.add(getattr(new_doctor, 'pk', new_doctor))
+            DoctorReviewStats.recalculate(doctor_ids)
+        return rows
+
+    def delete(self):
+        """
+        Массовое удаление минует Review.delete() - пересчитываем затронутых врачей
+        """
+        from apps.reviews.models import DoctorReviewStats
+
+        with transaction.atomic():
+            doctor_ids = set(self.order_by().values_list('doctor_id', flat=True).distinct())
+            result = super().delete()
+            DoctorReviewStats.recalculate(doctor_ids)
+        return result
+
     def created_by_patient(self, patient_id: int):
         return self.filter(author_patient_id=patient_id)
 
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.12 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_trigram_indexes'),
+        ('reviews', '0004_auto_20210528_1446'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['text'], name='review_text_trgm', opclasses=['gin_trgm_ops']
+            ),
+        ),
+    ]
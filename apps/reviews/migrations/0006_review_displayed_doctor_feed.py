@@ -0,0 +1,21 @@
+# Generated by Django 3.1.12 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_review_text_trgm'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(
+                condition=models.Q(is_displayed=True),
+                fields=['doctor', '-created', '-id'],
+                name='review_displayed_doctor_feed',
+            ),
+        ),
+    ]
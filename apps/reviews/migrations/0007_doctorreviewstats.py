@@ -0,0 +1,38 @@
+# Generated by Django 3.1.12 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0012_auto_20210216_2339'),
+        ('reviews', '0006_review_displayed_doctor_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorReviewStats',
+            fields=[
+                ('doctor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='review_stats', serialize=False, to='clinics.doctor', verbose_name='врач')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='отзывов')),
+                ('grade_1', models.PositiveIntegerField(default=0, verbose_name='оценок 1')),
+                ('grade_2', models.PositiveIntegerField(default=0, verbose_name='оценок 2')),
+                ('grade_3', models.PositiveIntegerField(default=0, verbose_name='оценок 3')),
+                ('grade_4', models.PositiveIntegerField(default=0, verbose_name='оценок 4')),
+                ('grade_5', models.PositiveIntegerField(default=0, verbose_name='оценок 5')),
+                ('grades_sum', models.PositiveIntegerField(default=0, verbose_name='сумма оценок')),
+                ('grades_count_30d', models.PositiveIntegerField(default=0, verbose_name='оценок за 30 дней')),
+                ('grades_sum_30d', models.PositiveIntegerField(default=0, verbose_name='сумма оценок за 30 дней')),
+                ('grades_count_90d', models.PositiveIntegerField(default=0, verbose_name='оценок за 90 дней')),
+                ('grades_sum_90d', models.PositiveIntegerField(default=0, verbose_name='сумма оценок за 90 дней')),
+                ('modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='modified')),
+            ],
+            options={
+                'verbose_name': 'Статистика отзывов врача',
+                'verbose_name_plural': 'Статистика отзывов врачей',
+            },
+        ),
+    ]
@@ -1,10 +1,18 @@
-from django.db import models
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 
 from apps.core.models import TimeStampIndexedModel, DisplayableModel
 from apps.reviews import managers
-from apps.reviews.constants import ReviewStatus
+from apps.reviews.constants import ReviewStatus, REVIEW_STATS_WINDOWS_DAYS
 
 
 class ReviewGrade:
@@ -92,9 +100,57 @@ class Review(TimeStampIndexedModel, DisplayableModel, ReviewStatusMixin):
     class Meta:
         verbose_name = _('Отзыв')
         verbose_name_plural = _('Отзывы')
+        # поиск в админке, см. apps.core.admin.TrigramSearchMixin
+        indexes = [
+            GinIndex(fields=['text'], name='review_text_trgm', opclasses=['gin_trgm_ops']),
+            # лента отзывов врача, см. ReviewPagination
+            models.Index(
+                fields=['doctor', '-created', '-id'],
+                name='review_displayed_doctor_feed',
+                condition=Q(is_displayed=True),
+            ),
+        ]
 
     objects = managers.ReviewManager()
 
+    # состояние из БД для инкрементального обновления DoctorReviewStats, см. save()
+    _stats_state: Optional['ReviewStatsState'] = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not set(ReviewStatsState._fields) - set(instance.__dict__):
+            instance._stats_state = instance.get_stats_state()
+        return instance
+
+    def get_stats_state(self) -> 'ReviewStatsState':
+        return ReviewStatsState(self.doctor_id, self.is_displayed, self.grade, self.created)
+
+    def save(self, *args, **kwargs):
+        is_adding = self._state.adding
+        old_state = self._stats_state
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            new_state = self.get_stats_state()
+            if is_adding or old_state is not None:
+                DoctorReviewStats.apply_review_change(old_state, new_state)
+            elif self.doctor_id:
+                # загружен без нужных полей (.only/.defer) - прежнее состояние неизвестно
+                DoctorReviewStats.recalculate([self.doctor_id])
+        self._stats_state = new_state
+
+    def delete(self, *args, **kwargs):
+        old_state = self._stats_state
+        doctor_id = self.doctor_id
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if old_state is not None:
+                DoctorReviewStats.apply_review_change(old_state, None)
+            elif doctor_id:
+                DoctorReviewStats.recalculate([doctor_id])
+        self._stats_state = None
+        return result
+
     @cached_property
     def short_str(self):
         return f"Оценка {self.grade}, author_patient_id={self.author_patient_id}, doctor_id={self.doctor_id}"
@@ -108,3 +164,172 @@ class Review(TimeStampIndexedModel, DisplayableModel, ReviewStatusMixin):
 
     def __str__(self):
         return self.short_str
+
+
+class ReviewStatsState(NamedTuple):
+    doctor_id: Optional[int]
+    is_displayed: bool
+    grade: Optional[int]
+    created: Optional[datetime]
+
+
+class DoctorReviewStats(models.Model):
+    """
+    Статистика отображаемых отзывов врача: гистограмма оценок, итоги и суммы
+    за последние 30/90 дней (по дате создания отзыва).
+
+    При сохранении и удалении отзыва строка меняется на разницу состояний
+    (см. Review.save, Review.delete), при массовом update/delete отзывов - пересчитывается
+    для затронутых врачей (см. ReviewQuerySet). Окна сдвигаются со временем, поэтому раз в сутки
+    все строки сверяются с отзывами (ReconcileDoctorReviewStatsTask).
+    """
+
+    doctor = models.OneToOneField(
+        'clinics.Doctor',
+        verbose_name=_('врач'),
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='review_stats',
+    )
+    reviews_count = models.PositiveIntegerField(_('отзывов'), default=0)
+    grade_1 = models.PositiveIntegerField(_('оценок 1'), default=0)
+    grade_2 = models.PositiveIntegerField(_('оценок 2'), default=0)
+    grade_3 = models.PositiveIntegerField(_('оценок 3'), default=0)
+    grade_4 = models.PositiveIntegerField(_('оценок 4'), default=0)
+    grade_5 = models.PositiveIntegerField(_('оценок 5'), default=0)
+    grades_sum = models.PositiveIntegerField(_('сумма оценок'), default=0)
+    grades_count_30d = models.PositiveIntegerField(_('оценок за 30 дней'), default=0)
+    grades_sum_30d = models.PositiveIntegerField(_('сумма оценок за 30 дней'), default=0)
+    grades_count_90d = models.PositiveIntegerField(_('оценок за 90 дней'), default=0)
+    grades_sum_90d = models.PositiveIntegerField(_('сумма оценок за 90 дней'), default=0)
+    modified = models.DateTimeField(_('modified'), default=timezone.now)
+
+    COUNTER_FIELDS = (
+        'reviews_count',
+        *(f'grade_{grade}' for grade in ReviewGrade.ITEMS),
+        'grades_sum',
+        *(
+            f'grades_{name}_{days}d'
+            for days in REVIEW_STATS_WINDOWS_DAYS
+            for name in ('count', 'sum')
+        ),
+    )
+
+    class Meta:
+        verbose_name = _('Статистика отзывов врача')
+        verbose_name_plural = _('Статистика отзывов врачей')
+
+    def __str__(self):
+        return f"Статистика отзывов врача {self.doctor_id}"
+
+    @property
+    def histogram(self) -> Dict[str, int]:
+        return {str(grade): getattr(self, f'grade_{grade}') for grade in ReviewGrade.ITEMS}
+
+    @property
+    def grades_count(self) -> int:
+        return sum(self.histogram.values())
+
+    @staticmethod
+    def _average(grades_sum: int, grades_count: int) -> Optional[float]:
+        if not grades_count:
+            return None
+        return round(grades_sum / grades_count, 1)
+
+    @property
+    def average_grade(self) -> Optional[float]:
+        return self._average(self.grades_sum, self.grades_count)
+
+    @property
+    def average_grade_30d(self) -> Optional[float]:
+        return self._average(self.grades_sum_30d, self.grades_count_30d)
+
+    @property
+    def average_grade_90d(self) -> Optional[float]:
+        return self._average(self.grades_sum_90d, self.grades_count_90d)
+
+    @classmethod
+    def get_review_deltas(cls, state: ReviewStatsState, sign: int, now: datetime) -> Dict[str, int]:
+        """
+        Вклад одного отзыва в счетчики, со знаком `sign`
+        """
+        if not state.is_displayed or not state.doctor_id:
+            return {}
+        deltas = {'reviews_count': sign}
+        if state.grade:
+            deltas[f'grade_{state.grade}'] = sign
+            deltas['grades_sum'] = sign * state.grade
+            for days in REVIEW_STATS_WINDOWS_DAYS:
+                if state.created and state.created >= now - timedelta(days=days):
+                    deltas[f'grades_count_{days}d'] = sign
+                    deltas[f'grades_sum_{days}d'] = sign * state.grade
+        return deltas
+
+    @classmethod
+    def apply_review_change(
+        cls, old_state: Optional[ReviewStatsState], new_state: Optional[ReviewStatsState]
+    ) -> None:
+        """
+        Инкрементальное обновление: вычитаем прежнее состояние отзыва, прибавляем новое.
+        Врачу без строки статистики она считается целиком
+        """
+        now = timezone.now()
+        deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for state, sign in ((old_state, -1), (new_state, 1)):
+            if state is None:
+                continue
+            for field_name, delta in cls.get_review_deltas(state, sign, now).items():
+                deltas[state.doctor_id][field_name] += delta
+
+        missing_doctor_ids = []
+        for doctor_id, doctor_deltas in deltas.items():
+            changes = {name: F(name) + delta for name, delta in doctor_deltas.items() if delta}
+            if not changes:
+                continue
+            if not cls.objects.filter(doctor_id=doctor_id).update(modified=now, **changes):
+                missing_doctor_ids.append(doctor_id)
+        if missing_doctor_ids:
+            cls.recalculate(missing_doctor_ids)
+
+    @classmethod
+    def recalculate(cls, doctor_ids: Iterable[int]) -> None:
+        """
+        Полный пересчет строк врачей `doctor_ids` одним агрегирующим запросом по отзывам
+        """
+        doctor_ids = set(doctor_ids)
+        if not doctor_ids:
+            return
+        now = timezone.now()
+        aggregates = {
+            'reviews_count': Count('id'),
+            'grades_sum': Coalesce(Sum('grade'), 0),
+        }
+        for grade in ReviewGrade.ITEMS:
+            aggregates[f'grade_{grade}'] = Count('id', filter=Q(grade=grade))
+        for days in REVIEW_STATS_WINDOWS_DAYS:
+            in_window = Q(grade__isnull=False, created__gte=now - timedelta(days=days))
+            aggregates[f'grades_count_{days}d'] = Count('id', filter=in_window)
+            aggregates[f'grades_sum_{days}d'] = Coalesce(Sum('grade', filter=in_window), 0)
+
+        rows = (
+            Review._base_manager.filter(doctor_id__in=doctor_ids, is_displayed=True)
+            .order_by()
+            .values('doctor_id')
+            .annotate(**aggregates)
+        )
+        values_by_doctor = {row.pop('doctor_id'): row for row in rows}
+
+        existing_ids = set(
+            cls.objects.filter(doctor_id__in=doctor_ids).values_list('doctor_id', flat=True)
+        )
+        to_update, to_create = [], []
+        for doctor_id in doctor_ids:
+            values = values_by_doctor.get(doctor_id, {})
+            stats = cls(
+                doctor_id=doctor_id,
+                modified=now,
+                **{name: values.get(name, 0) for name in cls.COUNTER_FIELDS},
+            )
+            (to_update if doctor_id in existing_ids else to_create).append(stats)
+        cls.objects.bulk_update(to_update, fields=[*cls.COUNTER_FIELDS, 'modified'])
+        cls.objects.bulk_create(to_create, ignore_conflicts=True)
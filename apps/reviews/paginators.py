@@ -1,5 +1,14 @@
-from rest_framework.pagination import PageNumberPagination, LimitOffsetPagination
+from rest_framework.pagination import CursorPagination
 
 
-class ReviewPagination(LimitOffsetPagination):
-    default_limit = 100
+class ReviewPagination(CursorPagination):
+    """
+    Курсорная пагинация без COUNT: новые отзывы первыми. Курсор `?cursor=` хранит
+    позицию по `created` (первое поле ordering) и смещение среди отзывов с тем же `created`;
+    `id` только делает порядок стабильным. См. индекс `review_displayed_doctor_feed`
+    """
+
+    ordering = ('-created', '-id')
+    page_size = 100
+    page_size_query_param = 'limit'
+    max_page_size = 100
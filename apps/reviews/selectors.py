@@ -1,7 +1,15 @@
-from typing import Type, Union
+from datetime import timedelta
+from typing import Optional, Type, Union
 
-from apps.clinics.models import Doctor
+from django.db.models import Exists, OuterRef, Q
+
+from apps.appointments.constants import AppointmentStatus
+from apps.appointments.models import Appointment
+from apps.clinics.models import Doctor, Patient
 from apps.core.selectors import DisplayedSelector
+from apps.core.utils import now_in_default_tz
+from apps.reviews.constants import MAX_REVIEW_REQUEST_DAYS
+from apps.profiles.models import Relation
 from apps.reviews.models import Review
 
 
@@ -59,3 +67,44 @@ class ReviewSelector(DisplayedSelector):
             # qs = qs.filter(services__id__in=with_ancestors)
             qs = qs.filter(doctor_id=doctor_id)
         return qs
+
+    @classmethod
+    def appointments_to_ask_for_review(cls):
+        """
+        Завершенные приемы без отзывов, по которым еще можно просить отзыв
+        (условия `is_adding_review_allowed`, кроме feature toggle, одним запросом)
+        :rtype: apps.appointments.managers.AppointmentQuerySet
+        """
+        # `delta.days > MAX_REVIEW_REQUEST_DAYS` в is_adding_review_allowed
+        min_end = now_in_default_tz() - timedelta(days=MAX_REVIEW_REQUEST_DAYS + 1)
+        return Appointment.objects.filter(
+            Q(end__isnull=True) | Q(end__gt=min_end),
+            ~Exists(cls.model.objects.filter(appointment=OuterRef('pk'))),
+            status=AppointmentStatus.FINISHED,
+        )
+
+    @classmethod
+    def appointment_for_patient_review(
+        cls, patient: Patient, appointment_id: int
+    ) -> Optional[Appointment]:
+        """
+        Запись пациента или его зависимого профиля (как `PatientAppointments(patient).all()`)
+        вместе с врачом и признаком `is_reviewed_by_patient` - одним запросом.
+        None - если такой записи у пациента нет
+        """
+        is_related = Exists(
+            Relation.objects.filter(
+                master_id=patient.profile_id,
+                slave_id=OuterRef('patient__profile_id'),
+                can_update_slave_appointments=True,
+            )
+        )
+        is_reviewed = Exists(
+            cls.model.objects.filter(appointment=OuterRef('pk'), author_patient=patient)
+        )
+        return (
+            Appointment.objects.filter(Q(patient=patient) | is_related, id=appointment_id)
+            .annotate(is_reviewed_by_patient=is_reviewed)
+            .select_related('doctor__profile')
+            .first()
+        )
@@ -3,7 +3,7 @@ from rest_framework import serializers
 
 from apps.core.serializers import DateTimeTzAwareField
 from apps.reviews.constants import GRADE
-from apps.reviews.models import Review, ReviewGrade
+from apps.reviews.models import DoctorReviewStats, Review, ReviewGrade
 
 
 class ReviewPublicSerializer(serializers.ModelSerializer):
@@ -92,3 +92,22 @@ class CreateAppointmentReviewSerializer(serializers.ModelSerializer):
 
 class ReviewListFilterParamsSerializer(serializers.Serializer):
     doctor_id = serializers.IntegerField(required=False, min_value=1)
+
+
+class DoctorReviewStatsSerializer(serializers.ModelSerializer):
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    average_grade = serializers.FloatField(read_only=True)
+    average_grade_30d = serializers.FloatField(read_only=True)
+    average_grade_90d = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = DoctorReviewStats
+        read_only_fields = fields = (
+            'reviews_count',
+            'histogram',
+            'average_grade',
+            'average_grade_30d',
+            'grades_count_30d',
+            'average_grade_90d',
+            'grades_count_90d',
+        )
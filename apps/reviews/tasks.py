@@ -0,0 +1,21 @@
+from apps.clinics.models import Doctor
+from apps.core.utils import crontab_in_default_tz
+from apps.reviews.constants import REVIEW_STATS_RECONCILE_CHUNK_SIZE
+from apps.reviews.models import DoctorReviewStats
+from apps.tools.tasks import OneAtATimeTask
+
+
+class ReconcileDoctorReviewStatsTask(OneAtATimeTask):
+    """
+    Сверка DoctorReviewStats с отзывами: сдвигает окна 30/90 дней
+    и исправляет расхождения (удаленные отзывы, правки мимо ORM)
+    """
+
+    run_every = crontab_in_default_tz(minute=30, hour=3)  # in settings.TIME_ZONE
+
+    def start(self):
+        doctor_ids = list(Doctor.all_objects.order_by('id').values_list('id', flat=True))
+        for offset in range(0, len(doctor_ids), REVIEW_STATS_RECONCILE_CHUNK_SIZE):
+            DoctorReviewStats.recalculate(
+                doctor_ids[offset : offset + REVIEW_STATS_RECONCILE_CHUNK_SIZE]
+            )
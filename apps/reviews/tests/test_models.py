@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.clinics.factories import DoctorFactory, PatientFactory
+from apps.reviews.models import DoctorReviewStats, Review
+
+
+class DoctorReviewStatsTest(TestCase):
+    maxDiff = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = DoctorFactory()
+        cls.patient = PatientFactory()
+
+    def _create_review(self, grade: int, is_displayed: bool = True, **kwargs) -> Review:
+        return Review.objects.create(
+            grade=grade,
+            text='text',
+            author_patient=self.patient,
+            doctor=self.doctor,
+            is_displayed=is_displayed,
+            **kwargs,
+        )
+
+    def _get_stats(self) -> DoctorReviewStats:
+        return DoctorReviewStats.objects.get(doctor=self.doctor)
+
+    def test_displayed_review_counted(self):
+        self._create_review(grade=5)
+        self._create_review(grade=4)
+        self._create_review(grade=1, is_displayed=False)
+
+        stats = self._get_stats()
+        self.assertEqual(stats.reviews_count, 2)
+        self.assertEqual(stats.histogram, {'1': 0, '2': 0, '3': 0, '4': 1, '5': 1})
+        self.assertEqual(stats.average_grade, 4.5)
+        self.assertEqual(stats.average_grade_30d, 4.5)
+
+    def test_display_and_grade_changes_applied(self):
+        review = self._create_review(grade=2, is_displayed=False)
+        review = Review.objects.get(pk=review.pk)
+
+        review.mark_displayed()
+        self.assertEqual(self._get_stats().histogram['2'], 1)
+
+        review.grade = 3
+        review.save()
+        stats = self._get_stats()
+        self.assertEqual(stats.histogram['2'], 0)
+        self.assertEqual(stats.histogram['3'], 1)
+        self.assertEqual(stats.grades_sum, 3)
+
+        review.mark_hidden()
+        stats = self._get_stats()
+        self.assertEqual(stats.reviews_count, 0)
+        self.assertIsNone(stats.average_grade)
+
+    def test_bulk_update_recalculates(self):
+        self._create_review(grade=5)
+        self._create_review(grade=3)
+
+        Review.objects.filter(doctor=self.doctor).mark_hidden()
+        self.assertEqual(self._get_stats().reviews_count, 0)
+
+        Review.objects.filter(doctor=self.doctor, grade=3).mark_displayed()
+        stats = self._get_stats()
+        self.assertEqual(stats.reviews_count, 1)
+        self.assertEqual(stats.average_grade, 3.0)
+
+    def test_windows(self):
+        self._create_review(grade=5)
+        self._create_review(grade=1, created=timezone.now() - timedelta(days=60))
+        self._create_review(grade=1, created=timezone.now() - timedelta(days=120))
+
+        stats = self._get_stats()
+        self.assertEqual((stats.grades_count_30d, stats.average_grade_30d), (1, 5.0))
+        self.assertEqual((stats.grades_count_90d, stats.average_grade_90d), (2, 3.0))
+        self.assertEqual(stats.reviews_count, 3)
+
+    def test_recalculate_fixes_drift(self):
+        self._create_review(grade=4)
+        DoctorReviewStats.objects.filter(doctor=self.doctor).update(reviews_count=10, grade_4=0)
+        other_doctor = DoctorFactory()
+
+        DoctorReviewStats.recalculate([self.doctor.id, other_doctor.id])
+
+        stats = self._get_stats()
+        self.assertEqual(stats.reviews_count, 1)
+        self.assertEqual(stats.histogram['4'], 1)
+        self.assertEqual(DoctorReviewStats.objects.get(doctor=other_doctor).reviews_count, 0)
+
+    def test_delete_applied(self):
+        self._create_review(grade=5)
+        review = Review.objects.get(pk=self._create_review(grade=2).pk)
+
+        review.delete()
+
+        stats = self._get_stats()
+        self.assertEqual(stats.reviews_count, 1)
+        self.assertEqual(stats.histogram['2'], 0)
+        self.assertEqual(stats.average_grade, 5.0)
+
+    def test_bulk_delete_recalculates(self):
+        self._create_review(grade=5)
+        self._create_review(grade=3)
+
+        Review.objects.filter(doctor=self.doctor, grade=5).delete()
+
+        stats = self._get_stats()
+        self.assertEqual(stats.reviews_count, 1)
+        self.assertEqual(stats.average_grade, 3.0)
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 import mock
 from django.test import override_settings
 from rest_framework import status
@@ -474,3 +476,75 @@ class AppointmentListWithReviewTest(APITestCase):
         actual_keys = response_data[0].keys()
         self.assertEqual(self.EXPECTED_APPOINTMENT_LIST_KEYS, actual_keys, actual_keys)
         self.assertEqual(2, response_data[0][GRADE])
+
+
+class ReviewListViewTest(APITestCase):
+    url = reverse('api.v1:reviews:list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient_user: User = PatientUserFactory()
+        cls.doctor = DoctorFactory()
+        cls.reviews = [
+            Review.objects.create(
+                author_patient=cls.patient_user.patient,
+                doctor=cls.doctor,
+                text=f'review {number}',
+                grade=5,
+                is_displayed=True,
+            )
+            for number in range(3)
+        ]
+        Review.objects.create(
+            author_patient=cls.patient_user.patient, doctor=cls.doctor, text='hidden', grade=1
+        )
+
+    def test_cursor_pages(self):
+        self.client.force_login(self.patient_user)
+
+        response = self.client.get(self.url, {'doctor_id': self.doctor.id, 'limit': 2})
+        self.assertEqual(status.HTTP_200_OK, response.status_code, response.json())
+        first_page = response.json()
+        self.assertNotIn('count', first_page)
+        self.assertIsNone(first_page['previous'])
+
+        response = self.client.get(first_page['next'])
+        second_page = response.json()
+        self.assertIsNone(second_page['next'])
+
+        ids = [review['id'] for review in first_page['results'] + second_page['results']]
+        self.assertEqual([review.id for review in reversed(self.reviews)], ids)
+
+    def test_etag__changes_with_page(self):
+        self.client.force_login(self.patient_user)
+        params = {'doctor_id': self.doctor.id, 'limit': 2}
+        etag = self.client.get(self.url, params)['ETag']
+
+        Review.objects.create(
+            author_patient=self.patient_user.patient,
+            doctor=self.doctor,
+            text='new',
+            grade=5,
+            is_displayed=True,
+        )
+
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+
+    def test_etag__changes_with_page_order(self):
+        self.client.force_login(self.patient_user)
+        params = {'doctor_id': self.doctor.id, 'limit': 2}
+        etag = self.client.get(self.url, params)['ETag']
+
+        # старый отзыв поднимается на первую страницу без изменения modified
+        Review.objects.filter(pk=self.reviews[0].pk).update(
+            created=self.reviews[2].created + timedelta(seconds=1)
+        )
+
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [self.reviews[0].id, self.reviews[2].id],
+            [review['id'] for review in response.json()['results']],
+        )
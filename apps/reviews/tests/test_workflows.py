@@ -1,11 +1,16 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+from mock import Mock, patch
 
 from apps.appointments.constants import AppointmentStatus, APPOINTMENT_ID
 from apps.appointments.factories import AppointmentFactory
-from apps.clinics.factories import PatientFactory
+from apps.clinics.factories import PatientFactory, PatientUserFactory
 from apps.profiles.models import Relation
-from apps.reviews.constants import GRADE
-from apps.reviews.workflow import ReviewWorkflow
+from apps.reviews.constants import GRADE, MAX_REVIEW_REQUEST_DAYS
+from apps.reviews.models import Review
+from apps.reviews.workflow import ReviewValidator, ReviewWorkflow
 from rest_framework.exceptions import ValidationError as DRFValidationError, ErrorDetail
 
 
@@ -64,3 +69,109 @@ class ReviewWorkflowTest(TestCase):
             err_context.exception.detail,
             err_context.exception.detail,
         )
+
+    def test_create_fail__already_reviewed(self):
+        data = {APPOINTMENT_ID: self.appointment.id, GRADE: 4, 'text': 'first'}
+        ReviewWorkflow.create_by_patient(patient=self.patient, data=dict(data))
+
+        with self.assertRaises(DRFValidationError) as err_context:
+            ReviewWorkflow.create_by_patient(patient=self.patient, data=dict(data))
+        self.assertEqual(
+            [ErrorDetail(string='Вы уже отправили отзыв по этой записи на прием', code='invalid')],
+            err_context.exception.detail,
+        )
+
+    def test_validate_create_data__single_query(self):
+        data = {
+            APPOINTMENT_ID: self.appointment.id,
+            GRADE: 5,
+            'text': 'test_validate_create_data__single_query',
+            'patient': self.patient,
+        }
+        doctor_name = self.appointment.doctor.short_full_name
+        with self.assertNumQueries(1):
+            validated = ReviewValidator.validate_create_data(data)
+            # врач загружен тем же запросом - для ответа и уведомления
+            self.assertEqual(validated['appointment'].doctor.short_full_name, doctor_name)
+        self.assertEqual(validated['doctor_id'], self.appointment.doctor_id)
+
+
+@patch('apps.reviews.workflow.group')
+@patch('apps.reviews.workflow.send_event')
+@patch('apps.reviews.workflow.is_reviews_enabled', Mock(is_enabled=True))
+class AskForAppointmentsReviewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = PatientUserFactory().patient
+        cls.master_patient = PatientUserFactory().patient
+        Relation.objects.create(
+            master=cls.master_patient.profile,
+            slave=cls.patient.profile,
+            can_update_slave_appointments=True,
+        )
+
+    def _create_finished_appointment(self, **kwargs):
+        end = kwargs.pop('end', timezone.now() - timedelta(hours=1))
+        return AppointmentFactory(
+            patient=kwargs.pop('patient', self.patient),
+            status=AppointmentStatus.FINISHED,
+            start=end - timedelta(minutes=30),
+            end=end,
+            **kwargs,
+        )
+
+    def _get_sent(self, send_event):
+        return sorted(
+            (call.kwargs['appointment_id'], call.kwargs['user_id'])
+            for call in send_event.s.call_args_list
+        )
+
+    def test_notifies_patient_and_master_users(self, send_event, group):
+        appointment = self._create_finished_appointment()
+
+        sent_count = ReviewWorkflow.ask_for_appointments_reviews([appointment.id])
+
+        self.assertEqual(sent_count, 2)
+        self.assertEqual(
+            self._get_sent(send_event),
+            sorted(
+                [
+                    (appointment.id, self.patient.profile.user.id),
+                    (appointment.id, self.master_patient.profile.user.id),
+                ]
+            ),
+        )
+        group.return_value.apply_async.assert_called_once_with()
+
+    def test_skips_not_allowed_appointments(self, send_event, group):
+        reviewed = self._create_finished_appointment()
+        Review.objects.create(
+            grade=5, author_patient=self.patient, doctor=reviewed.doctor, appointment=reviewed
+        )
+        expired = self._create_finished_appointment(
+            end=timezone.now() - timedelta(days=MAX_REVIEW_REQUEST_DAYS + 2)
+        )
+        planned = self._create_finished_appointment()
+        planned.status = AppointmentStatus.PLANNED
+        planned.save()
+
+        sent_count = ReviewWorkflow.ask_for_appointments_reviews(
+            [reviewed.id, expired.id, planned.id]
+        )
+
+        self.assertEqual(sent_count, 0)
+        send_event.s.assert_not_called()
+        group.assert_not_called()
+
+    def test_queries_depend_on_chunks_count(self, send_event, group):
+        other_patient = PatientUserFactory().patient
+        appointment_ids = [self._create_finished_appointment().id for _ in range(2)] + [
+            self._create_finished_appointment(patient=other_patient).id for _ in range(2)
+        ]
+
+        # на пачку: приемы, пользователи профилей, пользователи основных профилей
+        with self.assertNumQueries(6):
+            sent_count = ReviewWorkflow.ask_for_appointments_reviews(appointment_ids, chunk_size=2)
+
+        self.assertEqual(sent_count, 6)
+        self.assertEqual(group.return_value.apply_async.call_count, 2)
@@ -5,8 +5,10 @@ from rest_framework.response import Response
 
 from apps.clinics.models import Patient
 from apps.clinics.utils import PatientAPIViewMixin
+from apps.core.views import ConditionalGetMixin
 from apps.profiles.permissions import IsPatient
 from apps.reviews.models import Review
+from apps.reviews.paginators import ReviewPagination
 from apps.reviews.selectors import ReviewSelector
 from apps.reviews.serializers import (
     ReviewPrivateSerializer,
@@ -17,14 +19,16 @@ from apps.reviews.serializers import (
 from apps.reviews.workflow import ReviewWorkflow
 
 
-class ReviewListView(ListAPIView):
+class ReviewListView(ConditionalGetMixin, ListAPIView):
     """
     Фильтрация:
     * ?doctor_id=23
     """
 
     serializer_class = ReviewPublicSerializer
+    conditional_related_lookups = ('doctor', 'author_patient__profile')
     permission_classes = (IsAuthenticated, IsPatient)
+    pagination_class = ReviewPagination
 
     def get_patient(self) -> Patient:
         patient = self.request.user.profile.patient
@@ -42,6 +46,22 @@ class ReviewListView(ListAPIView):
             initial_qs, **filter_params_serializer.validated_data
         )
 
+    def get_conditional_queryset(self):
+        # состояние только строк текущей страницы: без COUNT по всем отзывам врача
+        queryset = super().get_conditional_queryset()
+        page = self.paginator.paginate_queryset(
+            queryset.select_related(None).only('pk', 'created'), self.request, view=self
+        )
+        self._conditional_page_ids = [review.pk for review in page]
+        return queryset.filter(pk__in=self._conditional_page_ids)
+
+    def get_conditional_state(self):
+        # состав и порядок страницы: отзыв может смениться на другой (или переехать)
+        # без изменения количества и max(modified) строк страницы
+        parts, last_modified = super().get_conditional_state()
+        parts.append('page:' + ','.join(map(str, self._conditional_page_ids)))
+        return parts, last_modified
+
 
 class PatientReviewListView(ReviewListView):
     permission_classes = (IsAuthenticated, IsPatient)
@@ -52,9 +72,10 @@ class PatientReviewListView(ReviewListView):
         return ReviewSelector.created_by_patient(patient_id=patient.id)
 
 
-class SinglePatientReviewView(RetrieveAPIView):
+class SinglePatientReviewView(ConditionalGetMixin, RetrieveAPIView):
     permission_classes = (IsAuthenticated, IsPatient)
     serializer_class = ReviewPrivateSerializer
+    conditional_related_lookups = ReviewListView.conditional_related_lookups
 
     def get_patient(self) -> Patient:
         patient = self.request.user.profile.patient
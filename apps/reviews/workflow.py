@@ -1,7 +1,7 @@
 import logging
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List
 
-from constance import config as constance_config
+from celery import group
 from django.conf import settings
 from django.core.mail import send_mail
 from django.utils.translation import ugettext_lazy as _
@@ -12,15 +12,16 @@ from apps.appointments.constants import (
     APPOINTMENT__ASK_FOR_REVIEW,
 )
 from apps.appointments.models import Appointment
-from apps.appointments.selectors import PatientAppointments
 from apps.appointments.utils import AppointmentUtils
 from apps.clinics.constants import PATIENT
 from apps.clinics.models import Doctor
 from apps.core.admin import get_change_url
+from apps.core.config import runtime_config
 from apps.core.utils import make_absolute_url
+from apps.feature_toggles.ops_features import is_reviews_enabled
 from apps.notify import send_event
 from apps.notify.constants import PUSH
-from apps.reviews.constants import ReviewStatus, GRADE
+from apps.reviews.constants import ReviewStatus, GRADE, REVIEW_REQUEST_CHUNK_SIZE
 from apps.reviews.models import Review
 from apps.reviews.selectors import ReviewSelector
 from apps.reviews.tools import is_adding_review_allowed
@@ -37,13 +38,13 @@ class ReviewValidator:
         patient = data.get('patient')
         text = data.get('text')
         grade = data.get('grade')
-        appointment: Optional[Appointment] = PatientAppointments(patient).all().filter(
-            id=appointment_id
-        ).first()
+        appointment: Optional[Appointment] = ReviewSelector.appointment_for_patient_review(
+            patient, appointment_id
+        )
         if not appointment:
             raise ValidationError(_("No appointment found for passed appointment_id"))
 
-        if ReviewSelector.created_by_patient(patient).for_appointment(appointment_id).exists():
+        if appointment.is_reviewed_by_patient:
             raise ValidationError(_("Вы уже отправили отзыв по этой записи на прием"))
         cls.validate_review_text(text)
         if not appointment.doctor_id:
@@ -55,6 +56,7 @@ class ReviewValidator:
             logging.error(err, extra={APPOINTMENT_ID: appointment_id, "create_data": data})
             raise err
 
+        data['appointment'] = appointment
         data['doctor_id'] = appointment.doctor_id
         return data
 
@@ -64,9 +66,7 @@ class ReviewWorkflow:
     validator = ReviewValidator
 
     @classmethod
-    def ask_for_appointment_review(cls, appointment: Appointment):
-        if not is_adding_review_allowed(appointment):
-            return
+    def get_review_request_context(cls, appointment: Appointment) -> Dict[str, str]:
         doctor_and_date = ""
         doctor_short_name = appointment.doctor.short_full_name
         if doctor_short_name:
@@ -75,38 +75,89 @@ class ReviewWorkflow:
             doctor_and_date += f"\nДата: {appointment.start_date_tz_formatted__short} {appointment.start_time_tz_formatted }"
         if doctor_and_date:
             doctor_and_date += "\n"
-        event_context = {
+        return {
             APPOINTMENT_ID: appointment.id,
             PATIENT: appointment.patient.short_full_name,
             "doctor_and_date": doctor_and_date,
         }
 
+    @classmethod
+    def get_review_request_params(
+        cls, appointment: Appointment, user_id: int, context: dict
+    ) -> dict:
+        return dict(
+            event_name=APPOINTMENT__ASK_FOR_REVIEW,
+            user_id=user_id,
+            channel=PUSH,
+            appointment_id=appointment.id,
+            context=context,
+        )
+
+    @classmethod
+    def ask_for_appointment_review(cls, appointment: Appointment):
+        if not is_adding_review_allowed(appointment):
+            return
+        event_context = cls.get_review_request_context(appointment)
+
         user_ids = AppointmentUtils.get_user_ids_to_notify(appointment)
         for receiver_user_id in user_ids:
-            params = dict(
-                event_name=APPOINTMENT__ASK_FOR_REVIEW,
-                user_id=receiver_user_id,
-                channel=PUSH,
-                appointment_id=appointment.id,
-                context=event_context,
-            )
+            params = cls.get_review_request_params(appointment, receiver_user_id, event_context)
             send_event(**params)
 
+    @classmethod
+    def ask_for_appointments_reviews(
+        cls, appointment_ids: Iterable[int], chunk_size: int = REVIEW_REQUEST_CHUNK_SIZE
+    ) -> int:
+        """
+        `ask_for_appointment_review` для многих приемов сразу, пачками по `chunk_size`.
+        На пачку: запрос приемов (уже с отзывом отсекаются в нем же), два запроса
+        получателей и одна группа задач send_event - число запросов зависит
+        от количества пачек, а не приемов.
+        :return: количество отправленных уведомлений
+        """
+        if not is_reviews_enabled.is_enabled:
+            return 0
+
+        appointment_ids = sorted(set(appointment_ids))
+        sent_count = 0
+        for offset in range(0, len(appointment_ids), chunk_size):
+            chunk_ids = appointment_ids[offset : offset + chunk_size]
+            appointments = list(
+                ReviewSelector.appointments_to_ask_for_review()
+                .filter(id__in=chunk_ids)
+                .select_related('doctor__profile', 'patient__profile')
+                .order_by('id')
+            )
+            user_ids_by_appointment = AppointmentUtils.get_user_ids_to_notify_bulk(appointments)
+
+            signatures = []
+            for appointment in appointments:
+                event_context = cls.get_review_request_context(appointment)
+                for receiver_user_id in sorted(user_ids_by_appointment[appointment.id]):
+                    params = cls.get_review_request_params(
+                        appointment, receiver_user_id, event_context
+                    )
+                    signatures.append(send_event.s(**params))
+            if signatures:
+                group(signatures).apply_async()
+            sent_count += len(signatures)
+        return sent_count
+
     @classmethod
     def create_by_patient(cls, patient, data) -> model:
         data['patient'] = patient
         data = cls.validator.validate_create_data(data)
 
-        doctor_id = data['doctor_id']
-        appointment_id = data.get('appointment_id')
+        appointment: Appointment = data['appointment']
         text = data['text']
         grade = data['grade']
 
+        # запись и врач уже загружены валидатором - переиспользуем для ответа и уведомления
         review = cls.model.objects.create(
             grade=grade,
             author_patient=patient,
-            doctor_id=doctor_id,
-            appointment_id=appointment_id,
+            doctor=appointment.doctor,
+            appointment=appointment,
             text=text,
             is_displayed=False,
             status=ReviewStatus.NEW,
@@ -117,7 +168,7 @@ class ReviewWorkflow:
 
     @classmethod
     def notify_staff_about_new_review(cls, review: Review) -> None:
-        emails: str = constance_config.REVIEWS_NOTIFICATION_EMAILS
+        emails: str = runtime_config.REVIEWS_NOTIFICATION_EMAILS
         if not emails:
             return
 
@@ -5,12 +5,14 @@ from typing import Type
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import transaction
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.module_loading import import_string
 from django.utils.translation import ugettext as __
 
 from apps.auth.utils import get_user_by_phone
+from apps.profiles.models import Contact
 from apps.sms.models import SMSCode
 from .backends import BaseBackend
 from ..notify.constants import SMS
@@ -101,11 +103,24 @@ class SMSCodeHandler:
         except SMSCode.DoesNotExist:
             raise ValidationError(__('Неверный код'))
 
-        code.is_used = True
-        code.save()
-
+        contacts = None
         if not empty_user and self.user:
-            self.user.contacts.filter(type='phone', value=self.phone).update(is_confirmed=True)
+            contacts = self.user.contacts.filter_phone(self.phone)
+            # подтвержденный основной телефон у другого пользователя - update упадет
+            # на contact_primary_phone_key_unique; проверяем до того, как код потрачен
+            confirmed_by_other = (
+                Contact.objects.filter_phone(self.phone)
+                .filter(is_primary=True, is_confirmed=True)
+                .exclude(user=self.user)
+            )
+            if contacts.filter(is_primary=True).exists() and confirmed_by_other.exists():
+                raise ValidationError(__('Контакт принадлежит другому пользователю'))
+
+        with transaction.atomic():
+            code.is_used = True
+            code.save()
+            if contacts is not None:
+                contacts.update(is_confirmed=True)
         return True
 
 
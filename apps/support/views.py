@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 
 from apps.core.admin import get_change_url
 from apps.core.utils import make_absolute_url
+from apps.core.views import ConditionalGetMixin
 from apps.support.models import FrequentQuestion
 from apps.support.serializers import SupportRequestSerializer, FrequentQuestionSerializer
 
@@ -37,6 +38,6 @@ class SupportRequestView(CreateAPIView):
         send_mail(subject, message, settings.SYSTEM_SENDER_EMAIL, [settings.FAQ_SUPPORT_EMAIL])
 
 
-class FAQListView(ListAPIView):
+class FAQListView(ConditionalGetMixin, ListAPIView):
     serializer_class = FrequentQuestionSerializer
     queryset = FrequentQuestion.objects.displayed()
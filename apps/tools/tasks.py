@@ -3,10 +3,12 @@ from datetime import timedelta, datetime
 from PIL import ExifTags, Image
 from celery.task import PeriodicTask, Task
 from celery.task import task
+from django.apps import apps as django_apps
 from django.conf import settings
 from django.utils import timezone
 from sentry_sdk import capture_message as sentry_capture_message
 
+from apps.core.images import build_image_variants
 from apps.logging.utils import RecordLog
 from apps.tools.redis_storage import SimpleRedisStorage
 
@@ -69,6 +71,28 @@ def resize_image(path, image_type):
         RecordLog('sentry.debug').warn('Cannot process image ({}): {}'.format(image_type, path))
 
 
+@task
+def generate_image_variants(model_label, pk, field_name):
+    """
+    Builds resized copies of the image stored in `field_name` (see ImageVariantsMixin)
+    """
+    model = django_apps.get_model(model_label)
+    instance = model._base_manager.filter(pk=pk).first()
+    image = instance and getattr(instance, field_name)
+    if not image:
+        return
+
+    try:
+        variants = build_image_variants(image.name, image.storage)
+    except (IOError, ValueError):
+        RecordLog('sentry.debug').warn(
+            f'Cannot build image variants: {model_label} {pk} {image.name}'
+        )
+        return
+
+    instance.set_image_variants(field_name, variants)
+
+
 class OneAtATimeMixin(object):
     """
     An abstract tasks with the ability to detect if it has already been queued.
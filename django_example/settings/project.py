@@ -100,7 +100,7 @@ REST_FRAMEWORK = {
     # Only used if the `serializer_class` attribute is not set on a view.
     'DEFAULT_MODEL_SERIALIZER_CLASS': 'rest_framework.serializers.HyperlinkedModelSerializer',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'apps.auth.authenticate.ClinicTokenAuthentication',
+        'apps.profiles.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         # 'rest_framework.authentication.SessionAuthentication',
     ),
@@ -133,6 +133,7 @@ MIDDLEWARE.extend(
         'django.contrib.redirects.middleware.RedirectFallbackMiddleware',
         'django.contrib.flatpages.middleware.FlatpageFallbackMiddleware',
         'apps.core.middleware.HttpClientMiddleware',
+        'apps.core.middleware.RuntimeConfigMiddleware',
         'easyaudit.middleware.easyaudit.EasyAuditMiddleware',
     ]
 )
@@ -248,8 +249,22 @@ DATETIME_DATE_FORMAT = '%d.%m.%Y'
 REDIS_HOST = os.environ.get('REDIS_HOST', 'redis')
 REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
 
+# общий для всех процессов (web, celery) кэш: версии in-process индексов и данных,
+# см. apps.core.cache_utils
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get(
+            'CACHE_REDIS_CONNECTION', f'redis://{REDIS_HOST}:{REDIS_PORT}/4'
+        ),
+        'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+    }
+}
+
 # region Constance
 CONSTANCE_REDIS_CONNECTION = f'redis://{REDIS_HOST}:{REDIS_PORT}/1'
+# сбрасывает process-local копии настроек, см. apps.core.config.RuntimeConfig
+CONSTANCE_BACKEND = 'apps.core.config.VersionedRedisBackend'
 
 CONSTANCE_CONFIG_DICT = {
 }
@@ -336,6 +351,12 @@ LOAD_FIXTURE_MODE = False
 
 MAX_IMAGE_ORIGINAL_SIZE = (2048, 2048)
 
+# уменьшенные копии загруженных картинок, см. apps.core.images
+IMAGE_VARIANTS_DIR = 'image_variants'
+IMAGE_VARIANT_WIDTHS = (64, 128, 256, 512, 1024)
+IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+IMAGE_VARIANT_QUALITY = 80
+
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
 CORS_REPLACE_HTTPS_REFERER = True
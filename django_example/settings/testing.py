@@ -71,7 +71,7 @@ URLSHORTENER_HOST = None
 # TODO ОГРОООМНЫЙ костыль, чтобы авторизация через сессию была активна.
 #  Нужно будет что-то с этим сделать
 REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = (
-    'apps.auth.authenticate.ClinicTokenAuthentication',
+    'apps.profiles.authentication.CachedTokenAuthentication',
     'rest_framework.authentication.BasicAuthentication',
     'rest_framework.authentication.SessionAuthentication',
 )
@@ -13,8 +13,14 @@ urlpatterns = [
         name='clinic_application_config',
     ),
     url(r'^services$', views.ServiceListView.as_view(), name='service_list'),
+    url(r'^services/tree$', views.ServiceTreeView.as_view(), name='service_tree'),
     url(r'^services/(?P<pk>\d+)$', views.OneServiceView.as_view(), name='service_item'),
     url(r'^subsidiaries$', views.SubsidiaryListView.as_view(), name='subsidiary_list'),
+    url(
+        r'^subsidiaries/nearest$',
+        views.SubsidiaryNearestListView.as_view(),
+        name='subsidiary_nearest_list',
+    ),
     url(r'^subsidiaries/(?P<pk>\d+)$', views.OneSubsidiaryView.as_view(), name='subsidiary_item'),
     url(r'^doctors$', views.DoctorListView.as_view(), name='doctor_list'),
     url(r'^doctors/(?P<pk>\d+)$', views.OneDoctorView.as_view(), name='doctor_item'),